@@ -1,15 +1,36 @@
 from __future__ import annotations
-from dataclasses import dataclass
+
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, List
-import numpy as np
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
 import librosa
+import numpy as np
+
+from .filterbank import (
+    apply_filterbank,
+    band_filterbank,
+    band_names,
+    bar_filterbank,
+    mel_filterbank,
+    normalize_shared,
+)
+from .stages import StageRunner
+from .waveform import WaveformPyramid, pyramid_from, waveform_pyramid
 
 # Reusar utilidades previas
 try:
-    from .media_probe import run_ffprobe, parse_audio_info, is_aac_lc_passthrough_possible, AudioInfo
+    from .media_probe import (
+        AudioInfo,
+        decode_pcm,
+        is_aac_lc_passthrough_possible,
+        parse_audio_info,
+        run_ffprobe,
+    )
 except Exception:  # pragma: no cover - fallback si faltan dependencias
     run_ffprobe = None
+    decode_pcm = None
     parse_audio_info = None
     is_aac_lc_passthrough_possible = None
 
@@ -17,19 +38,29 @@ except Exception:  # pragma: no cover - fallback si faltan dependencias
         ...
 
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .analysis_cache import AnalysisCache
+
+
 # --------- Carga básica (ya implementada en Tarea 03; mantener) ---------
-def load_audio(path: str | Path) -> tuple[np.ndarray, int, AudioInfo]:
+def load_audio(
+    path: str | Path, *, start: float = 0.0, duration: Optional[float] = None
+) -> tuple[np.ndarray, int, AudioInfo]:
+    """Carga en el SR nativo; `start`/`duration` (s) leen solo esa región."""
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(p)
-    y, sr = librosa.load(str(p), sr=None, mono=False)
+    y, sr = librosa.load(str(p), sr=None, mono=False, offset=float(start), duration=duration)
     if y.ndim == 1:
         y = y[None, :]
     y = y.astype(np.float32, copy=False)
     if parse_audio_info is None or run_ffprobe is None:
         info = AudioInfo()
     else:
-        info = parse_audio_info(run_ffprobe(p))
+        try:
+            info = parse_audio_info(run_ffprobe(p))
+        except RuntimeError:
+            info = AudioInfo()
         if info is None:  # pragma: no cover - defensive
             info = AudioInfo()
     if getattr(info, "sample_rate", 0) == 0:
@@ -42,34 +73,73 @@ def load_audio(path: str | Path) -> tuple[np.ndarray, int, AudioInfo]:
     return y, int(sr), info
 
 
-def normalize_sr(data: np.ndarray, sr: int, target: int = 44100, mono: Optional[str] = "mix") -> tuple[np.ndarray, int]:
+def normalize_sr(
+    data: np.ndarray,
+    sr: int,
+    target: int = 44100,
+    mono: Optional[str] = "mix",
+    *,
+    runner: Optional[StageRunner] = None,
+) -> tuple[np.ndarray, int]:
     if data.ndim != 2:
         raise ValueError("Expected shape (ch, n)")
-    ch, _ = data.shape
-    out = []
-    for c in range(ch):
-        out.append(librosa.resample(y=data[c], orig_sr=sr, target_sr=target))
-    res = np.stack(out, axis=0)
+    # El remuestreo es lineal: mezclar/seleccionar antes remuestrea un solo canal
     if mono == "mix":
-        res = np.mean(res, axis=0, keepdims=True)
+        data = np.mean(data, axis=0, keepdims=True)
     elif mono == "left":
-        res = res[:1, :]
-    elif mono == "keep":
-        pass
-    else:
+        data = data[:1, :]
+    elif mono != "keep":
         raise ValueError("mono must be one of 'mix','left','keep'")
+
+    def resample(channel: np.ndarray) -> np.ndarray:
+        return librosa.resample(y=channel, orig_sr=sr, target_sr=target)
+
+    if runner is not None:
+        out = runner.map("resample", resample, list(data))
+    else:
+        out = [resample(channel) for channel in data]
+    res = np.stack(out, axis=0)
     return res.astype(np.float32, copy=False), target
 
 
+def decode_audio(
+    path: str | Path,
+    *,
+    target_sr: int = 44100,
+    mono: Optional[str] = "mix",
+    runner: Optional[StageRunner] = None,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+) -> tuple[np.ndarray, AudioInfo]:
+    """Audio (ch, n) a `target_sr` ya mezclado según `mono`, más sus metadatos.
+
+    Usa el pipe de ffmpeg (`media_probe.decode_pcm`: una pasada, un buffer, sin
+    ffprobe); si ffmpeg no está disponible cae a `load_audio` + `normalize_sr`.
+    `start`/`duration` (s) limitan la decodificación a esa región.
+    """
+    if decode_pcm is not None:
+        try:
+            return decode_pcm(path, sr=target_sr, mono=mono, start=start, duration=duration)
+        except RuntimeError:
+            pass
+    y, sr, info = load_audio(path, start=start, duration=duration)
+    y, _ = normalize_sr(y, sr, target=target_sr, mono=mono, runner=runner)
+    return y, info
+
+
 def peak_normalize(data: np.ndarray, peak: float = 0.98) -> np.ndarray:
     m = np.max(np.abs(data)) + 1e-12
     return (data / m * peak).astype(np.float32, copy=False)
 
 
-def aac_passthrough_ok(info: AudioInfo, target_sr: int = 44100, target_channels: int | None = 2) -> bool:
+def aac_passthrough_ok(
+    info: AudioInfo, target_sr: int = 44100, target_channels: int | None = 2
+) -> bool:
     if is_aac_lc_passthrough_possible is None:
         return False
-    return is_aac_lc_passthrough_possible(info, target_sr=target_sr, target_channels=target_channels)
+    return is_aac_lc_passthrough_possible(
+        info, target_sr=target_sr, target_channels=target_channels
+    )
 
 
 # --------- Nuevas utilidades DSP ---------
@@ -78,50 +148,430 @@ class AnalysisResult:
     sr: int
     hop: int
     n_fft: int
-    times: np.ndarray                  # (T,)
-    S_mag: np.ndarray                  # (F, T) magnitud (opcional para depurar)
-    freqs: np.ndarray                  # (F,)
-    energy_global: np.ndarray          # (T,) 0..1
+    times: np.ndarray  # (T,)
+    S_mag: Optional[np.ndarray]  # (F, T) magnitud (None en modo streaming)
+    freqs: np.ndarray  # (F,)
+    energy_global: np.ndarray  # (T,) 0..1
     energy_bands: Dict[str, np.ndarray]  # {'bass':(T,), 'mid':(T,), 'treble':(T,)}
-    onset_envelope: np.ndarray         # (T,)
-    onset_frames: np.ndarray           # (K,)
-    onset_times: np.ndarray            # (K,)
+    onset_envelope: np.ndarray  # (T,)
+    onset_frames: np.ndarray  # (K,)
+    onset_times: np.ndarray  # (K,)
     tempo_bpm: float
-    beat_frames: np.ndarray            # (M,)
-    beat_times: np.ndarray             # (M,)
+    beat_frames: np.ndarray  # (M,)
+    beat_times: np.ndarray  # (M,)
+    S_db16: Optional[np.ndarray] = None  # (F, T) dB en float16 (representación reducida)
+    bar_spectrum: Optional[np.ndarray] = None  # (bars, T) espectro por barra 0..1
+    offset: float = 0.0  # s: posición en la pista de times[0] (análisis por ventana)
+    waveform: Optional[np.ndarray] = None  # (N, 3) int16 pirámide min/max/RMS (ver waveform.py)
+    waveform_block: int = 0  # muestras por punto del nivel 0 de `waveform`
+    waveform_samples: int = 0  # muestras de audio que resume `waveform`
+    norm_scales: Dict[str, float] = field(default_factory=dict, repr=False, compare=False)
+    stats: Dict[str, float] = field(default_factory=dict, repr=False, compare=False)
+    S_loader: Optional[Callable[[], np.ndarray]] = field(default=None, repr=False, compare=False)
+
+    def spectrogram(self, *, keep: bool = False) -> np.ndarray:
+        """Magnitud (F, T) completa: la guardada, la del loader perezoso o la reconstruida de dB.
+
+        Con `keep=True` el resultado queda materializado en `S_mag`.
+        """
+        if self.S_mag is not None:
+            return self.S_mag
+        if self.S_loader is not None:
+            S = self.S_loader()
+        elif self.S_db16 is not None:
+            S = db16_to_mag(self.S_db16)
+        else:
+            raise ValueError("spectrogram not available (analyzed with keep_spectrum='none')")
+        if keep:
+            self.S_mag = S
+        return S
+
+    def waveform_pyramid(self) -> Optional["WaveformPyramid"]:
+        """Pirámide de la forma de onda (a `sr`), o None si el resultado no la trae."""
+        return pyramid_from(self.waveform, self.sr, self.waveform_block, self.waveform_samples)
+
+    def set_waveform(self, pyramid: "WaveformPyramid") -> None:
+        self.waveform = pyramid.data
+        self.waveform_block = pyramid.block
+        self.waveform_samples = pyramid.n_samples
+
+    def compact(self) -> "CompactAnalysis":
+        """Copia ligera sin la matriz completa (apta para pasar a procesos worker)."""
+        return CompactAnalysis.from_result(self)
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(
+            a.nbytes
+            for a in (
+                self.times,
+                self.S_mag,
+                self.S_db16,
+                self.freqs,
+                self.energy_global,
+                self.onset_envelope,
+                self.onset_frames,
+                self.onset_times,
+                self.beat_frames,
+                self.beat_times,
+                self.bar_spectrum,
+                self.waveform,
+            )
+            if a is not None
+        )
+        return total + sum(v.nbytes for v in self.energy_bands.values())
+
+
+def mag_to_db16(S_mag: np.ndarray) -> np.ndarray:
+    """Magnitud -> dB en float16 (resolución ~0.03 dB en el rango útil)."""
+    return (20.0 * np.log10(np.maximum(S_mag, 1e-5))).astype(np.float16)
+
 
+def db16_to_mag(S_db: np.ndarray) -> np.ndarray:
+    return np.power(10.0, S_db.astype(np.float32) / 20.0, dtype=np.float32)
 
-def stft_mag(y_mono: np.ndarray, sr: int, n_fft: int = 2048, hop: int = 512) -> tuple[np.ndarray, np.ndarray]:
+
+class CompactAnalysis:
+    """Contenedor compacto (`__slots__`) con solo lo que usan mapeo y render."""
+
+    __slots__ = (
+        "sr",
+        "hop",
+        "n_fft",
+        "times",
+        "energy_global",
+        "energy_bands",
+        "onset_envelope",
+        "onset_frames",
+        "tempo_bpm",
+        "beat_frames",
+        "beat_times",
+        "bar_spectrum",
+        "S_db16",
+    )
+
+    def __init__(
+        self,
+        sr: int,
+        hop: int,
+        n_fft: int,
+        times: np.ndarray,
+        energy_global: np.ndarray,
+        energy_bands: Dict[str, np.ndarray],
+        onset_envelope: np.ndarray,
+        onset_frames: np.ndarray,
+        tempo_bpm: float,
+        beat_frames: np.ndarray,
+        beat_times: np.ndarray,
+        bar_spectrum: Optional[np.ndarray] = None,
+        S_db16: Optional[np.ndarray] = None,
+    ) -> None:
+        self.sr = sr
+        self.hop = hop
+        self.n_fft = n_fft
+        self.times = times
+        self.energy_global = energy_global
+        self.energy_bands = energy_bands
+        self.onset_envelope = onset_envelope
+        self.onset_frames = onset_frames
+        self.tempo_bpm = tempo_bpm
+        self.beat_frames = beat_frames
+        self.beat_times = beat_times
+        self.bar_spectrum = bar_spectrum
+        self.S_db16 = S_db16
+
+    @classmethod
+    def from_result(cls, res: AnalysisResult, *, keep_db16: bool = False) -> "CompactAnalysis":
+        return cls(
+            sr=res.sr,
+            hop=res.hop,
+            n_fft=res.n_fft,
+            times=res.times,
+            energy_global=res.energy_global,
+            energy_bands=dict(res.energy_bands),
+            onset_envelope=res.onset_envelope,
+            onset_frames=res.onset_frames,
+            tempo_bpm=res.tempo_bpm,
+            beat_frames=res.beat_frames,
+            beat_times=res.beat_times,
+            bar_spectrum=res.bar_spectrum,
+            S_db16=res.S_db16 if keep_db16 else None,
+        )
+
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes por campo (solo arrays)."""
+        out: Dict[str, int] = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray):
+                out[name] = int(value.nbytes)
+            elif isinstance(value, dict):
+                out[name] = int(sum(v.nbytes for v in value.values()))
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self.memory_report().values())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def stft_mag(
+    y_mono: np.ndarray, sr: int, n_fft: int = 2048, hop: int = 512
+) -> tuple[np.ndarray, np.ndarray]:
     S = librosa.stft(y=y_mono, n_fft=n_fft, hop_length=hop, window="hann", center=True)
     S_mag = np.abs(S)
     freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
     return S_mag, freqs
 
 
-def _band_indices(freqs: np.ndarray, band: List[int]) -> np.ndarray:
-    fmin, fmax = band
-    return np.where((freqs >= fmin) & (freqs < fmax))[0]
+def _fft_params(freqs: np.ndarray) -> tuple[int, int]:
+    """(sr, n_fft) a partir del vector de frecuencias de `stft_mag`."""
+    return int(round(2 * float(freqs[-1]))), 2 * (freqs.size - 1)
 
 
-def band_energies(S_mag: np.ndarray, freqs: np.ndarray, bands: List[List[int]]) -> Dict[str, np.ndarray]:
-    names = ["bass", "mid", "treble"]
-    out: Dict[str, np.ndarray] = {}
-    P = (S_mag ** 2)
-    for name, band in zip(names, bands):
-        idx = _band_indices(freqs, band)
-        if idx.size == 0:
-            out[name] = np.zeros(S_mag.shape[1], dtype=np.float32)
-        else:
-            e = np.sum(P[idx, :], axis=0)
-            scale = np.percentile(e, 99) + 1e-9
-            out[name] = (e / scale).astype(np.float32)
-    return out
+def band_energies(
+    S_mag: np.ndarray,
+    freqs: np.ndarray,
+    bands: List[List[int]],
+    *,
+    P: Optional[np.ndarray] = None,
+    scale: Optional[float] = None,
+    return_scale: bool = False,
+):
+    """Energía por banda con un solo producto por el banco de filtros.
+
+    Todas las bandas comparten escala (ver `filterbank.normalize_shared`); `scale`
+    la impone (p. ej. la de la pista completa). Con 3 bandas los nombres son
+    bass/mid/treble; con otro número, band0..bandN-1.
+    """
+    sr, n_fft = _fft_params(freqs)
+    if P is None:
+        P = np.square(S_mag, dtype=np.float32)
+    E, used = normalize_shared(apply_filterbank(band_filterbank(sr, n_fft, bands), P), scale=scale)
+    out = dict(zip(band_names(len(bands)), E))
+    return (out, used) if return_scale else out
+
+
+def bar_spectrum(
+    S_mag: np.ndarray,
+    freqs: np.ndarray,
+    count: int,
+    *,
+    distribution: str = "log",
+    P: Optional[np.ndarray] = None,
+    scale: Optional[float] = None,
+    return_scale: bool = False,
+):
+    """Espectro (count, T) para `RadialBars`, con escala común a todas las barras."""
+    sr, n_fft = _fft_params(freqs)
+    if P is None:
+        P = np.square(S_mag, dtype=np.float32)
+    fb = bar_filterbank(sr, n_fft, count, distribution=distribution)
+    E, used = normalize_shared(apply_filterbank(fb, P), scale=scale)
+    return (E, used) if return_scale else E
+
+
+def global_energy(
+    S_mag: np.ndarray,
+    *,
+    P: Optional[np.ndarray] = None,
+    scale: Optional[float] = None,
+    return_scale: bool = False,
+):
+    e = (S_mag**2).sum(axis=0) if P is None else P.sum(axis=0)
+    if scale is None:
+        scale = float(np.percentile(e, 99)) + 1e-9 if e.size else 1.0
+    out = (e / scale).astype(np.float32)
+    return (out, scale) if return_scale else out
+
+
+# Pasadas completas sobre (F, T) que cada consumidor hacía por su cuenta antes del
+# front-end compartido: S**2 en bandas, barras y energía global, y la stft + |S|**2
+# interna de onset_strength(y=...). Con la potencia compartida no se ejecuta ninguna.
+_OWN_POWER_PASSES = {"bands": 1, "bars": 1, "global": 1, "rhythm": 2}
+
+
+@dataclass
+class SpectralFrontend:
+    """STFT calculada una sola vez y la potencia que alimenta bandas, energía y onset."""
+
+    S_mag: Optional[np.ndarray]  # (F, T) float32, None si no se conserva
+    P: np.ndarray  # (F, T) float32 potencia
+    freqs: np.ndarray  # (F,)
 
 
-def global_energy(S_mag: np.ndarray) -> np.ndarray:
-    P = (S_mag ** 2).sum(axis=0)
-    scale = np.percentile(P, 99) + 1e-9
-    return (P / scale).astype(np.float32)
+def spectral_frontend(
+    y_mono: np.ndarray, sr: int, *, n_fft: int = 2048, hop: int = 512, keep_mag: bool = True
+) -> SpectralFrontend:
+    """STFT -> |S| -> |S|**2 en float32. Sin `keep_mag` el cuadrado se hace en el mismo buffer."""
+    S = librosa.stft(
+        y=y_mono, n_fft=n_fft, hop_length=hop, window="hann", center=True, dtype=np.complex64
+    )
+    mag = np.abs(S)
+    del S
+    if keep_mag:
+        P = np.square(mag)
+    else:
+        P = np.square(mag, out=mag)
+        mag = None
+    return SpectralFrontend(S_mag=mag, P=P, freqs=librosa.fft_frequencies(sr=sr, n_fft=n_fft))
+
+
+def onset_from_power(P: np.ndarray, sr: int, *, n_fft: int, hop: int) -> np.ndarray:
+    """`onset_strength` a partir de la proyección mel de la misma potencia (sin otra STFT)."""
+    mel = mel_filterbank(sr, n_fft) @ P
+    return librosa.onset.onset_strength(
+        S=librosa.power_to_db(mel), sr=sr, hop_length=hop, n_fft=n_fft
+    )
+
+
+@dataclass
+class RhythmFeatures:
+    """Onset y beats ya situados en la rejilla común de frames (sr/hop del análisis)."""
+
+    onset_envelope: np.ndarray  # (T,)
+    onset_frames: np.ndarray  # (K,)
+    onset_times: np.ndarray  # (K,)
+    tempo_bpm: float
+    beat_frames: np.ndarray  # (M,)
+    beat_times: np.ndarray  # (M,)
+
+    def trimmed(self, skip: int, sr: int, hop: int) -> "RhythmFeatures":
+        """Descarta los primeros `skip` frames (margen de calentamiento) y re-referencia a 0."""
+        if skip <= 0:
+            return self
+        onsets = self.onset_frames[self.onset_frames >= skip] - skip
+        beats = self.beat_frames[self.beat_frames >= skip] - skip
+        return RhythmFeatures(
+            onset_envelope=np.ascontiguousarray(self.onset_envelope[skip:]),
+            onset_frames=onsets,
+            onset_times=librosa.frames_to_time(onsets, sr=sr, hop_length=hop),
+            tempo_bpm=self.tempo_bpm,
+            beat_frames=beats,
+            beat_times=librosa.frames_to_time(beats, sr=sr, hop_length=hop),
+        )
+
+
+def tempo_strided(
+    onset_env: np.ndarray, sr: int, hop: int, *, stride: int = 8, ac_size: float = 8.0
+) -> float:
+    """`librosa.feature.tempo` con el tempograma evaluado en una de cada `stride` columnas.
+
+    El tempograma (una autocorrelación de `ac_size` s por frame) es casi todo el
+    coste del ritmo. librosa promedia sus columnas y aplica el prior de tempo;
+    como ventanas vecinas se solapan casi por completo, la media sobre una de
+    cada `stride` (cada frame sigue cubierto por `win / stride` ventanas) elige
+    el mismo tempo. Mismo relleno, ventana y normalización que
+    `librosa.feature.tempogram`; el prior y el argmax los pone `librosa.feature.tempo`.
+    """
+    env = np.asarray(onset_env, dtype=np.float64)
+    n = env.size
+    win = int(librosa.time_to_frames(ac_size, sr=sr, hop_length=hop))
+    padded = np.pad(env, (win // 2, win // 2), mode="linear_ramp", end_values=[0, 0])
+    frames = librosa.util.frame(padded, frame_length=win, hop_length=stride)[:, : -(-n // stride)]
+    w = librosa.filters.get_window("hann", win, fftbins=True)
+    ac = librosa.autocorrelate(frames * w[:, None], axis=0)
+    tg = librosa.util.normalize(ac, norm=np.inf, axis=0)
+    return float(librosa.feature.tempo(tg=tg, sr=sr, hop_length=hop, ac_size=ac_size)[0])
+
+
+def rhythm_from_onset(
+    onset_env: np.ndarray,
+    sr: int,
+    hop: int,
+    *,
+    compute_beats: bool = True,
+    out_sr: Optional[int] = None,
+    out_hop: Optional[int] = None,
+    n_frames: Optional[int] = None,
+    tempo_stride: int = 1,
+) -> RhythmFeatures:
+    """Onsets/beats desde una envolvente a (sr, hop), llevados a la rejilla (out_sr, out_hop).
+
+    Con `tempo_stride > 1` el tempo sale de `tempo_strided` y `beat_track` solo
+    hace el seguimiento de beats con ese tempo.
+    """
+    out_sr = out_sr or sr
+    out_hop = out_hop or hop
+    onset_times = librosa.onset.onset_detect(
+        onset_envelope=onset_env, sr=sr, hop_length=hop, units="time"
+    )
+    tempo_bpm = 0.0
+    beat_times = np.array([], dtype=float)
+    if compute_beats:
+        bpm = tempo_strided(onset_env, sr, hop, stride=tempo_stride) if tempo_stride > 1 else None
+        tempo_bpm, beat_times = librosa.beat.beat_track(
+            onset_envelope=onset_env, sr=sr, hop_length=hop, bpm=bpm, units="time"
+        )
+    if (out_sr, out_hop) != (sr, hop):
+        n = (
+            n_frames
+            if n_frames is not None
+            else int(round(onset_env.size * hop * out_sr / (sr * out_hop)))
+        )
+        t_out = librosa.frames_to_time(np.arange(n), sr=out_sr, hop_length=out_hop)
+        t_in = librosa.frames_to_time(np.arange(onset_env.size), sr=sr, hop_length=hop)
+        onset_env = np.interp(t_out, t_in, onset_env)
+
+    def to_frames(t: np.ndarray) -> np.ndarray:
+        return np.round(np.asarray(t) * out_sr / out_hop).astype(int)
+
+    return RhythmFeatures(
+        onset_envelope=np.asarray(onset_env, dtype=np.float32),
+        onset_frames=to_frames(onset_times),
+        onset_times=np.asarray(onset_times, dtype=np.float32),
+        tempo_bpm=float(np.atleast_1d(tempo_bpm)[0]),
+        beat_frames=to_frames(beat_times),
+        beat_times=np.asarray(beat_times, dtype=np.float32),
+    )
+
+
+def rhythm_decimated(
+    y_mono: np.ndarray,
+    sr: int,
+    *,
+    rhythm_sr: int,
+    rhythm_hop: Optional[int] = None,
+    n_fft: int = 2048,
+    hop: int = 512,
+    compute_beats: bool = True,
+) -> RhythmFeatures:
+    """Camino rítmico a tasa reducida: misma duración de ventana y, por defecto, mismo frame rate.
+
+    Con el frame rate por defecto los beats quedan a <= 1 frame de los del camino
+    a tasa completa; un `rhythm_hop` mayor abarata más pero cuantiza el tempo. El
+    tempo se estima con `tempo_strided` (la parte cara del ritmo, ~10x menos).
+    """
+    y_r = librosa.resample(y_mono, orig_sr=sr, target_sr=rhythm_sr)
+    r_hop = rhythm_hop or max(1, int(round(hop * rhythm_sr / sr)))
+    r_nfft = max(256, int(2 ** round(np.log2(n_fft * rhythm_sr / sr))))
+    fe = spectral_frontend(y_r, rhythm_sr, n_fft=r_nfft, hop=r_hop, keep_mag=False)
+    env = onset_from_power(fe.P, rhythm_sr, n_fft=r_nfft, hop=r_hop)
+    del fe
+    return rhythm_from_onset(
+        env,
+        rhythm_sr,
+        r_hop,
+        compute_beats=compute_beats,
+        out_sr=sr,
+        out_hop=hop,
+        n_frames=1 + y_mono.size // hop,
+        tempo_stride=8,
+    )
+
+
+def _rhythm_full_rate(
+    P: np.ndarray, sr: int, *, n_fft: int, hop: int, compute_beats: bool
+) -> RhythmFeatures:
+    return rhythm_from_onset(
+        onset_from_power(P, sr, n_fft=n_fft, hop=hop), sr, hop, compute_beats=compute_beats
+    )
 
 
 def analyze_mono(
@@ -132,44 +582,191 @@ def analyze_mono(
     hop: int = 512,
     bands: Optional[List[List[int]]] = None,
     compute_beats: bool = True,
+    keep_spectrum: str = "full",
+    bars: Optional[int] = None,
+    bar_distribution: str = "log",
+    rhythm_sr: Optional[int] = None,
+    rhythm_hop: Optional[int] = None,
+    runner: Optional[StageRunner] = None,
+    skip_frames: int = 0,
+    norm_scales: Optional[Dict[str, float]] = None,
 ) -> AnalysisResult:
+    """Análisis completo en memoria.
+
+    `keep_spectrum`: 'full' guarda `S_mag` (F, T) float32, 'db16' solo la versión
+    reducida `S_db16` y 'none' ninguna (usar `AnalysisResult.spectrogram()`).
+    Con `bars=N` se añade `bar_spectrum` (N, T), la representación reducida que
+    usa el render. Con `rhythm_sr < sr`, onset y beats se calculan sobre la señal
+    diezmada en un hilo aparte, en paralelo con el camino espectral, y se llevan
+    de vuelta a la rejilla común (ver `rhythm_decimated`).
+
+    Con un `runner` de varios hilos, tras la STFT el camino rítmico, las bandas,
+    las barras y la energía global corren en paralelo; los tiempos por etapa
+    quedan en `stats` (claves `time_*`).
+
+    `skip_frames` trata los primeros frames como margen de calentamiento: el
+    onset y los beats los usan, pero el resultado empieza después. Las escalas
+    de normalización usadas quedan en `norm_scales`; pasar `norm_scales` las
+    impone en lugar de calcularlas sobre la región analizada.
+    """
+    if keep_spectrum not in ("full", "db16", "none"):
+        raise ValueError("keep_spectrum must be one of 'full','db16','none'")
     if bands is None:
         bands = [[20, 160], [160, 2000], [2000, 16000]]
-    S_mag, freqs = stft_mag(y_mono, sr, n_fft=n_fft, hop=hop)
-    times = librosa.frames_to_time(np.arange(S_mag.shape[1]), sr=sr, hop_length=hop)
-    e_bands = band_energies(S_mag, freqs, bands)
-    e_global = global_energy(S_mag)
-    onset_env = librosa.onset.onset_strength(y=y_mono, sr=sr, hop_length=hop)
-    onset_frames = np.flatnonzero(
-        librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=hop, units="frames")
-    )
-    onset_times = librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop)
-    tempo_bpm = 0.0
-    beat_frames = np.array([], dtype=int)
-    beat_times = np.array([], dtype=float)
-    if compute_beats:
-        tempo_bpm, beat_frames = librosa.beat.beat_track(
-            onset_envelope=onset_env, sr=sr, hop_length=hop, units="frames"
+    multirate = rhythm_sr is not None and rhythm_sr < sr
+    own_runner = runner is None
+    if runner is None:
+        runner = StageRunner(2 if multirate else 1)
+    fed = []  # etapas que reciben la potencia compartida en vez de calcular la suya
+    try:
+        if multirate:
+            runner.submit(
+                "rhythm",
+                rhythm_decimated,
+                y_mono,
+                sr,
+                rhythm_sr=int(rhythm_sr),
+                rhythm_hop=rhythm_hop,
+                n_fft=n_fft,
+                hop=hop,
+                compute_beats=compute_beats,
+            )
+        fe = runner.run(
+            "stft",
+            spectral_frontend,
+            y_mono,
+            sr,
+            n_fft=n_fft,
+            hop=hop,
+            keep_mag=keep_spectrum != "none",
         )
-        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop)
+        S_mag, P, freqs = fe.S_mag, fe.P, fe.freqs
+        del fe
+        if not multirate:
+            runner.submit(
+                "rhythm",
+                _rhythm_full_rate,
+                P,
+                sr,
+                n_fft=n_fft,
+                hop=hop,
+                compute_beats=compute_beats,
+            )
+            fed.append("rhythm")
+        skip = max(0, min(int(skip_frames), P.shape[1]))
+        if skip:
+            # Vistas: el ritmo usa la ventana completa; lo espectral solo la región pedida
+            P_w = P[:, skip:]
+            S_mag = np.ascontiguousarray(S_mag[:, skip:]) if S_mag is not None else None
+        else:
+            P_w = P
+        times = librosa.frames_to_time(np.arange(P_w.shape[1]), sr=sr, hop_length=hop)
+        scales = norm_scales or {}
+        runner.submit(
+            "bands",
+            band_energies,
+            S_mag,
+            freqs,
+            bands,
+            P=P_w,
+            scale=scales.get("bands"),
+            return_scale=True,
+        )
+        fed.append("bands")
+        if bars:
+            runner.submit(
+                "bars",
+                bar_spectrum,
+                S_mag,
+                freqs,
+                bars,
+                distribution=bar_distribution,
+                P=P_w,
+                scale=scales.get("bars"),
+                return_scale=True,
+            )
+            fed.append("bars")
+        runner.submit(
+            "global", global_energy, S_mag, P=P_w, scale=scales.get("global"), return_scale=True
+        )
+        fed.append("global")
+        if keep_spectrum == "db16":
+            runner.submit("db16", mag_to_db16, S_mag)
+        # Join determinista: siempre en el mismo orden, independiente de quién termine antes
+        e_bands, used = runner.result("bands")
+        used_scales = {"bands": used}
+        e_bars = None
+        if bars:
+            e_bars, used_scales["bars"] = runner.result("bars")
+        e_global, used_scales["global"] = runner.result("global")
+        S_db16 = runner.result("db16") if keep_spectrum == "db16" else None
+        rhythm = runner.result("rhythm").trimmed(skip, sr, hop)
+        del P, P_w
+    finally:
+        if own_runner:
+            runner.close()
     return AnalysisResult(
         sr=sr,
         hop=hop,
         n_fft=n_fft,
         times=times,
-        S_mag=S_mag.astype(np.float32),
+        S_mag=S_mag if keep_spectrum == "full" else None,
         freqs=freqs.astype(np.float32),
         energy_global=e_global,
         energy_bands=e_bands,
-        onset_envelope=onset_env.astype(np.float32),
-        onset_frames=onset_frames.astype(int),
-        onset_times=onset_times.astype(np.float32),
-        tempo_bpm=float(tempo_bpm),
-        beat_frames=beat_frames.astype(int),
-        beat_times=beat_times.astype(np.float32),
+        onset_envelope=rhythm.onset_envelope,
+        onset_frames=rhythm.onset_frames,
+        onset_times=rhythm.onset_times,
+        tempo_bpm=rhythm.tempo_bpm,
+        beat_frames=rhythm.beat_frames,
+        beat_times=rhythm.beat_times,
+        S_db16=S_db16,
+        bar_spectrum=e_bars,
+        norm_scales=used_scales,
+        stats={
+            "spectral_passes_eliminated": sum(_OWN_POWER_PASSES[name] for name in fed),
+            "workers": runner.workers,
+            **runner.stage_stats(),
+        },
     )
 
 
+def _recompute_spectrogram(
+    path: str | Path,
+    *,
+    target_sr: int,
+    mono: str,
+    n_fft: int,
+    hop: int,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    skip_frames: int = 0,
+) -> np.ndarray:
+    y_t, _ = decode_audio(path, target_sr=target_sr, mono=mono, start=start, duration=duration)
+    S = stft_mag(y_t[0], target_sr, n_fft=n_fft, hop=hop)[0].astype(np.float32)
+    return np.ascontiguousarray(S[:, skip_frames:]) if skip_frames else S
+
+
+def analysis_window(
+    start: float, duration: Optional[float], *, sr: int, hop: int, warmup: float = 4.0
+) -> tuple[float, float, Optional[float], int]:
+    """Región a decodificar para analizar [start, start+duration) con margen de calentamiento.
+
+    `start` se ajusta al frame más cercano, de modo que los frames de la ventana
+    coinciden con los de la pista completa. El margen (≤ `warmup` s, múltiplo
+    exacto de `hop`) precede a la ventana para que el estado de onset/beats ya
+    sea válido en `start`. Devuelve (inicio_ajustado, inicio_decodificación,
+    duración_decodificación, frames_de_margen).
+    """
+    if start < 0 or (duration is not None and duration <= 0):
+        raise ValueError("start must be >= 0 and duration > 0")
+    start_frame = int(round(start * sr / hop))
+    skip = min(int(max(warmup, 0.0) * sr) // hop, start_frame)
+    aligned = start_frame * hop / sr
+    dec_start = (start_frame - skip) * hop / sr
+    return aligned, dec_start, (None if duration is None else duration + aligned - dec_start), skip
+
+
 def analyze_file(
     path: str | Path,
     *,
@@ -179,11 +776,161 @@ def analyze_file(
     hop: int = 512,
     bands: Optional[List[List[int]]] = None,
     compute_beats: bool = True,
+    cache: Optional["AnalysisCache"] = None,
+    streaming: bool = False,
+    keep_spectrum: str = "full",
+    bars: Optional[int] = None,
+    bar_distribution: str = "log",
+    rhythm_sr: Optional[int] = None,
+    rhythm_hop: Optional[int] = None,
+    workers: int = 1,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    warmup: float = 4.0,
+    normalization: str = "local",
+    norm_scales: Optional[Dict[str, float]] = None,
 ) -> AnalysisResult:
-    y, sr, _ = load_audio(path)
-    y44, _ = normalize_sr(y, sr, target=target_sr, mono=mono)
-    y_mono = y44[0]
-    return analyze_mono(y_mono, target_sr, n_fft=n_fft, hop=hop, bands=bands, compute_beats=compute_beats)
+    """Analiza un archivo. `streaming=True` usa memoria acotada (ver `streaming_analysis`).
+
+    `workers > 1` ejecuta en un pool de hilos el remuestreo por canal y las
+    etapas independientes del análisis (ver `analyze_mono`).
+
+    `start`/`duration` (s) analizan solo esa región: se decodifica desde
+    `start - warmup` y el margen se descarta tras calcular onset y beats. Los
+    tiempos del resultado empiezan en 0 (`offset` = `start` ajustado al frame). Con
+    `normalization='track'` las escalas salen del análisis de la pista completa
+    guardado en `cache` (o de `norm_scales`); si no hay perfil, se normaliza
+    sobre la ventana ('local').
+
+    Si no se guarda `S_mag`, el resultado lleva un loader que re-decodifica el
+    archivo y recalcula la STFT bajo demanda (`AnalysisResult.spectrogram()`).
+    """
+    if bands is None:
+        bands = [[20, 160], [160, 2000], [2000, 16000]]
+    if normalization not in ("local", "track"):
+        raise ValueError("normalization must be 'local' or 'track'")
+    windowed = start > 0 or duration is not None
+    if windowed and streaming:
+        raise ValueError("streaming analysis does not support time windows")
+    start, dec_start, dec_duration, skip = (
+        analysis_window(start, duration, sr=target_sr, hop=hop, warmup=warmup)
+        if windowed
+        else (0.0, 0.0, None, 0)
+    )
+    loader = partial(
+        _recompute_spectrogram,
+        path,
+        target_sr=target_sr,
+        mono=mono,
+        n_fft=n_fft,
+        hop=hop,
+        start=dec_start,
+        duration=dec_duration,
+        skip_frames=skip,
+    )
+    params = dict(
+        target_sr=target_sr,
+        mono=mono,
+        n_fft=n_fft,
+        hop=hop,
+        bands=bands,
+        compute_beats=compute_beats,
+    )
+    if streaming:
+        params["streaming"] = True
+    if keep_spectrum != "full":
+        params["keep_spectrum"] = keep_spectrum
+    if bars:
+        params.update(bars=bars, bar_distribution=bar_distribution)
+    if rhythm_sr:
+        params.update(rhythm_sr=rhythm_sr, rhythm_hop=rhythm_hop)
+    track_params = dict(params)
+    if windowed:
+        params.update(
+            start=float(start), duration=duration, warmup=float(warmup), normalization=normalization
+        )
+    if windowed and normalization == "track" and norm_scales is None and cache is not None:
+        # Perfil de la pista completa (mismos parámetros sin ventana), si ya está en caché
+        profile = cache.get(cache.key_for(path, **track_params))
+        if profile is not None and profile.norm_scales:
+            norm_scales = profile.norm_scales
+    if norm_scales is not None:
+        params["norm_scales"] = {k: float(v) for k, v in sorted(norm_scales.items())}
+    key = None
+    if cache is not None:
+        key = cache.key_for(path, **params)
+        hit = cache.get(key)
+        if hit is not None:
+            if hit.S_mag is None:
+                hit.S_loader = loader
+            return hit
+    if streaming:
+        if mono != "mix":
+            raise ValueError("streaming analysis only supports mono='mix'")
+        from .streaming_analysis import analyze_file_streaming
+
+        res = analyze_file_streaming(
+            path,
+            target_sr=target_sr,
+            n_fft=n_fft,
+            hop=hop,
+            bands=bands,
+            compute_beats=compute_beats,
+        )
+    else:
+        with StageRunner(max(workers, 2 if rhythm_sr else 1)) as runner:
+            y44, _ = runner.run(
+                "decode",
+                decode_audio,
+                path,
+                target_sr=target_sr,
+                mono=mono,
+                runner=runner,
+                start=dec_start,
+                duration=dec_duration,
+            )
+            # Pirámide de la forma de onda en la misma decodificación (en paralelo con workers > 1)
+            runner.submit("waveform", waveform_pyramid, y44[0][skip * hop :], target_sr)
+            res = analyze_mono(
+                y44[0],
+                target_sr,
+                n_fft=n_fft,
+                hop=hop,
+                bands=bands,
+                compute_beats=compute_beats,
+                keep_spectrum=keep_spectrum,
+                bars=bars,
+                bar_distribution=bar_distribution,
+                rhythm_sr=rhythm_sr,
+                rhythm_hop=rhythm_hop,
+                runner=runner,
+                skip_frames=skip,
+                norm_scales=norm_scales,
+            )
+            res.set_waveform(runner.result("waveform"))
+        res.offset = float(start)
+        res.stats["norm_from_track"] = float(norm_scales is not None)
+    if cache is not None and key is not None:
+        cache.put(key, res, source=str(Path(path).resolve()), params=params)
+    if res.S_mag is None:
+        res.S_loader = loader
+    return res
+
+
+def analysis_kwargs(cfg: Any, bars_cfg: Any = None) -> Dict[str, Any]:
+    """kwargs de `analyze_file` desde `AnalysisConfig` (y opcionalmente `BarsConfig`) del preset."""
+    kw: Dict[str, Any] = dict(
+        target_sr=cfg.sr,
+        n_fft=cfg.n_fft,
+        hop=cfg.hop,
+        bands=[list(b) for b in cfg.bands],
+        compute_beats=cfg.beat_track,
+        rhythm_sr=cfg.rhythm_sr,
+        rhythm_hop=cfg.rhythm_hop,
+    )
+    if bars_cfg is not None:
+        kw.update(bars=bars_cfg.count, bar_distribution=bars_cfg.distribution)
+    return kw
 
 
 # CLI simple para depurar
@@ -191,10 +938,55 @@ if __name__ == "__main__":  # pragma: no cover - CLI manual
     import sys
 
     if len(sys.argv) < 2:
-        print("Uso: python -m app.core.analysis <audio.(wav|mp3|ogg)>")
+        print(
+            "Uso: python -m app.core.analysis <audio.(wav|mp3|ogg)> [--cache] [--streaming] "
+            "[--workers N] [--start S --duration D] [--rhythm-sr SR] [--rhythm-bench]"
+        )
         raise SystemExit(1)
-    res = analyze_file(sys.argv[1])
+    cache = None
+    if "--cache" in sys.argv[2:]:
+        from .analysis_cache import AnalysisCache
+
+        cache = AnalysisCache()
+
+    def _opt(flag: str, cast: Callable[[str], Any], default: Any) -> Any:
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    res = analyze_file(
+        sys.argv[1],
+        cache=cache,
+        streaming="--streaming" in sys.argv[2:],
+        workers=_opt("--workers", int, 1),
+        start=_opt("--start", float, 0.0),
+        duration=_opt("--duration", float, None),
+        rhythm_sr=_opt("--rhythm-sr", int, None),
+    )
     print(
-        f"SR={res.sr} hop={res.hop} n_fft={res.n_fft} frames={res.S_mag.shape[1]} tempo≈{res.tempo_bpm:.1f} BPM, beats={len(res.beat_frames)}"
+        f"SR={res.sr} hop={res.hop} n_fft={res.n_fft} frames={len(res.times)} "
+        f"tempo≈{res.tempo_bpm:.1f} BPM, beats={len(res.beat_frames)}"
     )
+    print("Tiempos por etapa:", {k: round(v, 3) for k, v in res.stats.items() if k[:5] == "time_"})
     print("Energía medias:", {k: float(np.mean(v)) for k, v in res.energy_bands.items()})
+
+    if "--rhythm-bench" in sys.argv[2:]:
+        # Ritmo a tasa completa frente al diezmado, tras una pasada corta que compila numba
+        import time
+
+        y, sr, _ = load_audio(sys.argv[1])
+        y = librosa.resample(y.mean(axis=0), orig_sr=sr, target_sr=res.sr)
+        P = spectral_frontend(y, res.sr, n_fft=res.n_fft, hop=res.hop, keep_mag=False).P
+        r_sr = _opt("--rhythm-sr", int, 11025)
+        kw = dict(n_fft=res.n_fft, hop=res.hop, compute_beats=True)
+        _rhythm_full_rate(P[:, :2000], res.sr, **kw)
+        rhythm_decimated(y[: 2000 * res.hop], res.sr, rhythm_sr=r_sr, **kw)
+        t0 = time.perf_counter()
+        full = _rhythm_full_rate(P, res.sr, **kw)
+        t_full = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        dec = rhythm_decimated(y, res.sr, rhythm_sr=r_sr, **kw)
+        t_dec = time.perf_counter() - t0
+        print(
+            f"Ritmo: tasa completa {t_full:.2f} s ({full.tempo_bpm:.1f} BPM), "
+            f"diezmado a {r_sr} Hz {t_dec:.2f} s ({dec.tempo_bpm:.1f} BPM), "
+            f"{t_full / t_dec:.1f}x"
+        )
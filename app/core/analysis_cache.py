@@ -0,0 +1,277 @@
+"""Caché persistente en disco para resultados de `analyze_file`.
+
+Cada entrada es un directorio con un `.npy` por array (cargables con mmap) y un
+`meta.json` con escalares y parámetros. La clave combina el hash del contenido
+del audio con los parámetros de análisis (sr, n_fft, hop, bandas, beats), de
+modo que reabrir una pista ya analizada es solo mapear archivos.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .analysis import AnalysisResult
+
+# 2: `energy_bands` con escala compartida entre bandas; 3: pirámide de la forma de onda
+CACHE_VERSION = 3
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+# Arrays de AnalysisResult que se guardan tal cual (uno por archivo .npy)
+_ARRAY_FIELDS = (
+    "times",
+    "S_mag",
+    "S_db16",
+    "bar_spectrum",
+    "freqs",
+    "energy_global",
+    "onset_envelope",
+    "onset_frames",
+    "onset_times",
+    "beat_frames",
+    "beat_times",
+    "waveform",
+)
+_SCALAR_FIELDS = ("sr", "hop", "n_fft", "tempo_bpm")
+# Escalares añadidos después: opcionales al leer
+_OPTIONAL_SCALARS = {"offset": 0.0, "waveform_block": 0, "waveform_samples": 0}
+
+# Memo en proceso: (ruta, tamaño, mtime_ns) -> digest, para no re-hashear
+_DIGEST_MEMO: Dict[tuple, str] = {}
+
+
+def default_cache_dir() -> Path:
+    """Directorio de caché: $NCS_CACHE_DIR o la carpeta de caché del usuario."""
+    env = os.environ.get("NCS_CACHE_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "ncs-visualizer" / "analysis"
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """Hash BLAKE2b del contenido; se memoriza por (ruta, tamaño, mtime)."""
+    p = Path(path).resolve()
+    st = p.stat()
+    memo_key = (str(p), st.st_size, st.st_mtime_ns)
+    cached = _DIGEST_MEMO.get(memo_key)
+    if cached is not None:
+        return cached
+    h = hashlib.blake2b(digest_size=16)
+    with p.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    digest = h.hexdigest()
+    _DIGEST_MEMO[memo_key] = digest
+    return digest
+
+
+def cache_key(digest: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"v": CACHE_VERSION, "digest": digest, "params": params}, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: Path
+    size_bytes: int
+    last_used: float
+    source: str
+    params: Dict[str, Any]
+
+
+class AnalysisCache:
+    """Almacén LRU de `AnalysisResult` con límite de tamaño total en bytes."""
+
+    def __init__(
+        self, root: Optional[Path | str] = None, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = int(max_bytes)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # --- Claves ---
+    def key_for(self, path: str | Path, **params: Any) -> str:
+        return cache_key(file_digest(path), params)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    # --- Lectura ---
+    def get(self, key: str, mmap: bool = True) -> Optional[AnalysisResult]:
+        d = self._entry_dir(key)
+        meta_path = d / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_VERSION:
+            return None
+        mode = "r" if mmap else None
+        try:
+            arrays = {name: np.load(d / f"{name}.npy", mmap_mode=mode) for name in meta["arrays"]}
+            bands = {
+                name: np.load(d / f"band_{name}.npy", mmap_mode=mode) for name in meta["bands"]
+            }
+        except (OSError, ValueError):
+            return None
+        arrays.setdefault("S_mag", None)
+        # mtime de meta.json = último uso (para LRU)
+        try:
+            os.utime(meta_path)
+        except OSError:  # pragma: no cover - caché de solo lectura
+            pass
+        return AnalysisResult(
+            **{k: meta["scalars"][k] for k in _SCALAR_FIELDS},
+            **{k: meta["scalars"].get(k, v) for k, v in _OPTIONAL_SCALARS.items()},
+            **arrays,
+            energy_bands=bands,
+            norm_scales=meta.get("norm_scales", {}),
+        )
+
+    # --- Escritura ---
+    def put(
+        self,
+        key: str,
+        result: AnalysisResult,
+        *,
+        source: str = "",
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Path:
+        d = self._entry_dir(key)
+        d.parent.mkdir(parents=True, exist_ok=True)
+        # Escribir en un directorio temporal y renombrar: nunca queda una entrada a medias
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=d.parent))
+        try:
+            arrays = []
+            for name in _ARRAY_FIELDS:
+                value = getattr(result, name)
+                if value is None:
+                    continue
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(value))
+                arrays.append(name)
+            for name, curve in result.energy_bands.items():
+                np.save(tmp / f"band_{name}.npy", np.ascontiguousarray(curve))
+            meta = {
+                "version": CACHE_VERSION,
+                "source": source,
+                "params": params or {},
+                "created": time.time(),
+                "scalars": {k: getattr(result, k) for k in (*_SCALAR_FIELDS, *_OPTIONAL_SCALARS)},
+                "norm_scales": dict(result.norm_scales),
+                "arrays": arrays,
+                "bands": list(result.energy_bands.keys()),
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            if d.exists():
+                shutil.rmtree(d, ignore_errors=True)
+            os.replace(tmp, d)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.prune(keep=key)
+        return d
+
+    # --- Inspección / poda ---
+    def entries(self) -> List[CacheEntry]:
+        out: List[CacheEntry] = []
+        for meta_path in self.root.glob("*/*/meta.json"):
+            d = meta_path.parent
+            if d.name.startswith("."):  # escritura en curso
+                continue
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                size = sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+                last_used = meta_path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            out.append(
+                CacheEntry(
+                    key=d.name,
+                    path=d,
+                    size_bytes=size,
+                    last_used=last_used,
+                    source=meta.get("source", ""),
+                    params=meta.get("params", {}),
+                )
+            )
+        out.sort(key=lambda e: e.last_used, reverse=True)
+        return out
+
+    def total_bytes(self) -> int:
+        return sum(e.size_bytes for e in self.entries())
+
+    def remove(self, key: str) -> None:
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def prune(
+        self, max_bytes: Optional[int] = None, keep: Optional[str] = None
+    ) -> List[CacheEntry]:
+        """Elimina las entradas menos usadas hasta quedar bajo `max_bytes` (salvo `keep`)."""
+        limit = self.max_bytes if max_bytes is None else int(max_bytes)
+        entries = self.entries()
+        total = sum(e.size_bytes for e in entries)
+        removed: List[CacheEntry] = []
+        for e in reversed(entries):  # de la más antigua a la más reciente
+            if total <= limit:
+                break
+            if e.key == keep:
+                continue
+            self.remove(e.key)
+            total -= e.size_bytes
+            removed.append(e)
+        return removed
+
+    def clear(self) -> None:
+        for e in self.entries():
+            self.remove(e.key)
+
+
+# CLI para inspeccionar y podar la caché
+if __name__ == "__main__":  # pragma: no cover - CLI manual
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m app.core.analysis_cache")
+    parser.add_argument(
+        "--dir", default=None, help="Directorio de caché (por defecto el del usuario)"
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Lista entradas (más reciente primero)")
+    p_prune = sub.add_parser("prune", help="Poda por tamaño (LRU)")
+    p_prune.add_argument("--max-mb", type=float, required=True)
+    sub.add_parser("clear", help="Borra toda la caché")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(args.dir)
+    if args.cmd == "list":
+        entries = cache.entries()
+        for e in entries:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.last_used))
+            print(f"{e.key}  {e.size_bytes / 1e6:8.1f} MB  {used}  {e.source}")
+        print(
+            f"{len(entries)} entradas, {sum(e.size_bytes for e in entries) / 1e6:.1f} MB en "
+            f"{cache.root}"
+        )
+    elif args.cmd == "prune":
+        removed = cache.prune(int(args.max_mb * 1e6))
+        print(
+            f"Eliminadas {len(removed)} entradas ({sum(e.size_bytes for e in removed) / 1e6:.1f} "
+            "MB)"
+        )
+    elif args.cmd == "clear":
+        cache.clear()
+        print(f"Caché vaciada: {cache.root}")
@@ -0,0 +1,123 @@
+"""Bancos de filtros de bandas/barras sobre el espectro de potencia.
+
+Cada banco es una matriz dispersa (n_bandas, F) construida una sola vez por
+(sr, n_fft, disposición) y cacheada; aplicarla es un único producto matricial
+sobre la potencia (F, T), así que 128 barras cuestan lo mismo que 3 bandas.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import List, Literal, Optional, Sequence, Tuple
+
+import librosa
+import numpy as np
+import scipy.sparse
+
+LEGACY_BAND_NAMES = ["bass", "mid", "treble"]
+
+Edges = Tuple[Tuple[float, float], ...]
+
+
+def fft_freqs(sr: int, n_fft: int) -> np.ndarray:
+    """Igual que `librosa.fft_frequencies`."""
+    return np.fft.rfftfreq(n_fft, d=1.0 / sr)
+
+
+def band_names(n: int) -> List[str]:
+    """Nombres de banda: los tres históricos si hay 3, si no band0..bandN-1."""
+    if n == len(LEGACY_BAND_NAMES):
+        return list(LEGACY_BAND_NAMES)
+    return [f"band{i}" for i in range(n)]
+
+
+def bar_edges(
+    count: int,
+    *,
+    fmin: float = 20.0,
+    fmax: float = 16000.0,
+    distribution: Literal["log", "linear"] = "log",
+) -> Edges:
+    """Límites (lo, hi) de `count` barras contiguas entre fmin y fmax."""
+    if count <= 0:
+        raise ValueError("count must be positive")
+    if distribution == "log":
+        pts = np.geomspace(fmin, fmax, count + 1)
+    elif distribution == "linear":
+        pts = np.linspace(fmin, fmax, count + 1)
+    else:
+        raise ValueError("distribution must be 'log' or 'linear'")
+    return tuple((float(a), float(b)) for a, b in zip(pts[:-1], pts[1:]))
+
+
+@lru_cache(maxsize=32)
+def _filterbank(sr: int, n_fft: int, edges: Edges, fill_empty: bool) -> scipy.sparse.csr_matrix:
+    freqs = fft_freqs(sr, n_fft)
+    rows: List[np.ndarray] = []
+    cols: List[np.ndarray] = []
+    for i, (lo, hi) in enumerate(edges):
+        idx = np.flatnonzero((freqs >= lo) & (freqs < hi))
+        if idx.size == 0 and fill_empty:
+            # Barra más estrecha que un bin (graves en escala log): usar el bin más cercano
+            idx = np.array([int(np.argmin(np.abs(freqs - 0.5 * (lo + hi))))])
+        rows.append(np.full(idx.size, i))
+        cols.append(idx)
+    r = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+    c = np.concatenate(cols) if cols else np.zeros(0, dtype=int)
+    data = np.ones(r.size, dtype=np.float32)
+    fb = scipy.sparse.csr_matrix((data, (r, c)), shape=(len(edges), freqs.size), dtype=np.float32)
+    fb.data.setflags(write=False)
+    return fb
+
+
+def band_filterbank(
+    sr: int, n_fft: int, bands: Sequence[Sequence[float]]
+) -> scipy.sparse.csr_matrix:
+    """Bandas rectangulares [lo, hi); una banda sin bins queda a cero (comportamiento histórico)."""
+    edges = tuple((float(lo), float(hi)) for lo, hi in bands)
+    return _filterbank(int(sr), int(n_fft), edges, False)
+
+
+def bar_filterbank(
+    sr: int,
+    n_fft: int,
+    count: int,
+    *,
+    distribution: Literal["log", "linear"] = "log",
+    fmin: float = 20.0,
+    fmax: float = 16000.0,
+) -> scipy.sparse.csr_matrix:
+    """Banco para el espectro por barra de `RadialBars` (ninguna barra queda vacía)."""
+    fmax = min(float(fmax), sr / 2.0)
+    edges = bar_edges(count, fmin=fmin, fmax=fmax, distribution=distribution)
+    return _filterbank(int(sr), int(n_fft), edges, True)
+
+
+@lru_cache(maxsize=8)
+def mel_filterbank(sr: int, n_fft: int, n_mels: int = 128) -> np.ndarray:
+    """Banco mel (n_mels, F) de `librosa.feature.melspectrogram` (el que usa onset_strength)."""
+    fb = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmax=0.5 * sr).astype(np.float32)
+    fb.setflags(write=False)
+    return fb
+
+
+def apply_filterbank(fb: scipy.sparse.csr_matrix, P: np.ndarray) -> np.ndarray:
+    """(n, F) @ (F, T) -> (n, T) en float32."""
+    return np.asarray(fb @ P, dtype=np.float32)
+
+
+def normalize_shared(
+    E: np.ndarray, q: float = 99.0, *, scale: Optional[float] = None
+) -> Tuple[np.ndarray, float]:
+    """Normaliza todas las filas con una escala común: percentil `q` del máximo por frame.
+
+    Una escala común conserva la forma del espectro (los graves dominan si dominan
+    en el audio); escalar cada banda por separado las aplanaría todas a ~1.
+    Con `scale` se usa esa escala en lugar de calcularla (perfil de otra región).
+    """
+    if scale is not None:
+        return (E / scale).astype(np.float32), float(scale)
+    if E.size == 0:
+        return E.astype(np.float32), 0.0
+    scale = float(np.percentile(E.max(axis=0), q)) + 1e-9
+    return (E / scale).astype(np.float32), scale
@@ -1,6 +1,56 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+try:  # si falta numba se usa el bucle de NumPy por columnas
+    from numba import njit
+except Exception:  # pragma: no cover - fallback sin numba
+    njit = None
+
+
+def coeff_from_ms(ms: float, fps: float) -> float:
+    """Coeficiente por frame de un seguidor de constante de tiempo `ms` a `fps` frames/s.
+
+    1 - exp(-1/(tau*fps)): tras `ms` milisegundos se recorre ~63 % del salto.
+    `ms <= 0` da 1.0 (sin suavizado).
+    """
+    if ms <= 0:
+        return 1.0
+    return 1.0 - math.exp(-1000.0 / (float(ms) * float(fps)))
+
+
+def _follow_numpy(
+    x: np.ndarray, state: np.ndarray, attack: float, release: float, out: np.ndarray
+) -> None:
+    # x, out: (R, T); state: (R,) float64, se actualiza en sitio
+    for t in range(x.shape[1]):
+        s = x[:, t].astype(np.float64)
+        coeff = np.where(s > state, attack, release)
+        state += coeff * (s - state)
+        out[:, t] = state
+
+
+if njit is not None:
+
+    @njit(cache=True, nogil=True)
+    def _follow_numba(x, state, attack, release, out):  # pragma: no cover - compilado
+        for r in range(x.shape[0]):
+            v = state[r]
+            for t in range(x.shape[1]):
+                s = np.float64(x[r, t])
+                if s > v:
+                    v += attack * (s - v)
+                else:
+                    v += release * (s - v)
+                out[r, t] = v
+            state[r] = v
+
+else:  # pragma: no cover
+    _follow_numba = None
 
 
 @dataclass
@@ -8,6 +58,16 @@ class EnvelopeFollower:
     attack: float = 0.01
     release: float = 0.1
     value: float = 0.0
+    row_state: Optional[np.ndarray] = None  # estado (bars,) de `process` con entrada (bars, T)
+
+    @classmethod
+    def from_ms(cls, attack_ms: float, release_ms: float, fps: float) -> "EnvelopeFollower":
+        return cls(attack=coeff_from_ms(attack_ms, fps), release=coeff_from_ms(release_ms, fps))
+
+    @classmethod
+    def from_mapping(cls, mapping: Any, fps: float) -> "EnvelopeFollower":
+        """Desde `VisualMapping` (attack_ms/release_ms) al frame rate de las curvas (sr/hop)."""
+        return cls.from_ms(mapping.attack_ms, mapping.release_ms, fps)
 
     def feed(self, sample: float) -> float:
         if sample > self.value:
@@ -16,3 +76,73 @@ class EnvelopeFollower:
             coeff = self.release
         self.value += coeff * (sample - self.value)
         return self.value
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Suaviza un array completo (T,) o (bars, T) a lo largo del último eje.
+
+        Equivale a llamar a `feed` muestra a muestra (mismas operaciones en
+        float64: idéntico bit a bit con entrada float64). El estado final queda
+        en `value` para (T,) y en `row_state` para (bars, T), así que procesar por
+        trozos consecutivos da lo mismo que de una vez; `feed` sigue usando `value`.
+        """
+        arr = np.asarray(x)
+        if arr.ndim not in (1, 2):
+            raise ValueError("Expected shape (T,) or (bars, T)")
+        rows = np.ascontiguousarray(arr.reshape(1, -1) if arr.ndim == 1 else arr)
+        dtype = rows.dtype if rows.dtype.kind == "f" else np.dtype(np.float64)
+        if arr.ndim == 2 and self.row_state is not None:
+            if self.row_state.shape != rows.shape[:1]:
+                raise ValueError(f"Expected {self.row_state.shape[0]} rows, got {rows.shape[0]}")
+            state = self.row_state.copy()
+        else:
+            state = np.full(rows.shape[:1], float(self.value))
+        out = np.empty(rows.shape, dtype=dtype)
+        if rows.size:
+            if _follow_numba is not None:
+                _follow_numba(rows, state, float(self.attack), float(self.release), out)
+            else:  # pragma: no cover
+                _follow_numpy(rows, state, float(self.attack), float(self.release), out)
+        if arr.ndim == 1:
+            self.value = float(state[0])
+        else:
+            self.row_state = state
+        return out.reshape(arr.shape)
+
+    def reset(self, value: float = 0.0) -> None:
+        self.value = value
+        self.row_state = None
+
+
+# Benchmark: bucle de feed frente a process sobre curvas de una pista
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import time
+
+    fps = 44100 / 512
+    T = int(240 * fps)  # 4 minutos de curvas
+    rng = np.random.default_rng(0)
+    curve = rng.random(T)
+    bars = rng.random((128, T)).astype(np.float32)
+
+    ref = EnvelopeFollower.from_ms(80, 220, fps)
+    t0 = time.perf_counter()
+    loop = np.array([ref.feed(float(v)) for v in curve])
+    t_loop = time.perf_counter() - t0
+
+    EnvelopeFollower.from_ms(80, 220, fps).process(curve[:16])  # compilar (float64 y float32)
+    EnvelopeFollower.from_ms(80, 220, fps).process(bars[:, :16])
+    fast = EnvelopeFollower.from_ms(80, 220, fps)
+    t0 = time.perf_counter()
+    vec = fast.process(curve)
+    t_vec = time.perf_counter() - t0
+    print(
+        f"(T,)  T={T}: feed {t_loop * 1e3:.1f} ms, process {t_vec * 1e3:.2f} ms "
+        f"({t_loop / t_vec:.0f}x), idéntico={np.array_equal(loop, vec)}"
+    )
+
+    t0 = time.perf_counter()
+    EnvelopeFollower.from_ms(80, 220, fps).process(bars)
+    t_bars = time.perf_counter() - t0
+    print(
+        f"(128, T): process {t_bars * 1e3:.1f} ms; feed estimado {t_loop * 128 * 1e3:.0f} ms "
+        f"({t_loop * 128 / t_bars:.0f}x)"
+    )
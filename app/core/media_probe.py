@@ -1,36 +1,55 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from pathlib import Path
+
 import json
+import math
+import re
 import shutil
 import subprocess
-from typing import Optional, Dict, Any
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 
 def _ffbin_candidates(name: str) -> list[str]:
     """Devuelve candidatos de ruta para ffmpeg/ffprobe (embebido o del sistema)."""
     here = Path(__file__).resolve()
     root = here.parents[2]  # .../app/
-    embedded = root / "ffmpeg" / (name + (".exe" if __import__('platform').system() == "Windows" else ""))
+    embedded = (
+        root / "ffmpeg" / (name + (".exe" if __import__("platform").system() == "Windows" else ""))
+    )
     return [str(embedded), name]
 
 
+def _resolve_candidates(name: str) -> List[str]:
+    out = []
+    for cand in _ffbin_candidates(name):
+        exe = shutil.which(cand) if not Path(cand).exists() else str(cand)
+        if exe:
+            out.append(exe)
+    return out
+
+
+def resolve_ffbin(name: str) -> Optional[str]:
+    """Primer ejecutable disponible para `name` (embebido primero), o None."""
+    found = _resolve_candidates(name)
+    return found[0] if found else None
+
+
 def run_ffprobe(path: str | Path) -> Dict[str, Any]:
     """Ejecuta ffprobe -v error -print_format json -show_streams -show_format y retorna el dict JSON."""
     src = str(path)
     cmd = ["-v", "error", "-print_format", "json", "-show_streams", "-show_format", src]
     last_err = None
-    for bin_name in ("ffprobe",):
-        for cand in _ffbin_candidates(bin_name):
-            exe = shutil.which(cand) if not Path(cand).exists() else str(cand)
-            if not exe:
-                continue
-            try:
-                out = subprocess.check_output([exe, *cmd], stderr=subprocess.STDOUT)
-                return json.loads(out.decode("utf-8", errors="ignore"))
-            except subprocess.CalledProcessError as e:
-                last_err = e
-                continue
+    for exe in _resolve_candidates("ffprobe"):
+        try:
+            out = subprocess.check_output([exe, *cmd], stderr=subprocess.STDOUT)
+            return json.loads(out.decode("utf-8", errors="ignore"))
+        except subprocess.CalledProcessError as e:
+            last_err = e
+            continue
     raise RuntimeError(f"ffprobe not found or failed to run: {last_err}")
 
 
@@ -42,6 +61,7 @@ class AudioInfo:
     channel_layout: str = ""
     duration: float = 0.0
     format_name: str = ""
+    profile: str = ""
 
 
 def parse_audio_info(ffp: Dict[str, Any]) -> AudioInfo:
@@ -57,18 +77,233 @@ def parse_audio_info(ffp: Dict[str, Any]) -> AudioInfo:
                 a.sample_rate = 0
             a.channels = int(s.get("channels") or 0)
             a.channel_layout = s.get("channel_layout", "") or ""
+            a.profile = s.get("profile", "") or ""
             break
     a.duration = float(fmt.get("duration") or 0.0)
     a.format_name = fmt.get("format_name", "") or ""
     return a
 
 
-def is_aac_lc_passthrough_possible(info: AudioInfo, target_sr: int = 44100, target_channels: int | None = None) -> bool:
-    """Regla MVP: passthrough si codec es 'aac' (perfil LC asumido) y sample_rate == target_sr y canales coinciden (si se especifica)."""
+def is_aac_lc_passthrough_possible(
+    info: AudioInfo, target_sr: int = 44100, target_channels: int | None = None
+) -> bool:
+    """Regla MVP: passthrough si codec es 'aac' (perfil LC, asumido si no se conoce),
+    sample_rate == target_sr y canales coinciden (si se especifica)."""
     if info.codec_name.lower() != "aac":
         return False
+    if info.profile and info.profile.upper() not in ("LC", "AAC LC"):
+        return False
     if info.sample_rate != target_sr:
         return False
     if target_channels is not None and info.channels and info.channels != target_channels:
         return False
     return True
+
+
+# --------- Decodificación por pipe (un solo proceso, un solo buffer) ---------
+_LAYOUT_CHANNELS = {
+    "mono": 1,
+    "stereo": 2,
+    "2.1": 3,
+    "3.0": 3,
+    "quad": 4,
+    "4.0": 4,
+    "5.0": 5,
+    "5.1": 6,
+    "6.1": 7,
+    "7.1": 8,
+}
+_RE_INPUT = re.compile(r"^Input #0, ([^ ]+), from")
+_RE_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_RE_AUDIO = re.compile(r"Stream #0:\d+\S*: Audio: (\w+)(?: \(([^)]*)\))?[^,]*, (\d+) Hz, ([^,]+)")
+
+
+def _layout_channels(layout: str) -> int:
+    layout = layout.strip()
+    m = re.match(r"(\d+) channels", layout)
+    if m:
+        return int(m.group(1))
+    return _LAYOUT_CHANNELS.get(layout.split("(")[0], 0)
+
+
+def parse_ffmpeg_banner(text: str) -> AudioInfo:
+    """Metadatos de la primera pista de audio a partir del stderr de `ffmpeg -i`.
+
+    Es la misma información que da ffprobe (códec, perfil, sr, canales,
+    duración, contenedor), sin lanzar un segundo proceso.
+    """
+    a = AudioInfo()
+    for line in text.splitlines():
+        if not a.format_name:
+            m = _RE_INPUT.match(line.strip())
+            if m:
+                a.format_name = m.group(1)
+                continue
+        if not a.duration:
+            m = _RE_DURATION.search(line)
+            if m:
+                h, mi, se = m.groups()
+                a.duration = int(h) * 3600 + int(mi) * 60 + float(se)
+                continue
+        if not a.codec_name:
+            m = _RE_AUDIO.search(line)
+            if m:
+                a.codec_name = m.group(1)
+                if m.group(2) and m.group(2)[:1].isupper():  # "(LC)", "(HE-AAC)"; no "(mp3float)"
+                    a.profile = m.group(2)
+                a.sample_rate = int(m.group(3))
+                a.channel_layout = m.group(4).strip()
+                a.channels = _layout_channels(a.channel_layout)
+    return a
+
+
+class _BannerReader(threading.Thread):
+    """Lee el stderr de ffmpeg; `ready` se activa cuando ya se imprimió la entrada."""
+
+    def __init__(self, stream: Any) -> None:
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.lines: List[str] = []
+        self.ready = threading.Event()
+
+    def run(self) -> None:
+        for raw in iter(self.stream.readline, b""):
+            line = raw.decode("utf-8", errors="ignore").rstrip()
+            self.lines.append(line)
+            if line.startswith(("Output #0", "Stream mapping")):
+                self.ready.set()
+        self.ready.set()
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def probe_audio(path: str | Path, *, ffmpeg: Optional[str] = None) -> Optional[AudioInfo]:
+    """Metadatos del primer stream de audio: ffprobe o, si no está, el banner de `ffmpeg -i`.
+
+    None si ambos fallan.
+    """
+    if ffmpeg is None:
+        try:
+            return parse_audio_info(run_ffprobe(path))
+        except (RuntimeError, ValueError):
+            pass
+    exe = ffmpeg or resolve_ffbin("ffmpeg")
+    if not exe:
+        return None
+    try:
+        # Sin salida ffmpeg imprime la entrada y termina con código 1
+        proc = subprocess.run(
+            [exe, "-hide_banner", "-nostdin", "-i", str(path)], capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    info = parse_ffmpeg_banner(proc.stderr.decode("utf-8", errors="ignore"))
+    return info if info.codec_name else None
+
+
+def decode_pcm(
+    path: str | Path,
+    *,
+    sr: int,
+    mono: Optional[str] = "mix",
+    ffmpeg: Optional[str] = None,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+) -> tuple[np.ndarray, AudioInfo]:
+    """Decodifica con ffmpeg directamente a float32 a `sr` (y mono si `mono`).
+
+    ffmpeg remuestrea y mezcla en el mismo paso de decodificación y escribe f32le
+    por un pipe que se vuelca con `readinto` en un buffer reservado de antemano
+    según la duración del banner (que también da los metadatos, sin ffprobe).
+    Con `start`/`duration` (s) ffmpeg busca en la entrada (`-ss` antes de `-i`)
+    y decodifica solo esa región; `info.duration` sigue siendo la de la pista.
+    Devuelve (datos (ch, n), info). `mono`: 'mix' | 'left' | 'keep'/None.
+    Lanza RuntimeError si ffmpeg no está disponible o falla.
+    """
+    src = Path(path)
+    if not src.exists():
+        raise FileNotFoundError(src)
+    exe = ffmpeg or resolve_ffbin("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg not found")
+    if mono == "mix":
+        ch_args = ["-ac", "1"]
+    elif mono == "left":
+        ch_args = ["-af", "pan=mono|c0=c0"]
+    elif mono in (None, "keep"):
+        ch_args = []
+    else:
+        raise ValueError("mono must be one of 'mix','left','keep'")
+    seek = ["-ss", f"{float(start):.6f}"] if start and start > 0 else []
+    limit = ["-t", f"{float(duration):.6f}"] if duration is not None else []
+    cmd = [
+        exe,
+        "-hide_banner",
+        "-nostdin",
+        "-nostats",
+        "-v",
+        "info",
+        *seek,
+        "-i",
+        str(src),
+        *limit,
+        "-map",
+        "0:a:0",
+        "-vn",
+        *ch_args,
+        "-ar",
+        str(int(sr)),
+        "-f",
+        "f32le",
+        "-acodec",
+        "pcm_f32le",
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL
+        )
+    except OSError as e:
+        raise RuntimeError(f"ffmpeg failed to start: {e}") from e
+    banner = _BannerReader(proc.stderr)
+    banner.start()
+    try:
+        banner.ready.wait()
+        info = parse_ffmpeg_banner(banner.text)
+        channels = 1 if mono in ("mix", "left") else max(info.channels, 1)
+        # Duración del contenedor como estimación (+2 % y 1 s de margen); crece si se queda corta
+        span = max(info.duration - max(start, 0.0), 0.0) if info.duration > 0 else 60.0
+        if duration is not None:
+            span = min(span, float(duration)) if info.duration > 0 else float(duration)
+        est = span * sr * 1.02 + sr
+        buf = np.empty(int(math.ceil(est)) * channels, dtype=np.float32)
+        nbytes = 0
+        while True:
+            view = memoryview(buf).cast("B")
+            n = proc.stdout.readinto(view[nbytes:])
+            if not n:
+                break
+            nbytes += n
+            if nbytes == buf.nbytes:
+                grown = np.empty(buf.size + buf.size // 2, dtype=np.float32)
+                grown[: buf.size] = buf
+                buf = grown
+        proc.stdout.close()
+        rc = proc.wait()
+    finally:
+        if proc.poll() is None:  # pragma: no cover - error durante la lectura
+            proc.kill()
+            proc.wait()
+        banner.join()
+    if rc != 0:
+        tail = "\n".join(banner.lines[-5:])
+        raise RuntimeError(f"ffmpeg failed with code {rc}: {tail}")
+    frames = nbytes // (4 * channels)
+    data = buf[: frames * channels].reshape(frames, channels).T
+    if info.sample_rate == 0:
+        info.sample_rate = int(sr)
+    if info.channels == 0:
+        info.channels = channels
+    return data, info
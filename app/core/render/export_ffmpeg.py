@@ -0,0 +1,687 @@
+"""Exportación a vídeo: frames RGBA crudos por stdin a un proceso ffmpeg.
+
+El render y la codificación se solapan: el hilo principal compone cada frame
+en un buffer libre de un pool acotado (`buffers`, por defecto 3) y lo encola;
+un hilo escritor lo vuelca al pipe de ffmpeg y devuelve el buffer al pool. Si
+ffmpeg no consume a tiempo el pool se vacía y el render espera
+(contrapresión); si el render es el cuello de botella el escritor queda
+ocioso. Ambos tiempos se miden en `ExportStats`.
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import queue
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from ..media_probe import AudioInfo, is_aac_lc_passthrough_possible, probe_audio, resolve_ffbin
+from ..preset_manager import Preset
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """Ajustes del codificador para un `OutputConfig.profile`."""
+
+    vcodec: str = "libx264"
+    preset: str = "medium"
+    crf: int = 18
+    pix_fmt: str = "yuv420p"
+    gop_seconds: float = 2.0  # GOP cerrado: keyframe cada 2 s
+    bframes: int = 2
+    tune: Optional[str] = None
+    acodec: str = "aac"
+    audio_bitrate: str = "320k"
+    # Frecuencias aceptadas para copiar el audio sin recodificar
+    audio_rates: tuple = (44100, 48000)
+    audio_channels: int = 2
+    extra: tuple = ()
+
+    def gop(self, fps: int) -> int:
+        return max(1, int(round(self.gop_seconds * fps)))
+
+
+def audio_passthrough(info: Optional[AudioInfo], profile: EncoderProfile) -> bool:
+    """True si el audio fuente (AAC-LC, frecuencia y canales admitidos) puede ir con `-c:a copy`."""
+    if info is None or profile.acodec != "aac":
+        return False
+    if not info.channels or info.channels > profile.audio_channels:
+        return False
+    return any(is_aac_lc_passthrough_possible(info, target_sr=sr) for sr in profile.audio_rates)
+
+
+PROFILES: Dict[str, EncoderProfile] = {
+    # 1920x1080 @24 para YouTube: H.264 High, 4:2:0, GOP cerrado de 2 s, AAC-LC
+    "youtube_1080p24": EncoderProfile(crf=18, tune="animation"),
+    # 1080x1920 @24 (Shorts/Reels/TikTok): algo más comprimido, mismas reglas de GOP
+    "vertical_1080x1920_24": EncoderProfile(crf=20, tune="animation", audio_bitrate="256k"),
+}
+DEFAULT_PROFILE = "youtube_1080p24"
+
+
+def encoder_profile(name: str) -> EncoderProfile:
+    """Perfil por nombre; los desconocidos usan el de YouTube 1080p."""
+    return PROFILES.get(name, PROFILES[DEFAULT_PROFILE])
+
+
+def build_ffmpeg_cmd(
+    exe: str,
+    output: str | Path,
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    profile: EncoderProfile,
+    audio: Optional[str | Path] = None,
+    audio_start: float = 0.0,
+    duration: Optional[float] = None,
+    audio_copy: bool = False,
+) -> List[str]:
+    """Línea de comandos: vídeo RGBA por pipe:0 + audio del original (copiado o recodificado)."""
+    cmd = [
+        exe,
+        "-hide_banner",
+        "-nostats",
+        "-loglevel",
+        "warning",
+        "-y",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgba",
+        "-s",
+        f"{int(width)}x{int(height)}",
+        "-framerate",
+        str(int(fps)),
+        "-i",
+        "pipe:0",
+    ]
+    cmd += _audio_input_args(audio, audio_start, duration)
+    gop = profile.gop(fps)
+    cmd += [
+        "-c:v",
+        profile.vcodec,
+        "-preset",
+        profile.preset,
+        "-crf",
+        str(profile.crf),
+        "-pix_fmt",
+        profile.pix_fmt,
+        "-g",
+        str(gop),
+        "-keyint_min",
+        str(gop),
+        "-sc_threshold",
+        "0",
+        "-bf",
+        str(profile.bframes),
+        "-r",
+        str(int(fps)),
+    ]
+    if profile.tune:
+        cmd += ["-tune", profile.tune]
+    cmd += _audio_codec_args(audio, profile, audio_copy)
+    cmd += [*profile.extra, "-movflags", "+faststart", str(output)]
+    return cmd
+
+
+def _audio_input_args(
+    audio: Optional[str | Path], start: float, duration: Optional[float]
+) -> List[str]:
+    """Segunda entrada (audio original recortado a la ventana) y mapeo vídeo 0 + audio 1."""
+    if audio is None:
+        return []
+    args = ["-ss", f"{float(start):.6f}"] if start > 0 else []
+    if duration is not None:
+        args += ["-t", f"{float(duration):.6f}"]
+    return [*args, "-i", str(audio), "-map", "0:v:0", "-map", "1:a:0"]
+
+
+def _audio_codec_args(
+    audio: Optional[str | Path], profile: EncoderProfile, audio_copy: bool
+) -> List[str]:
+    if audio is None:
+        return []
+    if audio_copy:
+        return ["-c:a", "copy", "-shortest"]
+    return ["-c:a", profile.acodec, "-b:a", profile.audio_bitrate, "-shortest"]
+
+
+def build_concat_cmd(
+    exe: str,
+    list_file: str | Path,
+    output: str | Path,
+    *,
+    profile: EncoderProfile,
+    audio: Optional[str | Path] = None,
+    audio_start: float = 0.0,
+    duration: Optional[float] = None,
+    audio_copy: bool = False,
+) -> List[str]:
+    """Une segmentos con el demuxer concat (`-c:v copy`, sin recodificar) y añade el audio."""
+    cmd = [
+        exe,
+        "-hide_banner",
+        "-nostats",
+        "-loglevel",
+        "warning",
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        str(list_file),
+    ]
+    cmd += _audio_input_args(audio, audio_start, duration)
+    cmd += [
+        "-c:v",
+        "copy",
+        *_audio_codec_args(audio, profile, audio_copy),
+        "-movflags",
+        "+faststart",
+        str(output),
+    ]
+    return cmd
+
+
+def concat_segments(
+    segments: List[Path],
+    output: str | Path,
+    *,
+    profile: EncoderProfile,
+    audio: Optional[str | Path] = None,
+    audio_start: float = 0.0,
+    duration: Optional[float] = None,
+    audio_copy: bool = False,
+    ffmpeg: Optional[str] = None,
+) -> List[str]:
+    """Ejecuta el concat de `segments` (en orden) hacia `output`; devuelve el comando usado."""
+    exe = ffmpeg or resolve_ffbin("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg not found")
+    list_file = Path(output).with_name(Path(output).name + ".concat.txt")
+    # Formato del demuxer concat: comillas simples, las internas como '\''
+    lines = ["file '{}'".format(str(Path(p).resolve()).replace("'", "'\\''")) for p in segments]
+    list_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    cmd = build_concat_cmd(
+        exe,
+        list_file,
+        output,
+        profile=profile,
+        audio=audio,
+        audio_start=audio_start,
+        duration=duration,
+        audio_copy=audio_copy,
+    )
+    try:
+        proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+    except OSError as e:
+        raise RuntimeError(f"ffmpeg failed to start: {e}") from e
+    finally:
+        list_file.unlink(missing_ok=True)
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.decode("utf-8", errors="ignore").splitlines()[-5:])
+        raise RuntimeError(f"ffmpeg concat failed with code {proc.returncode}: {tail}")
+    return cmd
+
+
+@dataclass
+class ExportStats:
+    frames: int = 0
+    seconds: float = 0.0  # tiempo total de pared
+    render_s: float = 0.0  # componiendo frames
+    wait_s: float = 0.0  # render bloqueado esperando un buffer libre (contrapresión)
+    waits: int = 0  # veces que el pool estaba vacío
+    stall_s: float = 0.0  # escritor bloqueado en el pipe (ffmpeg no consume)
+    idle_s: float = 0.0  # escritor esperando frames (el render es el cuello de botella)
+    max_queued: int = 0
+    buffers: int = 0
+    audio: str = "none"  # "copy" (stream copy), "aac" (recodificado) o "none"
+    command: List[str] = field(default_factory=list)
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["fps"] = self.fps
+        return d
+
+
+def _write_all(stream: Any, buf: np.ndarray) -> None:
+    view = memoryview(buf).cast("B")
+    off = 0
+    while off < len(view):
+        off += stream.write(view[off:])
+
+
+def _grow_pipe(stream: Any, size: int) -> None:
+    """Agranda el buffer del pipe (Linux, F_SETPIPE_SZ): un frame no bloquea en trozos de 64 KiB."""
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import fcntl
+
+        fcntl.fcntl(stream.fileno(), 1031, size)  # F_SETPIPE_SZ
+    except OSError:  # pragma: no cover - límite /proc/sys/fs/pipe-max-size
+        pass
+
+
+class FrameSink:
+    """Pool acotado de buffers reutilizables vaciado por un hilo escritor.
+
+    `acquire()` da un buffer libre (bloquea si todos están en cola o
+    escribiéndose), `submit(buf)` lo encola y el escritor lo devuelve al pool
+    una vez volcado en `stream`. Nunca se reserva memoria por frame.
+    """
+
+    def __init__(
+        self, stream: Any, shape: tuple, *, buffers: int = 3, dtype: Any = np.uint8
+    ) -> None:
+        self.stream = stream
+        self.buffers = max(2, int(buffers))
+        self._free: "queue.Queue[np.ndarray]" = queue.Queue()
+        for _ in range(self.buffers):
+            self._free.put(np.zeros(shape, dtype=dtype))
+        self._ready: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        self.error: Optional[BaseException] = None
+        self.wait_s = 0.0
+        self.waits = 0
+        self.stall_s = 0.0
+        self.idle_s = 0.0
+        self.written = 0
+        self.max_queued = 0
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            buf = self._ready.get()
+            self.idle_s += time.perf_counter() - t0
+            if buf is None:
+                return
+            if self.error is None:
+                t0 = time.perf_counter()
+                try:
+                    _write_all(self.stream, buf)
+                    self.written += 1
+                except (OSError, ValueError) as e:  # pipe roto: ffmpeg terminó
+                    self.error = e
+                self.stall_s += time.perf_counter() - t0
+            self._free.put(buf)
+
+    def acquire(self) -> np.ndarray:
+        if self.error is not None:
+            raise RuntimeError(f"frame writer failed: {self.error}")
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        self.waits += 1
+        t0 = time.perf_counter()
+        buf = self._free.get()
+        self.wait_s += time.perf_counter() - t0
+        return buf
+
+    def submit(self, buf: np.ndarray) -> None:
+        self._ready.put(buf)
+        self.max_queued = max(self.max_queued, self._ready.qsize())
+
+    def close(self) -> None:
+        """Vacía la cola y para el escritor."""
+        if self._thread.is_alive():
+            self._ready.put(None)
+            self._thread.join()
+
+
+class _StderrTail(threading.Thread):
+    """Consume el stderr de ffmpeg (evita que se llene el pipe) y guarda las últimas líneas."""
+
+    def __init__(self, stream: Any, keep: int = 20) -> None:
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.lines: Deque[str] = collections.deque(maxlen=keep)
+
+    def run(self) -> None:
+        for raw in iter(self.stream.readline, b""):
+            self.lines.append(raw.decode("utf-8", errors="ignore").rstrip())
+
+
+class FFmpegExporter:
+    """Proceso ffmpeg que recibe frames RGBA (H, W, 4) por stdin.
+
+    Uso: `start()`, luego por frame `buf = acquire()`, componer en `buf`,
+    `submit(buf)`; al final `finish()` (o `abort()`). También como contexto.
+    """
+
+    def __init__(
+        self,
+        output: str | Path,
+        *,
+        width: int,
+        height: int,
+        fps: int,
+        profile: str | EncoderProfile = DEFAULT_PROFILE,
+        audio: Optional[str | Path] = None,
+        audio_start: float = 0.0,
+        duration: Optional[float] = None,
+        audio_copy: bool = False,
+        ffmpeg: Optional[str] = None,
+        buffers: int = 3,
+    ) -> None:
+        self.output = Path(output)
+        self.width, self.height, self.fps = int(width), int(height), int(fps)
+        self.profile = encoder_profile(profile) if isinstance(profile, str) else profile
+        self.audio = audio
+        self.audio_start = audio_start
+        self.duration = duration
+        self.audio_copy = audio_copy
+        self.ffmpeg = ffmpeg
+        self.buffers = buffers
+        self.stats = ExportStats(buffers=max(2, int(buffers)))
+        if audio is not None:
+            self.stats.audio = "copy" if audio_copy else self.profile.acodec
+        self._proc: Optional[subprocess.Popen] = None
+        self._sink: Optional[FrameSink] = None
+        self._err: Optional[_StderrTail] = None
+        self._t0 = 0.0
+
+    def start(self) -> "FFmpegExporter":
+        exe = self.ffmpeg or resolve_ffbin("ffmpeg")
+        if not exe:
+            raise RuntimeError("ffmpeg not found")
+        cmd = build_ffmpeg_cmd(
+            exe,
+            self.output,
+            width=self.width,
+            height=self.height,
+            fps=self.fps,
+            profile=self.profile,
+            audio=self.audio,
+            audio_start=self.audio_start,
+            duration=self.duration,
+            audio_copy=self.audio_copy,
+        )
+        self.stats.command = cmd
+        try:
+            # bufsize=0: stdin sin buffer de Python, el frame va directo del array al pipe
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                bufsize=0,
+            )
+        except OSError as e:
+            raise RuntimeError(f"ffmpeg failed to start: {e}") from e
+        frame_bytes = self.width * self.height * 4
+        _grow_pipe(self._proc.stdin, min(frame_bytes, 1 << 20))
+        self._err = _StderrTail(self._proc.stderr)
+        self._err.start()
+        self._sink = FrameSink(self._proc.stdin, (self.height, self.width, 4), buffers=self.buffers)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __enter__(self) -> "FFmpegExporter":
+        return self.start() if self._proc is None else self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+
+    def _failure(self, rc: Optional[int]) -> RuntimeError:
+        tail = "\n".join(self._err.lines) if self._err is not None else ""
+        return RuntimeError(f"ffmpeg failed with code {rc}: {tail}")
+
+    def acquire(self) -> np.ndarray:
+        assert self._sink is not None, "start() first"
+        try:
+            return self._sink.acquire()
+        except RuntimeError:
+            raise self._failure(self._proc.wait() if self._proc else None) from self._sink.error
+
+    def submit(self, buf: np.ndarray) -> None:
+        assert self._sink is not None, "start() first"
+        self._sink.submit(buf)
+        self.stats.frames += 1
+
+    def _collect(self) -> None:
+        sink = self._sink
+        if sink is not None:
+            self.stats.wait_s, self.stats.waits = sink.wait_s, sink.waits
+            self.stats.stall_s, self.stats.idle_s = sink.stall_s, sink.idle_s
+            self.stats.max_queued = sink.max_queued
+        self.stats.seconds = time.perf_counter() - self._t0
+
+    def finish(self) -> ExportStats:
+        """Espera a que se escriban los frames pendientes y a que ffmpeg cierre el archivo."""
+        assert self._proc is not None and self._sink is not None, "start() first"
+        self._sink.close()
+        try:
+            self._proc.stdin.close()
+        except OSError:  # pragma: no cover - pipe ya roto
+            pass
+        rc = self._proc.wait()
+        self._err.join()
+        self._collect()
+        if rc != 0 or self._sink.error is not None:
+            raise self._failure(rc)
+        return self.stats
+
+    def abort(self) -> None:
+        """Mata ffmpeg y borra la salida parcial."""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+        if self._sink is not None:
+            self._sink.close()
+        if self._proc is not None:
+            self._proc.wait()
+        if self._err is not None:
+            self._err.join()
+        self._collect()
+        self.output.unlink(missing_ok=True)
+
+
+ProgressFn = Callable[[int, int], None]
+
+
+def resolve_audio_copy(
+    audio: Optional[str | Path],
+    audio_copy: Optional[bool],
+    profile: EncoderProfile,
+    ffmpeg: Optional[str] = None,
+) -> bool:
+    """`audio_copy` explícito o, si es None, lo que decida `audio_passthrough` (queda en el log)."""
+    if audio is None:
+        return False
+    if audio_copy is None:
+        audio_copy = audio_passthrough(probe_audio(audio, ffmpeg=ffmpeg), profile)
+    logger.info(
+        "export audio: %s (%s)",
+        "stream copy" if audio_copy else f"re-encode {profile.acodec}",
+        audio,
+    )
+    return bool(audio_copy)
+
+
+def export_frames(
+    renderer: Any,
+    output: str | Path,
+    *,
+    profile: str | EncoderProfile = DEFAULT_PROFILE,
+    audio: Optional[str | Path] = None,
+    audio_copy: Optional[bool] = None,
+    ffmpeg: Optional[str] = None,
+    buffers: int = 3,
+    progress: Optional[ProgressFn] = None,
+    cancel: Optional[Any] = None,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> ExportStats:
+    """Renderiza los frames [`start`, `stop`) de `renderer` (`FrameRenderer`) directamente en
+    los buffers del exportador.
+
+    El audio se recorta a esa ventana de la timeline (`offset + start / fps`).
+    `audio_copy=None` decide con `audio_passthrough` sobre los metadatos de la
+    fuente: AAC-LC compatible se copia tal cual (`-c:a copy`), sin recodificar
+    ni pérdida de generación; el resto se recodifica. `stats.audio` dice cuál.
+    Con `cancel` (cualquier objeto con `is_set()`) activado se aborta y se
+    borra la salida (devuelve las stats parciales).
+    """
+    tl = renderer.timeline
+    stop = renderer.n_frames if stop is None else min(stop, renderer.n_frames)
+    total = max(stop - start, 0)
+    prof = encoder_profile(profile) if isinstance(profile, str) else profile
+    audio_copy = resolve_audio_copy(audio, audio_copy, prof, ffmpeg)
+    exporter = FFmpegExporter(
+        output,
+        width=renderer.width,
+        height=renderer.height,
+        fps=renderer.fps,
+        profile=prof,
+        audio=audio,
+        audio_start=(tl.offset if tl is not None else 0.0) + start / renderer.fps,
+        duration=total / renderer.fps,
+        audio_copy=audio_copy,
+        ffmpeg=ffmpeg,
+        buffers=buffers,
+    ).start()
+    try:
+        for k, i in enumerate(range(start, stop)):
+            if cancel is not None and cancel.is_set():
+                exporter.abort()
+                return exporter.stats
+            buf = exporter.acquire()
+            t0 = time.perf_counter()
+            renderer.render(i, out=buf)
+            exporter.stats.render_s += time.perf_counter() - t0
+            exporter.submit(buf)
+            if progress is not None:
+                progress(k + 1, total)
+    except BaseException:
+        exporter.abort()
+        raise
+    return exporter.finish()
+
+
+def export_file(
+    audio_path: str | Path,
+    preset: Preset,
+    output: str | Path,
+    *,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    cache: Optional[Any] = None,
+    base_dir: Optional[Path] = None,
+    ffmpeg: Optional[str] = None,
+    buffers: int = 3,
+    workers: int = 1,
+    progress: Optional[ProgressFn] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Any:
+    """Análisis + timeline + render + codificación de `audio_path` con `preset`.
+
+    Con `workers > 1` el render se reparte por segmentos en un pool de procesos
+    (`render.parallel.export_parallel`, devuelve `ParallelExportStats`).
+    """
+    from ..analysis import analysis_kwargs, analyze_file
+    from ..timeline import timeline_from_preset
+    from ..visual_engine.compositor import FrameRenderer
+
+    res = analyze_file(
+        audio_path,
+        cache=cache,
+        keep_spectrum="none",
+        **analysis_kwargs(preset.audio.analysis, preset.visual.bars),
+        start=start,
+        duration=duration,
+    )
+    timeline = timeline_from_preset(res, preset)
+    if workers > 1:
+        from .parallel import export_parallel
+
+        return export_parallel(
+            preset,
+            timeline,
+            output,
+            workers=workers,
+            base_dir=base_dir,
+            audio=audio_path,
+            ffmpeg=ffmpeg,
+            progress=progress,
+            cancel=cancel,
+        )
+    renderer = FrameRenderer(preset, timeline, base_dir=base_dir)
+    return export_frames(
+        renderer,
+        output,
+        profile=preset.output.profile,
+        audio=audio_path,
+        ffmpeg=ffmpeg,
+        buffers=buffers,
+        progress=progress,
+        cancel=cancel,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI manual
+    from ..preset_manager import PresetManager
+
+    if len(sys.argv) < 3:
+        print(
+            "Uso: python -m app.core.render.export_ffmpeg <audio> <salida.mp4> [--preset "
+            "nombre|ruta] [--start S --duration D] [--workers N]"
+        )
+        raise SystemExit(1)
+
+    def _opt(flag: str, cast: Callable[[str], Any], default: Any) -> Any:
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    pm = PresetManager()
+    name = _opt("--preset", str, "minimal_ring")
+    preset = pm.load(pm.get_builtin(name) or name)
+
+    def _progress(done: int, total: int) -> None:
+        if done % 24 == 0 or done == total:
+            print(f"\r{done}/{total}", end="", flush=True)
+
+    stats = export_file(
+        sys.argv[1],
+        preset,
+        sys.argv[2],
+        start=_opt("--start", float, 0.0),
+        duration=_opt("--duration", float, None),
+        workers=_opt("--workers", int, 1),
+        progress=_progress,
+    )
+    print()
+    print(f"Audio: {'copiado sin recodificar' if stats.audio == 'copy' else stats.audio}")
+    if isinstance(stats, ExportStats):
+        print(
+            f"{stats.frames} frames en {stats.seconds:.1f} s ({stats.fps:.1f} fps): render "
+            f"{stats.render_s:.1f} s, "
+            f"espera de buffer {stats.wait_s:.1f} s ({stats.waits}x), escritor bloqueado "
+            f"{stats.stall_s:.1f} s, "
+            f"ocioso {stats.idle_s:.1f} s"
+        )
+    else:
+        print(
+            f"{stats.frames} frames en {stats.seconds:.1f} s ({stats.fps:.1f} fps) con "
+            f"{stats.workers} procesos, "
+            f"{len(stats.segments)} segmentos, concat {stats.concat_s:.2f} s"
+        )
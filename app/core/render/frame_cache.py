@@ -0,0 +1,214 @@
+"""Caché de frames de la vista previa y tira de miniaturas de la pista (sin Qt).
+
+`FrameCache` guarda frames ya renderizados en un LRU con tope de memoria: al
+ir y volver sobre la misma sección (scrubbing) el reproductor copia el frame en
+vez de recomponerlo. La clave es (huella del preset, resolución proxy, calidad
+de glow, frame), con la huella de `render_key`: solo la invalidan los campos
+del preset que cambian los píxeles.
+
+`Filmstrip` renderiza en un hilo de fondo miniaturas de toda la pista a baja
+resolución, de grueso a fino (primero la mitad, luego los cuartos...), para
+que la línea de tiempo muestre algo en cualquier punto desde el principio.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+# Miniaturas: una cada THUMB_INTERVAL_S segundos (como mucho MAX_THUMBS), lado mayor THUMB_SIDE px
+THUMB_INTERVAL_S = 1.0
+MAX_THUMBS = 600
+THUMB_SIDE = 160
+
+
+class FrameCache:
+    """LRU de frames RGBA con tope `max_bytes`. Seguro entre hilos.
+
+    `put` copia el frame (reutilizando el array de una entrada expulsada de la
+    misma forma si la hay); `get` devuelve el array guardado, que no debe
+    modificarse. `retain(key)` descarta las entradas de otras huellas de preset.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Tuple[Hashable, ...], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[np.ndarray]:
+        with self._lock:
+            frame = self._items.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: Tuple[Hashable, ...], frame: np.ndarray) -> None:
+        if frame.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            spare = old if old is not None and old.shape == frame.shape else None
+            while self._items and self._bytes + frame.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                if spare is None and evicted.shape == frame.shape and evicted.dtype == frame.dtype:
+                    spare = evicted
+            if spare is None:
+                spare = np.empty_like(frame)
+            np.copyto(spare, frame)
+            self._items[key] = spare
+            self._bytes += spare.nbytes
+
+    def retain(self, preset_key: str) -> int:
+        """Deja solo las entradas de `preset_key` (clave[0]); devuelve cuántas quitó."""
+        with self._lock:
+            stale = [k for k in self._items if k[0] != preset_key]
+            for k in stale:
+                self._bytes -= self._items.pop(k).nbytes
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+def _coarse_to_fine(n: int) -> List[int]:
+    """Índices 0..n-1 de grueso a fino: 0, n/2, n/4, 3n/4... (cada pasada divide los huecos)."""
+    order: List[int] = []
+    seen = np.zeros(n, dtype=bool)
+    step = 1 << max(0, math.ceil(math.log2(max(n, 1))))
+    while step >= 1:
+        for i in range(0, n, step):
+            if not seen[i]:
+                seen[i] = True
+                order.append(i)
+        step //= 2
+    return order
+
+
+class Filmstrip:
+    """Miniaturas de toda la timeline a baja resolución, renderizadas en un hilo de fondo.
+
+    `count` miniaturas equiespaciadas (por defecto una por `THUMB_INTERVAL_S`)
+    de lado mayor `side` px, con las mismas capas que la vista previa
+    (`quality`). `thumbnail_at(t)` devuelve al momento la más cercana ya lista.
+    `busy` (p. ej. "la vista previa está reproduciendo") hace que el hilo ceda
+    entre miniaturas para no quitarle CPU al render en tiempo real. `key` es
+    la huella del preset (`render_key`) con la que se generaron.
+    """
+
+    def __init__(
+        self,
+        preset: Any,
+        timeline: Any,
+        *,
+        count: Optional[int] = None,
+        side: int = THUMB_SIDE,
+        quality: str = "preview",
+        base_dir: Any = None,
+        busy: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        from ..visual_engine.compositor import FrameRenderer
+        from .playback import proxy_size
+
+        res = preset.output.resolution
+        width, height = proxy_size(res.width, res.height, max_side=side)
+        self.renderer = FrameRenderer(
+            preset,
+            timeline,
+            width=width,
+            height=height,
+            buffers=1,
+            base_dir=base_dir,
+            quality=quality,
+        )
+        self.key = self.renderer.key
+        self.timeline = timeline
+        n = self.renderer.n_frames
+        if count is None:
+            count = math.ceil(n / timeline.fps / THUMB_INTERVAL_S) if n else 0
+        self.count = int(min(max(count, 1 if n else 0), MAX_THUMBS, n))
+        # Frame de la timeline de cada miniatura: centro de su tramo
+        self.frames = ((np.arange(self.count) + 0.5) * n / max(self.count, 1)).astype(np.int64)
+        self.thumbs = np.zeros((self.count, height, width, 4), dtype=np.uint8)
+        self._ready = np.zeros(self.count, dtype=bool)
+        self._order = _coarse_to_fine(self.count)
+        self._next = 0
+        self._busy = busy
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sequence = 0  # aumenta con cada miniatura lista
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.renderer.width, self.renderer.height
+
+    @property
+    def done(self) -> int:
+        return self._next
+
+    @property
+    def finished(self) -> bool:
+        return self._next >= self.count
+
+    def time_of(self, k: int) -> float:
+        return self.timeline.offset + float(self.frames[k]) / self.timeline.fps
+
+    def step(self) -> bool:
+        """Renderiza la siguiente miniatura (orden de grueso a fino); False si ya no quedan."""
+        if self.finished:
+            return False
+        k = self._order[self._next]
+        self.renderer.render(int(self.frames[k]), out=self.thumbs[k])
+        self._ready[k] = True
+        self._next += 1
+        self.sequence += 1
+        return True
+
+    def thumbnail_at(self, t: float) -> Optional[Tuple[int, np.ndarray]]:
+        """Miniatura lista más cercana al tiempo `t` (s): (índice, imagen (h, w, 4)), o None."""
+        ready = np.flatnonzero(self._ready)
+        if len(ready) == 0:
+            return None
+        f = (t - self.timeline.offset) * self.timeline.fps
+        k = ready[np.argmin(np.abs(self.frames[ready] - f))]
+        return int(k), self.thumbs[k]
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="filmstrip", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set() and self.step():
+            if self._busy is not None and self._busy():
+                self._stop.wait(0.05)  # cede CPU al render de la vista previa
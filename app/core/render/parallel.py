@@ -0,0 +1,305 @@
+"""Render de una exportación en paralelo por segmentos (pool de procesos).
+
+La timeline compilada se publica una vez en memoria compartida
+(`shared_arrays.share_timeline`) y cada proceso la conecta con mmap: los
+workers reciben los parámetros por frame ya calculados, sin volver a analizar
+ni copiar arrays. Cada worker renderiza y
+codifica un rango de frames [start, stop) a su propio archivo; los cortes caen
+en múltiplos del GOP del perfil, así que cada segmento empieza en el keyframe
+que el codificador pondría igualmente y el concat (`-c:v copy`) da el mismo
+número de frames, sin duplicados ni huecos.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..preset_manager import Preset
+from ..shared_arrays import SharedHandle, attach_timeline, share_timeline
+from ..timeline import FrameTimeline
+from .export_ffmpeg import (
+    EncoderProfile,
+    ExportStats,
+    ProgressFn,
+    concat_segments,
+    encoder_profile,
+    export_frames,
+    resolve_audio_copy,
+)
+
+
+def plan_segments(n_frames: int, parts: int, gop: int) -> List[Tuple[int, int]]:
+    """Divide [0, n_frames) en hasta `parts` rangos contiguos con cortes en múltiplos de `gop`."""
+    if n_frames <= 0:
+        return []
+    gop = max(1, int(gop))
+    n_gops = math.ceil(n_frames / gop)
+    parts = max(1, min(int(parts), n_gops))
+    cuts = [round(k * n_gops / parts) * gop for k in range(parts)] + [n_frames]
+    return [(a, min(b, n_frames)) for a, b in zip(cuts, cuts[1:]) if a < min(b, n_frames)]
+
+
+@dataclass
+class ParallelExportStats:
+    frames: int = 0
+    seconds: float = 0.0  # tiempo total de pared (render + concat)
+    workers: int = 1
+    concat_s: float = 0.0
+    audio: str = "none"
+    segments: List[ExportStats] = field(default_factory=list)
+    ranges: List[Tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def render_s(self) -> float:
+        return sum(s.render_s for s in self.segments)
+
+
+# --- Estado por proceso worker (se crea una vez en el initializer) ---
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(
+    preset: Preset,
+    timeline: SharedHandle,
+    width: int,
+    height: int,
+    base_dir: Optional[str],
+    progress_q: Any,
+    cancel: Any,
+) -> None:
+    from ..visual_engine.compositor import FrameRenderer
+
+    _WORKER.update(
+        renderer=FrameRenderer(
+            preset,
+            attach_timeline(timeline),
+            width=width,
+            height=height,
+            base_dir=Path(base_dir) if base_dir else None,
+        ),
+        progress=progress_q,
+        cancel=cancel,
+    )
+
+
+def _encode_segment(
+    start: int, stop: int, output: str, profile: EncoderProfile, ffmpeg: Optional[str]
+) -> ExportStats:
+    q = _WORKER["progress"]
+    sent = [0]
+
+    def _progress(done: int, total: int) -> None:
+        if done - sent[0] >= 8 or done == total:
+            q.put(done - sent[0])
+            sent[0] = done
+
+    return export_frames(
+        _WORKER["renderer"],
+        output,
+        profile=profile,
+        ffmpeg=ffmpeg,
+        start=start,
+        stop=stop,
+        progress=_progress,
+        cancel=_WORKER["cancel"],
+    )
+
+
+def _render_segment(start: int, stop: int) -> float:
+    """Solo render (sin codificar), para medir el escalado."""
+    renderer = _WORKER["renderer"]
+    t0 = time.perf_counter()
+    for i in range(start, stop):
+        renderer.render(i)
+    return time.perf_counter() - t0
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def _pool(
+    workers: int,
+    preset: Preset,
+    timeline: SharedHandle,
+    width: int,
+    height: int,
+    base_dir: Optional[Path],
+) -> Tuple[ProcessPoolExecutor, Any, Any]:
+    # spawn: no hereda hilos de Qt ni del escritor; cada worker importa solo lo necesario
+    ctx = mp.get_context("spawn")
+    progress_q, cancel = ctx.Queue(), ctx.Event()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(
+            preset,
+            timeline,
+            width,
+            height,
+            str(base_dir) if base_dir else None,
+            progress_q,
+            cancel,
+        ),
+    )
+    return pool, progress_q, cancel
+
+
+def export_parallel(
+    preset: Preset,
+    timeline: FrameTimeline,
+    output: str | Path,
+    *,
+    workers: Optional[int] = None,
+    segments: Optional[int] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    base_dir: Optional[Path] = None,
+    profile: str | EncoderProfile | None = None,
+    audio: Optional[str | Path] = None,
+    audio_copy: Optional[bool] = None,
+    ffmpeg: Optional[str] = None,
+    progress: Optional[ProgressFn] = None,
+    cancel: Optional[Any] = None,
+    tmp_dir: Optional[Path] = None,
+) -> ParallelExportStats:
+    """Renderiza y codifica `timeline` en `workers` procesos y une los segmentos en `output`.
+
+    `segments` (por defecto = `workers`) permite trocear más fino para repartir
+    mejor la carga. El audio se añade en el concat (copiado o recodificado, ver
+    `resolve_audio_copy`). Con `cancel` activado se detienen los workers y no
+    se escribe la salida.
+    """
+    t0 = time.perf_counter()
+    workers = max(1, int(workers or default_workers()))
+    prof = (
+        encoder_profile(profile or preset.output.profile)
+        if not isinstance(profile, EncoderProfile)
+        else profile
+    )
+    width = int(width or preset.output.resolution.width)
+    height = int(height or preset.output.resolution.height)
+    fps = int(timeline.fps)
+    ranges = plan_segments(timeline.n_frames, segments or workers, prof.gop(fps))
+    stats = ParallelExportStats(workers=workers, ranges=ranges)
+    output = Path(output)
+    work = Path(tempfile.mkdtemp(prefix=".segments.", dir=tmp_dir or output.parent))
+    shared = share_timeline(timeline)
+    try:
+        pool, progress_q, stop_ev = _pool(workers, preset, shared.handle, width, height, base_dir)
+        paths = [work / f"seg{k:04d}.mp4" for k in range(len(ranges))]
+        done = 0
+        with pool:
+            futures = [
+                pool.submit(_encode_segment, a, b, str(p), prof, ffmpeg)
+                for (a, b), p in zip(ranges, paths)
+            ]
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                while True:
+                    try:
+                        done += progress_q.get_nowait()
+                    except queue.Empty:
+                        break
+                if progress is not None:
+                    progress(done, timeline.n_frames)
+                if cancel is not None and cancel.is_set():
+                    stop_ev.set()
+                for f in finished:
+                    if f.exception() is not None:
+                        stop_ev.set()
+            stats.segments = [f.result() for f in futures]
+        if cancel is not None and cancel.is_set():
+            stats.seconds = time.perf_counter() - t0
+            return stats
+        stats.frames = sum(s.frames for s in stats.segments)
+        copy = resolve_audio_copy(audio, audio_copy, prof, ffmpeg)
+        if audio is not None:
+            stats.audio = "copy" if copy else prof.acodec
+        tc = time.perf_counter()
+        concat_segments(
+            paths,
+            output,
+            profile=prof,
+            audio=audio,
+            audio_start=timeline.offset,
+            duration=timeline.n_frames / fps,
+            audio_copy=copy,
+            ffmpeg=ffmpeg,
+        )
+        stats.concat_s = time.perf_counter() - tc
+    finally:
+        shared.close()
+        shutil.rmtree(work, ignore_errors=True)
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def bench_scaling(
+    preset: Preset,
+    timeline: FrameTimeline,
+    worker_counts: List[int],
+    *,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """fps de render (sin codificar) con 1..N procesos; speedup relativo al primer valor."""
+    width = int(width or preset.output.resolution.width)
+    height = int(height or preset.output.resolution.height)
+    rows: List[Dict[str, float]] = []
+    with share_timeline(timeline) as shared:
+        for n in worker_counts:
+            pool, _, _ = _pool(n, preset, shared.handle, width, height, None)
+            with pool:
+                # Calentamiento sin medir: arranque de procesos, imports y compilación numba
+                list(pool.map(_render_segment, [0] * n, [1] * n))
+                ranges = plan_segments(timeline.n_frames, n, 1)
+                t0 = time.perf_counter()
+                list(pool.map(_render_segment, [a for a, _ in ranges], [b for _, b in ranges]))
+                dt = time.perf_counter() - t0
+            fps = timeline.n_frames / dt
+            rows.append(
+                {"workers": n, "fps": fps, "speedup": fps / rows[0]["fps"] if rows else 1.0}
+            )
+    return rows
+
+
+# Benchmark: curva de escalado del render con el número de procesos
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+
+    from app.tests._fixtures import synthetic_timeline
+
+    from ..preset_manager import PresetManager
+
+    pm = PresetManager(Path(tempfile.mkdtemp()))
+    pm.ensure_example_presets()
+    name = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith("--") else "minimal_ring"
+    preset = pm.load(pm.get_builtin(name) or name)
+    tl = synthetic_timeline(preset, seconds=20.0)
+    cores = default_workers()
+    counts = sorted({n for n in (1, 2, 4, 8, 16, 32) if n <= cores} | {cores})
+    if "--workers" in sys.argv:  # p. ej. --workers 1,2,4,8
+        counts = [int(n) for n in sys.argv[sys.argv.index("--workers") + 1].split(",")]
+    print(
+        f"{name}: {tl.n_frames} frames "
+        f"{preset.output.resolution.width}x{preset.output.resolution.height}, {cores} núcleos"
+    )
+    for row in bench_scaling(preset, tl, counts):
+        print(f"  {row['workers']:3d} procesos: {row['fps']:7.1f} fps  x{row['speedup']:.2f}")
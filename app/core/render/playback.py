@@ -0,0 +1,477 @@
+"""Reproducción en tiempo real para la vista previa (sin Qt).
+
+Un hilo de render compone frames con las capas headless (`FrameRenderer`) en un
+anillo pequeño de buffers RGBA y publica siempre el último. La UI toma ese
+buffer (`acquire`), lo pinta sin copiarlo y lo suelta (`release`); el hilo nunca
+escribe en el buffer publicado ni en el que se está pintando. El frame a
+renderizar sale del reloj de reproducción (`PlaybackClock`, sincronizado con la
+posición del audio): si el render se retrasa se salta directamente al frame
+que toca ahora y los intermedios cuentan como descartados, nunca se encolan.
+
+La vista previa renderiza a una resolución proxy (`proxy_size`: la del widget,
+con el aspecto y como mucho la resolución de salida del mismo `Preset`, así
+que capas y glows, medidos en unidades del preset, coinciden con la
+exportación). `AdaptiveQuality` baja un escalón (`PREVIEW_LEVELS`: glows de
+vista previa, menos resolución, sin glows) cuando el tiempo de render medido
+supera el presupuesto del frame, y vuelve a la calidad completa en pausa.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..visual_engine.raster import new_frame
+
+# Desfase máximo (s) entre el reloj interpolado y la posición del audio antes de re-anclar
+RESYNC_S = 0.04
+
+
+class PlaybackClock:
+    """Tiempo de la pista (s) para la reproducción.
+
+    Entre actualizaciones avanza con el reloj monotónico; `sync(pos)` recibe la
+    posición del audio (que llega a saltos de decenas de ms) y re-ancla solo si
+    se desvía más de `resync`, así el tiempo es suave y no se aleja del audio.
+    Sin audio, es un reloj monotónico con play/pausa/seek. Seguro entre hilos.
+    """
+
+    def __init__(
+        self, *, resync: float = RESYNC_S, time_fn: Callable[[], float] = time.perf_counter
+    ) -> None:
+        self.resync = resync
+        self._time = time_fn
+        self._lock = threading.Lock()
+        self._pos = 0.0
+        self._t0 = time_fn()
+        self._playing = False
+
+    @property
+    def playing(self) -> bool:
+        return self._playing
+
+    def _now(self) -> float:
+        return self._pos + (self._time() - self._t0 if self._playing else 0.0)
+
+    def now(self) -> float:
+        with self._lock:
+            return self._now()
+
+    def play(self) -> None:
+        with self._lock:
+            if not self._playing:
+                self._t0 = self._time()
+                self._playing = True
+
+    def pause(self) -> None:
+        with self._lock:
+            self._pos = self._now()
+            self._playing = False
+
+    def seek(self, t: float) -> None:
+        with self._lock:
+            self._pos = float(t)
+            self._t0 = self._time()
+
+    def sync(self, position: float) -> None:
+        """Posición del audio (s); re-ancla si el reloj se ha desviado más de `resync`."""
+        with self._lock:
+            if abs(self._now() - position) > self.resync:
+                self._pos = float(position)
+                self._t0 = self._time()
+
+
+@dataclass
+class PlaybackStats:
+    rendered: int = 0  # frames compuestos por el hilo de render
+    shown: int = 0  # frames entregados a la UI
+    skipped: int = 0  # frames de la timeline que no se llegaron a renderizar (render lento)
+    unshown: int = 0  # frames renderizados y reemplazados antes de pintarse (UI lenta)
+    cached: int = 0  # frames servidos desde la caché de frames (sin render)
+    render_ms: float = 0.0  # tiempo de render por frame (media móvil)
+
+    @property
+    def dropped(self) -> int:
+        return self.skipped + self.unshown
+
+
+def proxy_size(
+    width: int,
+    height: int,
+    view: Optional[Tuple[int, int]] = None,
+    *,
+    scale: float = 1.0,
+    max_side: int = 960,
+) -> Tuple[int, int]:
+    """Resolución proxy para una salida `width`x`height` (pares, para el escalado).
+
+    Mantiene el aspecto de la salida y cabe en `view` (tamaño del widget en
+    píxeles de dispositivo), sin pasar de la resolución de salida ni de
+    `max_side`; `scale` la reduce después (escalones de calidad).
+    """
+    f = min(1.0, max_side / max(width, height))
+    if view is not None and view[0] > 0 and view[1] > 0:
+        f = min(f, view[0] / width, view[1] / height)
+    f *= scale
+    return max(2, int(width * f) // 2 * 2), max(2, int(height * f) // 2 * 2)
+
+
+def preview_size(width: int, height: int, max_side: int = 960) -> Tuple[int, int]:
+    """Resolución de la vista previa: la de salida reducida a `max_side` (pares)."""
+    return proxy_size(width, height, max_side=max_side)
+
+
+@dataclass(frozen=True)
+class PreviewLevel:
+    scale: float  # fracción de la resolución proxy
+    glow: str  # calidad de glow/bloom ('final' / 'preview' / 'off')
+
+
+# De más a menos calidad; el 0 es el de la pausa
+PREVIEW_LEVELS: Tuple[PreviewLevel, ...] = (
+    PreviewLevel(1.0, "final"),
+    PreviewLevel(1.0, "preview"),
+    PreviewLevel(0.75, "preview"),
+    PreviewLevel(0.5, "off"),
+)
+
+
+class AdaptiveQuality:
+    """Resolución proxy y escalón de calidad de la vista previa de un `Preset`.
+
+    `build()` crea el `FrameRenderer` del escalón actual. `observe(ms)` recibe el
+    tiempo de render de cada frame en reproducción: con la media móvil por
+    encima de `headroom` x presupuesto (1/fps) durante `patience` frames baja
+    un escalón. `full()` vuelve al escalón 0 (pausa) y `set_view` cambia el
+    tamaño del widget; los tres devuelven True si hay que reconstruir el
+    renderer. Con `preset.output.preview.adaptive` desactivado se queda en 0.
+    """
+
+    def __init__(
+        self,
+        preset: Any,
+        timeline: Any = None,
+        *,
+        view: Optional[Tuple[int, int]] = None,
+        levels: Sequence[PreviewLevel] = PREVIEW_LEVELS,
+        budget_ms: Optional[float] = None,
+        headroom: float = 0.85,
+        patience: int = 3,
+        base_dir: Any = None,
+    ) -> None:
+        self.preset = preset
+        self.timeline = timeline
+        self.levels = tuple(levels)
+        fps = timeline.fps if timeline is not None else preset.output.fps
+        self.budget_ms = 1000.0 / fps if budget_ms is None else float(budget_ms)
+        self.headroom = headroom
+        self.patience = max(1, patience)
+        self.adaptive = preset.output.preview.adaptive
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._view = view
+        self._level = 0
+        self._n = 0
+        self._ema = 0.0
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def size(self, level: Optional[int] = None) -> Tuple[int, int]:
+        """Resolución proxy del escalón `level` (el actual por defecto)."""
+        res = self.preset.output.resolution
+        lv = self.levels[self._level if level is None else level]
+        max_side = self.preset.output.preview.max_side
+        return proxy_size(res.width, res.height, self._view, scale=lv.scale, max_side=max_side)
+
+    def build(self) -> Any:
+        from ..visual_engine.compositor import FrameRenderer
+
+        with self._lock:
+            width, height = self.size()
+            glow = self.levels[self._level].glow
+        return FrameRenderer(
+            self.preset,
+            self.timeline,
+            width=width,
+            height=height,
+            buffers=1,
+            base_dir=self.base_dir,
+            quality=glow,
+        )
+
+    def _set_level(self, level: int) -> bool:
+        if level == self._level:
+            return False
+        self._level, self._n, self._ema = level, 0, 0.0
+        return True
+
+    def observe(self, ms: float) -> bool:
+        """Tiempo de render (ms) de un frame en reproducción; True si baja de escalón."""
+        with self._lock:
+            self._n += 1
+            self._ema = ms if self._n == 1 else 0.7 * self._ema + 0.3 * ms
+            if (
+                not self.adaptive
+                or self._n < self.patience
+                or self._ema <= self.headroom * self.budget_ms
+            ):
+                return False
+            return self._set_level(min(self._level + 1, len(self.levels) - 1))
+
+    def full(self) -> bool:
+        with self._lock:
+            return self._set_level(0)
+
+    def set_view(self, width: int, height: int) -> bool:
+        with self._lock:
+            before = self.size()
+            self._view = (int(width), int(height))
+            return self.size() != before
+
+
+class PreviewPlayer:
+    """Hilo de render de la vista previa sobre un anillo de `buffers` frames (mínimo 3).
+
+    `renderer` es un `FrameRenderer` (normalmente con `quality="preview"` y una
+    resolución reducida); `clock` da el tiempo de la pista. Al final de la
+    timeline el reloj se pausa en el último frame. Con `quality`
+    (`AdaptiveQuality`, que ha construido `renderer`) el hilo cambia de
+    renderer cuando cambia el escalón o el tamaño de la vista, y en pausa
+    vuelve a renderizar el frame actual con la calidad completa. Con `cache`
+    (`FrameCache`) los frames ya renderizados con la misma huella de preset,
+    resolución y calidad se copian en vez de recomponerse.
+    """
+
+    def __init__(
+        self,
+        renderer: Any,
+        clock: Optional[PlaybackClock] = None,
+        *,
+        buffers: int = 3,
+        quality: Optional[AdaptiveQuality] = None,
+        cache: Any = None,
+    ) -> None:
+        self.renderer = renderer
+        self.clock = clock or PlaybackClock()
+        self.quality = quality
+        self.cache = cache
+        self.fps = float(renderer.fps)
+        self.offset = float(renderer.timeline.offset) if renderer.timeline is not None else 0.0
+        self.stats = PlaybackStats()
+        # Publicado (latest) + en pintura (in_use) + al menos uno libre para el hilo
+        self._ring = max(3, buffers)
+        self._bufs: List[np.ndarray] = [
+            new_frame(renderer.width, renderer.height) for _ in range(self._ring)
+        ]
+        self._rebuild = threading.Event()
+        self._force = False
+        self._lock = threading.Lock()
+        self._latest: Optional[int] = None
+        self._latest_index = -1
+        self._latest_shown = True
+        self._in_use: Optional[int] = None
+        self._seq = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Control ---
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="preview-render", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def play(self) -> None:
+        if self.frame_at(self.clock.now()) >= self.renderer.n_frames - 1:
+            self.clock.seek(self.offset)  # al final: volver a empezar
+        self.clock.play()
+        self._wake.set()
+
+    def pause(self) -> None:
+        self.clock.pause()
+        self._full_quality()
+        self._wake.set()
+
+    def set_view(self, width: int, height: int) -> None:
+        """Tamaño (px de dispositivo) de la superficie de la vista previa."""
+        if self.quality is not None and self.quality.set_view(width, height):
+            self._rebuild.set()
+            self._wake.set()
+
+    def _full_quality(self) -> None:
+        if self.quality is not None and self.quality.full():
+            self._rebuild.set()
+
+    def seek(self, t: float) -> None:
+        self.clock.seek(t)
+        self._wake.set()
+
+    @property
+    def playing(self) -> bool:
+        return self.clock.playing
+
+    def frame_at(self, t: float) -> int:
+        n = self.renderer.n_frames
+        return int(np.clip(np.floor((t - self.offset) * self.fps), 0, max(n - 1, 0)))
+
+    # --- Lado UI ---
+    @property
+    def sequence(self) -> int:
+        """Aumenta con cada frame publicado (para que la UI sepa si hay algo nuevo que pintar)."""
+        return self._seq
+
+    def acquire(self) -> Optional[Tuple[int, np.ndarray]]:
+        """Último frame publicado (índice, buffer). El hilo no lo toca hasta `release()`."""
+        with self._lock:
+            if self._latest is None:
+                return None
+            self._in_use = self._latest
+            if not self._latest_shown:
+                self._latest_shown = True
+                self.stats.shown += 1
+            return self._latest_index, self._bufs[self._latest]
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use = None
+
+    # --- Hilo de render ---
+    def _free_slot(self) -> int:
+        with self._lock:
+            busy = {self._latest, self._in_use}
+        return next(k for k in range(self._ring) if k not in busy)
+
+    def _swap_renderer(self) -> None:
+        """Renderer del escalón actual y anillo nuevo a su resolución.
+
+        El frame publicado y el que pinta la UI pasan al final de la lista (fuera
+        del anillo): se siguen mostrando hasta que haya uno nuevo y el hilo no
+        vuelve a escribir en ellos.
+        """
+        renderer = self.quality.build()
+        ring = [new_frame(renderer.width, renderer.height) for _ in range(self._ring)]
+        with self._lock:
+            keep = [k for k in (self._latest, self._in_use) if k is not None]
+            remap = {k: self._ring + n for n, k in enumerate(dict.fromkeys(keep))}
+            self._bufs = ring + [self._bufs[k] for k in remap]
+            self._latest = remap.get(self._latest) if self._latest is not None else None
+            self._in_use = remap.get(self._in_use) if self._in_use is not None else None
+            self.renderer = renderer
+        self._force = True
+
+    def _publish(self, slot: int, index: int) -> None:
+        with self._lock:
+            if not self._latest_shown:
+                self.stats.unshown += 1
+            self._latest, self._latest_index, self._latest_shown = slot, index, False
+            self._seq += 1
+
+    def render_due(self) -> bool:
+        """Publica el frame que toca según el reloj (render o caché) si falta; True si publicó."""
+        if self._rebuild.is_set():
+            self._rebuild.clear()
+            self._swap_renderer()
+        n = self.renderer.n_frames
+        if n == 0:
+            return False
+        target = self.frame_at(self.clock.now())
+        last = self._latest_index
+        if target == last and not self._force:
+            return False
+        self._force = False
+        if self.clock.playing and last >= 0 and target > last + 1:
+            self.stats.skipped += target - last - 1
+        slot = self._free_slot()
+        buf = self._bufs[slot]
+        r = self.renderer
+        key = (r.key, r.width, r.height, r.quality, target)
+        cached = self.cache.get(key) if self.cache is not None else None
+        st = self.stats
+        ms: Optional[float] = None
+        if cached is not None:
+            np.copyto(buf, cached)
+            st.cached += 1
+        else:
+            t0 = time.perf_counter()
+            r.render(target, out=buf)
+            ms = (time.perf_counter() - t0) * 1e3
+            st.render_ms = ms if st.rendered == 0 else 0.9 * st.render_ms + 0.1 * ms
+            st.rendered += 1
+            if self.cache is not None:
+                self.cache.put(key, buf)
+        self._publish(slot, target)
+        if self.clock.playing:
+            if target >= n - 1:
+                self.clock.pause()
+                self._full_quality()
+            elif ms is not None and self.quality is not None and self.quality.observe(ms):
+                self._rebuild.set()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rendered = self.render_due()
+            if rendered:
+                continue
+            if self.clock.playing:
+                # Dormir hasta que toque el siguiente frame (como mucho 20 ms por si hay seek)
+                t = self.clock.now() - self.offset
+                due = (np.floor(t * self.fps) + 1.0) / self.fps - t
+                self._wake.wait(min(max(due, 0.001), 0.02))
+            else:
+                self._wake.wait(0.1)
+            self._wake.clear()
+
+
+# Benchmark: reproducción de 10 s con la vista previa adaptativa, sin UI
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+    import tempfile
+    from pathlib import Path
+
+    from app.tests._fixtures import synthetic_timeline
+
+    from ..preset_manager import PresetManager
+
+    pm = PresetManager(Path(tempfile.mkdtemp()))
+    pm.ensure_example_presets()
+    name = sys.argv[1] if len(sys.argv) > 1 else "minimal_ring"
+    preset = pm.load(pm.get_builtin(name) or name)
+    tl = synthetic_timeline(preset, seconds=10.0)
+    res = preset.output.resolution
+    quality = AdaptiveQuality(preset, tl, view=(res.width, res.height))
+    w, h = quality.size()
+    player = PreviewPlayer(quality.build(), quality=quality)
+    player.start()
+    player.play()
+    shown = 0
+    seq = -1
+    t_end = time.perf_counter() + tl.duration
+    while time.perf_counter() < t_end and player.playing:
+        if player.sequence != seq and player.acquire() is not None:  # UI simulada a 60 Hz
+            seq = player.sequence
+            player.release()
+        time.sleep(1 / 60)
+    player.stop()
+    st = player.stats
+    print(
+        f"{name} {w}x{h}: {st.rendered} renderizados, {st.shown} mostrados, {st.dropped} "
+        "descartados "
+        f"({st.skipped} sin renderizar, {st.unshown} sin mostrar), render {st.render_ms:.1f} ms; "
+        f"escalón final {quality.level} ({player.renderer.width}x{player.renderer.height}, "
+        f"glow {quality.levels[quality.level].glow})"
+    )
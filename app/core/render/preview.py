@@ -1,15 +1,274 @@
+"""Superficie de vista previa (Qt): pinta el último frame del `PreviewPlayer`.
+
+El buffer RGBA del hilo de render se envuelve como `QImage` sin copiarlo
+(`frame_to_qimage`) y se escala al pintar. Un `QTimer` a la frecuencia de
+refresco comprueba si hay un frame nuevo y, si hay audio (`PreviewAudio`, con
+QtMultimedia), pasa su posición al reloj de reproducción. El tamaño del widget
+(en píxeles de dispositivo) fija la resolución proxy del reproductor.
+
+`FilmstripBar` pinta debajo la tira de miniaturas (`Filmstrip`) con el cabezal
+de reproducción; pulsar o arrastrar sobre ella mueve la vista previa.
+"""
+
 from __future__ import annotations
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPaintEvent, QPainter
+from typing import Optional
+
+import numpy as np
+from PySide6.QtCore import QRectF, Qt, QTimer
+from PySide6.QtGui import QImage, QMouseEvent, QPainter, QPaintEvent, QResizeEvent
 from PySide6.QtWidgets import QWidget
 
+from .frame_cache import Filmstrip
+from .playback import PreviewPlayer
+
+try:  # QtMultimedia necesita un backend de audio del sistema (p. ej. libpulse en Linux)
+    from PySide6.QtCore import QUrl
+    from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
+except Exception:  # pragma: no cover - sin audio: la vista previa va con reloj monotónico
+    QMediaPlayer = QAudioOutput = None
+
+REFRESH_HZ = 60
+FILMSTRIP_HEIGHT = 56
+
+
+def frame_to_qimage(frame: np.ndarray) -> QImage:
+    """Vista `QImage` (RGBA8888) sobre un frame (H, W, 4) uint8 contiguo, sin copiar.
+
+    La imagen apunta a la memoria del array: solo es válida mientras el buffer
+    no se reescriba (entre `PreviewPlayer.acquire` y `release`).
+    """
+    if (
+        frame.dtype != np.uint8
+        or frame.ndim != 3
+        or frame.shape[2] != 4
+        or not frame.flags.c_contiguous
+    ):
+        raise ValueError("frame must be a contiguous (H, W, 4) uint8 array")
+    h, w = frame.shape[:2]
+    return QImage(frame.data, w, h, frame.strides[0], QImage.Format.Format_RGBA8888)
+
+
+class PreviewAudio:
+    """Audio de la vista previa con `QMediaPlayer`; `available` es False sin QtMultimedia."""
+
+    def __init__(self, path: str, parent=None) -> None:
+        self.available = QMediaPlayer is not None
+        if not self.available:
+            return
+        self._output = QAudioOutput(parent)
+        self._player = QMediaPlayer(parent)
+        self._player.setAudioOutput(self._output)
+        self._player.setSource(QUrl.fromLocalFile(path))
+
+    def play(self) -> None:
+        if self.available:
+            self._player.play()
+
+    def pause(self) -> None:
+        if self.available:
+            self._player.pause()
+
+    def seek(self, t: float) -> None:
+        if self.available:
+            self._player.setPosition(int(t * 1000))
+
+    def position(self) -> Optional[float]:
+        """Posición actual (s) mientras suena; None si no hay audio o está parado."""
+        if (
+            not self.available
+            or self._player.playbackState() != QMediaPlayer.PlaybackState.PlayingState
+        ):
+            return None
+        return self._player.position() / 1000.0
+
+    def stop(self) -> None:
+        if self.available:
+            self._player.stop()
+
 
 class PreviewSurface(QWidget):
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.player: Optional[PreviewPlayer] = None
+        self.audio: Optional[PreviewAudio] = None
+        self._seq = -1
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(int(1000 / REFRESH_HZ))
+        self._timer.timeout.connect(self._tick)
+
+    def view_size(self) -> tuple[int, int]:
+        """Tamaño del área de dibujo en píxeles de dispositivo (para la resolución proxy)."""
+        dpr = self.devicePixelRatioF()
+        return int(self.width() * dpr), int(self.height() * dpr)
+
+    def set_player(
+        self, player: Optional[PreviewPlayer], audio: Optional[PreviewAudio] = None
+    ) -> None:
+        """Conecta (o con None, desconecta) la fuente de frames y su audio."""
+        if self.player is not None:
+            self.player.stop()
+        if self.audio is not None:
+            self.audio.stop()
+        self.player, self.audio = player, audio
+        self._seq = -1
+        if player is not None:
+            player.set_view(*self.view_size())
+            player.start()
+            self._timer.start()
+        else:
+            self._timer.stop()
+        self.update()
+
+    def play(self) -> None:
+        if self.player is None:
+            return
+        self.player.play()
+        if self.audio is not None:
+            self.audio.seek(self.player.clock.now())
+            self.audio.play()
+
+    def pause(self) -> None:
+        if self.player is None:
+            return
+        self.player.pause()
+        if self.audio is not None:
+            self.audio.pause()
+
+    def seek(self, t: float) -> None:
+        if self.player is None:
+            return
+        self.player.seek(t)
+        if self.audio is not None:
+            self.audio.seek(t)
+
+    def toggle(self) -> bool:
+        """Play/pausa; devuelve True si queda reproduciendo."""
+        if self.player is None:
+            return False
+        if self.player.playing:
+            self.pause()
+        else:
+            self.play()
+        return self.player.playing
+
+    def _tick(self) -> None:  # pragma: no cover - temporizador Qt
+        player = self.player
+        if player is None:
+            return
+        pos = self.audio.position() if self.audio is not None else None
+        if pos is not None:
+            if player.playing:
+                player.clock.sync(pos)
+            else:
+                self.audio.pause()  # el reloj se detuvo al final de la timeline
+        if player.sequence != self._seq:
+            self.update()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:  # pragma: no cover - GUI
+        super().resizeEvent(event)
+        if self.player is not None:
+            self.player.set_view(*self.view_size())
+
+    def paintEvent(self, event: QPaintEvent) -> None:  # pragma: no cover - GUI drawing
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        got = self.player.acquire() if self.player is not None else None
+        if got is None:
+            painter.setPen(self.palette().text().color())
+            painter.fillRect(self.rect(), self.palette().window())
+            painter.drawText(self.rect(), Qt.AlignCenter, "Preview")
+            painter.end()
+            return
+        try:
+            self._seq = self.player.sequence
+            _, frame = got
+            image = frame_to_qimage(frame)
+            h, w = frame.shape[:2]
+            f = min(self.width() / w, self.height() / h)
+            target = QRectF((self.width() - w * f) / 2, (self.height() - h * f) / 2, w * f, h * f)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+            painter.drawImage(target, image)
+            del image
+        finally:
+            self.player.release()
+        st = self.player.stats
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawText(
+            self.rect().adjusted(8, 6, -8, -6),
+            Qt.AlignLeft | Qt.AlignTop,
+            f"{w}x{h} · render {st.render_ms:.1f} ms · descartados {st.dropped}",
+        )
+        painter.end()
+
+
+class FilmstripBar(QWidget):
+    """Tira de miniaturas de la pista con el cabezal; pulsar/arrastrar hace seek en `surface`."""
+
+    def __init__(self, surface: PreviewSurface, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.surface = surface
+        self.filmstrip: Optional[Filmstrip] = None
+        self.setFixedHeight(FILMSTRIP_HEIGHT)
+        self._timer = QTimer(self)
+        self._timer.setInterval(100)
+        self._timer.timeout.connect(self.update)
+        self._timer.start()
+
+    def set_filmstrip(self, filmstrip: Optional[Filmstrip]) -> None:
+        if self.filmstrip is not None and self.filmstrip is not filmstrip:
+            self.filmstrip.stop()
+        self.filmstrip = filmstrip
+        if filmstrip is not None:
+            filmstrip.start()
+        self.update()
+
+    def _span(self) -> Optional[tuple[float, float]]:
+        fs = self.filmstrip
+        if fs is None or fs.count == 0:
+            return None
+        tl = fs.timeline
+        return tl.offset, tl.n_frames / tl.fps
+
+    def _seek_to(self, x: float) -> None:  # pragma: no cover - GUI
+        span = self._span()
+        if span is None or self.width() <= 0:
+            return
+        self.surface.seek(span[0] + span[1] * min(max(x / self.width(), 0.0), 1.0))
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:  # pragma: no cover - GUI
+        self._seek_to(event.position().x())
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:  # pragma: no cover - GUI
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self._seek_to(event.position().x())
+
     def paintEvent(self, event: QPaintEvent) -> None:  # pragma: no cover - GUI drawing
         painter = QPainter(self)
-        painter.fillRect(self.rect(), self.palette().window())
-        painter.setPen(self.palette().text().color())
-        painter.drawText(self.rect(), Qt.AlignCenter, "Preview")
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        span = self._span()
+        if span is None:
+            painter.end()
+            return
+        fs = self.filmstrip
+        tw, th = fs.size
+        h = self.height()
+        w = max(1, int(round(tw * h / th)))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        for x in range(0, self.width(), w):
+            got = fs.thumbnail_at(span[0] + span[1] * (x + 0.5 * w) / self.width())
+            if got is not None:
+                painter.drawImage(QRectF(x, 0, w, h), frame_to_qimage(got[1]))
+        player = self.surface.player
+        if player is not None:
+            x = (player.clock.now() - span[0]) / span[1] * self.width()
+            painter.fillRect(QRectF(x - 1, 0, 2, h), Qt.GlobalColor.white)
+        if not fs.finished:
+            painter.setPen(Qt.GlobalColor.white)
+            painter.drawText(
+                self.rect().adjusted(6, 0, -6, 0),
+                Qt.AlignRight | Qt.AlignVCenter,
+                f"{fs.done}/{fs.count}",
+            )
         painter.end()
-        super().paintEvent(event)
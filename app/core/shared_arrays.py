@@ -0,0 +1,191 @@
+"""Publicación de arrays para procesos worker sin copias ni pickle.
+
+Pasar un `AnalysisResult` o una `FrameTimeline` como argumento de un pool de
+procesos serializa y copia cada array en cada worker. Aquí se empaquetan todos
+los arrays en un único archivo mapeado en memoria (en `/dev/shm` si existe, es
+decir, la misma memoria compartida POSIX que usa `multiprocessing.shared_memory`)
+y a los workers solo viaja un `SharedHandle` pequeño (ruta + tabla de offsets).
+`attach` mapea el archivo en solo lectura y devuelve vistas NumPy: la RAM se
+ocupa una vez, se conecten los workers que se conecten.
+
+Se usa mmap de archivo y no `SharedMemory` porque las vistas mantienen vivo el
+mapeo por sí solas (cerrar un `SharedMemory` con vistas exportadas falla) y
+porque el mismo código sirve en Windows/macOS, donde cae al directorio temporal.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .analysis import AnalysisResult
+from .analysis_cache import _ARRAY_FIELDS as _ANALYSIS_ARRAYS
+from .analysis_cache import _OPTIONAL_SCALARS, _SCALAR_FIELDS
+from .timeline import _ARRAY_FIELDS as _TIMELINE_ARRAYS
+from .timeline import FrameTimeline
+
+ALIGN = 64  # cada array empieza alineado a línea de caché
+
+
+def shared_dir() -> Path:
+    """`/dev/shm` (tmpfs, no toca disco) si existe; si no, el temporal del sistema."""
+    shm = Path("/dev/shm")
+    return shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+
+
+@dataclass(frozen=True)
+class SharedHandle:
+    """Descriptor picklable de un bloque: ruta + (nombre, dtype, forma, offset) por array."""
+
+    path: str
+    layout: Tuple[Tuple[str, str, Tuple[int, ...], int], ...]
+    meta: Dict[str, Any] = field(default_factory=dict, compare=False)
+    nbytes: int = 0
+
+
+class SharedArrays:
+    """Lado propietario: copia `arrays` una vez al bloque compartido; `close()` lo libera.
+
+    Las vistas ya conectadas siguen siendo válidas tras `close()` en POSIX (el
+    archivo se desvincula pero el mapeo vive hasta que se liberan).
+    """
+
+    def __init__(
+        self,
+        arrays: Mapping[str, np.ndarray],
+        meta: Optional[Dict[str, Any]] = None,
+        *,
+        directory: Optional[Path] = None,
+    ) -> None:
+        layout = []
+        offset = 0
+        for name, arr in arrays.items():
+            arr = np.asarray(arr)
+            if arr.dtype.hasobject:
+                raise TypeError(f"array '{name}' has object dtype")
+            offset = -(-offset // ALIGN) * ALIGN
+            layout.append((name, arr.dtype.str, tuple(arr.shape), offset))
+            offset += arr.nbytes
+        path = (directory or shared_dir()) / f"ncs-{os.getpid()}-{uuid.uuid4().hex[:12]}.shm"
+        with open(path, "w+b") as f:
+            f.truncate(max(offset, 1))
+            if offset:
+                with mmap.mmap(f.fileno(), offset) as mm:
+                    buf = np.frombuffer(mm, dtype=np.uint8)
+                    for (name, dt, shape, off), arr in zip(layout, arrays.values()):
+                        n = int(np.prod(shape, dtype=np.int64)) * np.dtype(dt).itemsize
+                        buf[off : off + n].view(dt).reshape(shape)[...] = arr
+                    del buf
+        self.handle = SharedHandle(str(path), tuple(layout), dict(meta or {}), offset)
+
+    @property
+    def nbytes(self) -> int:
+        return self.handle.nbytes
+
+    def close(self) -> None:
+        try:
+            os.unlink(self.handle.path)
+        except FileNotFoundError:
+            pass
+        except PermissionError:  # pragma: no cover - Windows: aún mapeado en otro proceso
+            pass
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def attach(handle: SharedHandle) -> Dict[str, np.ndarray]:
+    """Vistas de solo lectura sobre el bloque (un único mmap por llamada, sin copias)."""
+    if not handle.nbytes:
+        return {name: np.empty(shape, dtype=dt) for name, dt, shape, _ in handle.layout}
+    with open(handle.path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    out: Dict[str, np.ndarray] = {}
+    for name, dt, shape, off in handle.layout:
+        count = int(np.prod(shape, dtype=np.int64))
+        out[name] = np.frombuffer(mm, dtype=dt, count=count, offset=off).reshape(shape)
+    return out
+
+
+# --- AnalysisResult ---
+def share_analysis(res: AnalysisResult, *, directory: Optional[Path] = None) -> SharedArrays:
+    """Publica arrays, bandas y escalares de `res` (no el loader perezoso del espectrograma)."""
+    arrays = {
+        name: getattr(res, name) for name in _ANALYSIS_ARRAYS if getattr(res, name) is not None
+    }
+    arrays.update({f"band_{k}": v for k, v in res.energy_bands.items()})
+    meta = {
+        "kind": "analysis",
+        "scalars": {k: getattr(res, k) for k in (*_SCALAR_FIELDS, *_OPTIONAL_SCALARS)},
+        "bands": list(res.energy_bands),
+        "norm_scales": dict(res.norm_scales),
+    }
+    return SharedArrays(arrays, meta, directory=directory)
+
+
+def attach_analysis(handle: SharedHandle) -> AnalysisResult:
+    views = attach(handle)
+    meta = handle.meta
+    arrays = {name: views.get(name) for name in _ANALYSIS_ARRAYS}
+    return AnalysisResult(
+        **{k: meta["scalars"][k] for k in _SCALAR_FIELDS},
+        **{k: meta["scalars"].get(k, v) for k, v in _OPTIONAL_SCALARS.items()},
+        **arrays,
+        energy_bands={k: views[f"band_{k}"] for k in meta["bands"]},
+        norm_scales=dict(meta.get("norm_scales", {})),
+    )
+
+
+# --- FrameTimeline ---
+def share_timeline(tl: FrameTimeline, *, directory: Optional[Path] = None) -> SharedArrays:
+    arrays = {name: getattr(tl, name) for name in _TIMELINE_ARRAYS}
+    meta = {"kind": "timeline", "fps": tl.fps, "offset": tl.offset, "params": tl.params}
+    return SharedArrays(arrays, meta, directory=directory)
+
+
+def attach_timeline(handle: SharedHandle) -> FrameTimeline:
+    meta = handle.meta
+    return FrameTimeline(
+        fps=int(meta["fps"]),
+        offset=float(meta["offset"]),
+        params=meta.get("params", {}),
+        **attach(handle),
+    )
+
+
+# Benchmark: arranque de N workers con pickle vs. handle compartido
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import pickle
+    import sys
+    import time
+
+    from app.tests._fixtures import synthetic_analysis
+
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 7.0
+    res = synthetic_analysis(minutes * 60, full_spectrum=True)
+    t0 = time.perf_counter()
+    blob = pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(blob)
+    t_pickle = time.perf_counter() - t0
+    with share_analysis(res) as shared:
+        h = pickle.dumps(shared.handle)
+        t0 = time.perf_counter()
+        attached = attach_analysis(pickle.loads(h))
+        float(attached.S_mag[:, ::97].sum())  # tocar páginas
+        t_attach = time.perf_counter() - t0
+        print(f"{minutes:.0f} min de análisis: {shared.nbytes / 1e6:.0f} MB")
+        print(f"  pickle por worker: {len(blob) / 1e6:.0f} MB copiados, {t_pickle * 1e3:.0f} ms")
+        print(
+            f"  handle compartido: {len(h)} bytes, attach {t_attach * 1e3:.1f} ms, 0 MB extra por "
+            "worker"
+        )
@@ -0,0 +1,491 @@
+"""Pirámide de teselas del espectrograma en dB (uint8) para verlo a cualquier zoom.
+
+`AnalysisResult.S_mag` de una pista de 2 h son 1025 x ~310k floats (~1.3 GB):
+no se puede tener en RAM para la UI ni convertir a dB en cada repintado. Aquí
+el espectrograma se parte en teselas de `TILE_COLS` columnas x `TILE_ROWS`
+filas ya cuantizadas a uint8 (de `DB_FLOOR` a 0 dBFS, 64 KB cada una):
+
+- Frecuencia: cada fila es una barra de `bar_filterbank` (escala log o lineal,
+  como `BarsConfig.distribution`) y toma el máximo de sus bins.
+- Tiempo: el nivel 0 tiene una columna por frame de la STFT; cada nivel
+  siguiente junta pares de columnas del anterior (máximo), así que una
+  tesela del nivel k cubre `TILE_COLS * 2**k` frames.
+
+Las teselas se generan bajo demanda: las del nivel 0 por tramos de
+`BASE_CHUNK` teselas (se decodifica solo ese tramo del audio y se hace su
+STFT, o se lee de `S_mag`/`S_db16` si el resultado los trae) y las de los
+niveles superiores a partir de sus dos hijas. Cada tesela calculada se guarda
+en disco (un `.npy` por tesela, junto a la caché de análisis) y en un LRU en
+memoria: volver a abrir la pista o a una zona ya vista es solo leer archivos.
+`SpectrogramTiles.visible(t0, t1, pixels)` dice qué teselas pedir para la
+vista actual; `TileWorker` las calcula en un hilo de fondo.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Literal, Optional, Tuple
+
+import librosa
+import numpy as np
+
+from .analysis import db16_to_mag, decode_audio
+from .analysis_cache import AnalysisCache, cache_key, default_cache_dir, file_digest
+from .filterbank import bar_edges, bar_filterbank
+
+TILES_VERSION = 1
+TILE_COLS = 256
+TILE_ROWS = 256
+BASE_CHUNK = 16  # teselas del nivel 0 por decodificación + STFT (~47 s de audio a 44.1 kHz/512)
+DB_FLOOR = -100.0  # dBFS que corresponde a 0; 255 = 0 dBFS
+FMIN = 20.0
+DEFAULT_MAX_BYTES = 1024**3
+MEMORY_TILES = 512  # LRU en memoria (~32 MB con teselas de 256 x 256)
+PROGRESSIVE_LEVELS = 3  # TileWorker: niveles por debajo que se avisan antes de una tesela gruesa
+
+TileKey = Tuple[int, int]  # (nivel, índice)
+# (f0, f1) -> magnitud (F, f1 - f0) float32 de los frames [f0, f1)
+FrameSource = Callable[[int, int], np.ndarray]
+
+
+def default_tiles_dir() -> Path:
+    """Directorio de teselas: hermano de la caché de análisis (`.../ncs-visualizer/spectrogram`)."""
+    return default_cache_dir().parent / "spectrogram"
+
+
+@lru_cache(maxsize=16)
+def row_bins(sr: int, n_fft: int, rows: int, distribution: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Rango de bins [lo, hi) de cada fila: las barras de `bar_filterbank` de FMIN a Nyquist."""
+    fb = bar_filterbank(sr, n_fft, rows, distribution=distribution, fmin=FMIN, fmax=sr / 2.0)
+    lo = np.empty(rows, dtype=np.int64)
+    hi = np.empty(rows, dtype=np.int64)
+    for i in range(rows):
+        cols = fb.indices[fb.indptr[i] : fb.indptr[i + 1]]
+        lo[i], hi[i] = cols.min(), cols.max() + 1
+    return lo, hi
+
+
+def row_of(freq: float, sr: int, rows: int, distribution: str) -> float:
+    """Posición (en filas, 0 = abajo) de la frecuencia `freq` Hz; para las marcas del eje."""
+    edges = bar_edges(rows, fmin=FMIN, fmax=sr / 2.0, distribution=distribution)
+    pts = np.array([e[0] for e in edges] + [edges[-1][1]])
+    return float(np.interp(freq, pts, np.arange(rows + 1)))
+
+
+def quantize_db(P: np.ndarray, n_fft: int) -> np.ndarray:
+    """Potencia (rows, T) -> uint8 en [DB_FLOOR, 0] dBFS (seno a escala completa = 0 dB, Hann)."""
+    ref = 10.0 * math.log10((n_fft / 4.0) ** 2)  # |X| de un seno de amplitud 1: sum(hann) / 2
+    db = 10.0 * np.log10(np.maximum(P, 1e-20)) - ref
+    q = (db - DB_FLOOR) * (255.0 / -DB_FLOOR)
+    return np.rint(np.clip(q, 0.0, 255.0, out=q)).astype(np.uint8)
+
+
+def tile_db(tile: np.ndarray) -> np.ndarray:
+    """uint8 -> dBFS en float32."""
+    return tile.astype(np.float32) * (-DB_FLOOR / 255.0) + DB_FLOOR
+
+
+def audio_source(
+    path: str | Path, *, sr: int, n_fft: int, hop: int, mono: str = "mix", offset: float = 0.0
+) -> FrameSource:
+    """Frames de la STFT (center=True, Hann) recalculados decodificando solo el tramo pedido."""
+    # Primera muestra del frame 0 (con el relleno de center)
+    origin = int(round(offset * sr)) - n_fft // 2
+
+    def frames(f0: int, f1: int) -> np.ndarray:
+        start = origin + f0 * hop
+        length = (f1 - f0 - 1) * hop + n_fft
+        first = max(start, 0)
+        y, _ = decode_audio(
+            path, target_sr=sr, mono=mono, start=first / sr, duration=(start + length - first) / sr
+        )
+        seg = np.zeros(length, dtype=np.float32)
+        x = y[0][: length - (first - start)]
+        seg[first - start : first - start + len(x)] = x
+        S = librosa.stft(
+            seg, n_fft=n_fft, hop_length=hop, window="hann", center=False, dtype=np.complex64
+        )
+        return np.abs(S[:, : f1 - f0])
+
+    return frames
+
+
+def array_source(
+    S_mag: Optional[np.ndarray] = None, S_db16: Optional[np.ndarray] = None
+) -> FrameSource:
+    """Frames leídos de una matriz ya calculada (p. ej. mapeada desde la caché de análisis)."""
+    if S_mag is not None:
+        return lambda f0, f1: np.asarray(S_mag[:, f0:f1], dtype=np.float32)
+    if S_db16 is not None:
+        return lambda f0, f1: db16_to_mag(np.asarray(S_db16[:, f0:f1]))
+    raise ValueError("array_source needs S_mag or S_db16")
+
+
+def _params(
+    sr: int, n_fft: int, hop: int, n_frames: int, rows: int, cols: int, distribution: str
+) -> dict:
+    return dict(
+        version=TILES_VERSION,
+        sr=int(sr),
+        n_fft=int(n_fft),
+        hop=int(hop),
+        n_frames=int(n_frames),
+        rows=int(rows),
+        cols=int(cols),
+        distribution=distribution,
+        floor=DB_FLOOR,
+    )
+
+
+class SpectrogramTiles:
+    """Pirámide perezosa de teselas uint8 (rows, cols) de un espectrograma de `n_frames` frames.
+
+    `tile(level, ix)` la devuelve calculándola si falta (puede tardar: hilo de
+    fondo); `cached(level, ix)` solo la devuelve si ya está en memoria o en
+    disco. Las columnas más allá del final de la pista valen 0. Fila 0 = graves.
+    """
+
+    def __init__(
+        self,
+        source: FrameSource,
+        *,
+        sr: int,
+        n_fft: int,
+        hop: int,
+        n_frames: int,
+        key: Optional[str] = None,
+        rows: int = TILE_ROWS,
+        cols: int = TILE_COLS,
+        distribution: Literal["log", "linear"] = "log",
+        base_chunk: int = BASE_CHUNK,
+        root: Optional[Path | str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.source = source
+        self.sr, self.n_fft, self.hop = int(sr), int(n_fft), int(hop)
+        self.n_frames = int(n_frames)
+        self.rows, self.cols = int(rows), int(cols)
+        if self.cols % 2:
+            raise ValueError("cols must be even")
+        self.distribution = distribution
+        self.base_chunk = max(int(base_chunk), 1)
+        self.key = key
+        self.computed = 0  # teselas calculadas (no leídas de disco) por esta instancia
+        counts = [max(math.ceil(self.n_frames / self.cols), 1)]
+        while counts[-1] > 1:
+            counts.append((counts[-1] + 1) // 2)
+        self._counts = counts
+        self._lo, self._hi = row_bins(self.sr, self.n_fft, self.rows, distribution)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[TileKey, np.ndarray]" = OrderedDict()
+        self._on_disk: set = set()
+        self.dir: Optional[Path] = None
+        if key is not None:
+            self.root = Path(root) if root else default_tiles_dir()
+            self.dir = self.root / key[:2] / key
+            self.dir.mkdir(parents=True, exist_ok=True)
+            meta = self.dir / "meta.json"
+            if not meta.exists():
+                meta.write_text(
+                    json.dumps({"source": "", "params": self.params()}, indent=2), encoding="utf-8"
+                )
+            os.utime(meta)  # último uso, para la poda
+            for f in self.dir.glob("L*_*.npy"):
+                level, ix = f.stem[1:].split("_")
+                self._on_disk.add((int(level), int(ix)))
+            # Mismo formato de entradas que la caché de análisis (directorio con meta.json)
+            AnalysisCache(self.root, max_bytes).prune(keep=key)
+
+    @classmethod
+    def from_analysis(
+        cls,
+        res,
+        path: str | Path,
+        *,
+        distribution: Literal["log", "linear"] = "log",
+        mono: str = "mix",
+        root: Optional[Path | str] = None,
+        **kwargs,
+    ) -> "SpectrogramTiles":
+        """Teselas del `AnalysisResult` de `path`: de `S_mag`/`S_db16` o del audio."""
+        if res.S_mag is not None or res.S_db16 is not None:
+            source = array_source(res.S_mag, res.S_db16)
+        else:
+            source = audio_source(
+                path, sr=res.sr, n_fft=res.n_fft, hop=res.hop, mono=mono, offset=res.offset
+            )
+        params = dict(
+            _params(
+                res.sr,
+                res.n_fft,
+                res.hop,
+                len(res.times),
+                kwargs.get("rows", TILE_ROWS),
+                kwargs.get("cols", TILE_COLS),
+                distribution,
+            ),
+            mono=mono,
+            offset=float(res.offset),
+        )
+        return cls(
+            source,
+            sr=res.sr,
+            n_fft=res.n_fft,
+            hop=res.hop,
+            n_frames=len(res.times),
+            key=cache_key(file_digest(path), params),
+            distribution=distribution,
+            root=root,
+            **kwargs,
+        )
+
+    def params(self) -> dict:
+        return _params(
+            self.sr, self.n_fft, self.hop, self.n_frames, self.rows, self.cols, self.distribution
+        )
+
+    # --- Geometría ---
+    @property
+    def n_levels(self) -> int:
+        return len(self._counts)
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames * self.hop / self.sr
+
+    def tiles_in(self, level: int) -> int:
+        return self._counts[level]
+
+    def frames_per_tile(self, level: int) -> int:
+        return self.cols << level
+
+    def tile_span(self, level: int, ix: int) -> Tuple[float, float]:
+        """(t0, t1) s que cubre la tesela (cada frame: ±½ hop de su centro)."""
+        fpt = self.frames_per_tile(level)
+        t0 = (ix * fpt - 0.5) * self.hop / self.sr
+        return t0, t0 + fpt * self.hop / self.sr
+
+    def level_for(self, t0: float, t1: float, pixels: int) -> int:
+        """Nivel más fino con como mucho `pixels` columnas entre `t0` y `t1` (s)."""
+        span = max(t1 - t0, 0.0) * self.sr / self.hop
+        k = math.ceil(math.log2(span / max(pixels, 1))) if span > pixels else 0
+        return min(max(k, 0), self.n_levels - 1)
+
+    def visible(self, t0: float, t1: float, pixels: int) -> Tuple[int, List[int]]:
+        """(nivel, índices) de las teselas que cubren [t0, t1] a `pixels` de ancho."""
+        k = self.level_for(t0, t1, pixels)
+        fpt = self.frames_per_tile(k)
+        scale = self.sr / self.hop
+        i0 = max(int(math.floor((t0 * scale + 0.5) / fpt)), 0)
+        i1 = min(int(math.floor((t1 * scale + 0.5) / fpt)), self.tiles_in(k) - 1)
+        return k, list(range(i0, i1 + 1))
+
+    # --- Acceso ---
+    def _path(self, level: int, ix: int) -> Path:
+        assert self.dir is not None
+        return self.dir / f"L{level}_{ix}.npy"
+
+    def _remember(self, key: TileKey, tile: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = tile
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_TILES:
+                self._memory.popitem(last=False)
+
+    def cached(self, level: int, ix: int) -> Optional[np.ndarray]:
+        """La tesela si ya está calculada (memoria o disco), sin calcular nada."""
+        key = (level, ix)
+        with self._lock:
+            tile = self._memory.get(key)
+            if tile is not None:
+                self._memory.move_to_end(key)
+                return tile
+        if key not in self._on_disk:
+            return None
+        try:
+            tile = np.load(self._path(level, ix))
+        except (OSError, ValueError):
+            self._on_disk.discard(key)  # podada o a medias: se recalcula
+            return None
+        self._remember(key, tile)
+        return tile
+
+    def _store(self, level: int, ix: int, tile: np.ndarray) -> None:
+        tile.setflags(write=False)
+        self._remember((level, ix), tile)
+        self.computed += 1
+        if self.dir is None:
+            return
+        # Escribir en un temporal y renombrar: nunca queda una tesela a medias
+        fd, tmp = tempfile.mkstemp(prefix=".tile.", suffix=".npy", dir=self.dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, tile)
+            os.replace(tmp, self._path(level, ix))
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self._on_disk.add((level, ix))
+
+    def tile(self, level: int, ix: int) -> np.ndarray:
+        """Tesela uint8 (rows, cols) del nivel `level`; la calcula (y las que necesite) si falta."""
+        if not (0 <= level < self.n_levels and 0 <= ix < self.tiles_in(level)):
+            raise IndexError(f"tile ({level}, {ix}) out of range")
+        tile = self.cached(level, ix)
+        if tile is not None:
+            return tile
+        if level == 0:
+            self._compute_base(ix // self.base_chunk)
+            tile = self.cached(0, ix)
+            assert tile is not None
+            return tile
+        out = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        half = self.cols // 2
+        for j in (0, 1):
+            child = 2 * ix + j
+            if child < self.tiles_in(level - 1):
+                c = self.tile(level - 1, child)
+                np.maximum(c[:, 0::2], c[:, 1::2], out=out[:, j * half : (j + 1) * half])
+        self._store(level, ix, out)
+        return out
+
+    def _compute_base(self, chunk: int) -> None:
+        """Teselas del nivel 0 del tramo `chunk` (`base_chunk` teselas) en una sola STFT."""
+        first = chunk * self.base_chunk
+        last = min(first + self.base_chunk, self.tiles_in(0))
+        f0 = first * self.cols
+        f1 = min(last * self.cols, self.n_frames)
+        q = np.zeros((self.rows, (last - first) * self.cols), dtype=np.uint8)
+        if f1 > f0:
+            S = self.source(f0, f1)
+            P = np.square(S, dtype=np.float32)
+            bands = np.empty((self.rows, f1 - f0), dtype=np.float32)
+            for r in range(self.rows):
+                np.max(P[self._lo[r] : self._hi[r]], axis=0, out=bands[r])
+            q[:, : f1 - f0] = quantize_db(bands, self.n_fft)
+        for ix in range(first, last):
+            c = (ix - first) * self.cols
+            self._store(0, ix, np.ascontiguousarray(q[:, c : c + self.cols]))
+
+
+class TileWorker:
+    """Hilo que calcula las teselas pedidas y avisa con `on_ready(level, ix)`.
+
+    `request(keys)` sustituye lo pendiente por `keys` (las de la vista actual):
+    las de vistas que ya se dejaron atrás no se llegan a calcular. Una tesela
+    gruesa sin calcular puede costar segundos (todo su tramo de audio), así que
+    antes se calculan y avisan sus descendientes `progressive` niveles más
+    abajo: la vista se va llenando por partes y se abandona si deja de pedirse.
+    """
+
+    def __init__(
+        self,
+        tiles: SpectrogramTiles,
+        on_ready: Callable[[int, int], None],
+        *,
+        progressive: int = PROGRESSIVE_LEVELS,
+    ) -> None:
+        self.tiles = tiles
+        self.on_ready = on_ready
+        self.progressive = int(progressive)
+        self._pending: List[TileKey] = []
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="spectrogram-tiles", daemon=True)
+        self._thread.start()
+
+    def request(self, keys: List[TileKey]) -> None:
+        with self._cond:
+            self._pending = list(keys)
+            self._generation += 1
+            self._cond.notify()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        with self._cond:
+            self._stop = True
+            self._pending = []
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _wanted(self, key: TileKey, generation: int) -> bool:
+        with self._cond:
+            return not self._stop and (self._generation == generation or key in self._pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                key = self._pending.pop(0)
+                generation = self._generation
+            level, ix = key
+            if self.tiles.cached(level, ix) is None:
+                down = min(self.progressive, level)
+                last = min((ix + 1) << down, self.tiles.tiles_in(level - down))
+                for child in range(ix << down, last) if down else ():
+                    if not self._wanted(key, generation):
+                        break
+                    if self.tiles.cached(level - down, child) is None:
+                        self.tiles.tile(level - down, child)
+                        self.on_ready(level - down, child)
+                if not self._wanted(key, generation):
+                    continue
+                self.tiles.tile(level, ix)
+            self.on_ready(level, ix)
+
+
+# Benchmark: primera vista completa de una pista larga, y la misma vista ya cacheada
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+    import time
+
+    def _opt(flag: str, cast, default):
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    minutes = _opt("--minutes", float, 30.0)
+    sr, n_fft, hop = 44100, 2048, 512
+    n_frames = int(minutes * 60 * sr / hop)
+    rng = np.random.default_rng(0)
+
+    def synthetic(f0: int, f1: int) -> np.ndarray:
+        # Magnitud sintética del tamaño real (el coste de STFT/decodificación no entra aquí)
+        return rng.random((n_fft // 2 + 1, f1 - f0), dtype=np.float32) * (n_fft / 4.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kw = dict(sr=sr, n_fft=n_fft, hop=hop, n_frames=n_frames, key="bench" * 4, root=tmp)
+        tiles = SpectrogramTiles(synthetic, **kw)
+        t0 = time.perf_counter()
+        k, ixs = tiles.visible(0.0, tiles.duration, 1600)
+        for ix in ixs:
+            tiles.tile(k, ix)
+        cold = time.perf_counter() - t0
+        size = sum(f.stat().st_size for f in tiles.dir.iterdir())
+        print(
+            f"{minutes:.0f} min ({n_frames} frames): vista completa nivel "
+            f"{k}/{tiles.n_levels - 1}, "
+            f"{tiles.computed} teselas calculadas en {cold:.2f} s, {size / 2**20:.0f} MB en disco"
+        )
+        reopened = SpectrogramTiles(synthetic, **kw)
+        times = []
+        for span in (reopened.duration, 600.0, 60.0, 5.0):
+            for start in np.linspace(0.0, max(reopened.duration - span, 0.0), 20):
+                t1 = time.perf_counter()
+                k, ixs = reopened.visible(start, start + span, 1600)
+                for ix in ixs:
+                    reopened.cached(k, ix)
+                times.append(time.perf_counter() - t1)
+        print(
+            f"vista ya calculada (disco/memoria) a 1600 px: mediana {np.median(times) * 1e3:.2f} "
+            "ms, "
+            f"peor {max(times) * 1e3:.2f} ms"
+        )
@@ -0,0 +1,88 @@
+"""Ejecución de etapas de análisis en un pool de hilos.
+
+Las etapas pesadas (remuestreo, STFT, productos de matrices, FFTs) son kernels
+de NumPy/SciPy/soxr que liberan el GIL, así que un pool de hilos basta para
+usar varios núcleos. El join es determinista: los resultados se recogen por
+nombre o en el orden de envío, nunca por orden de finalización.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StageRunner:
+    """Pool de hilos con tiempos por etapa. Con `workers <= 1` todo corre en línea."""
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = max(1, int(workers))
+        self._pool: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage")
+            if self.workers > 1
+            else None
+        )
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self.timings: Dict[str, float] = {}
+
+    # --- Contexto ---
+    def __enter__(self) -> "StageRunner":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    # --- Etapas ---
+    def _timed(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def _launch(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        if self._pool is not None:
+            return self._pool.submit(self._timed, name, fn, *args, **kwargs)
+        fut: Future = Future()
+        try:
+            fut.set_result(self._timed(name, fn, *args, **kwargs))
+        except BaseException as e:  # se re-lanza en result()
+            fut.set_exception(e)
+        return fut
+
+    def submit(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Lanza una etapa; en modo en línea se ejecuta ya y devuelve un Future resuelto."""
+        fut = self._launch(name, fn, *args, **kwargs)
+        self._futures[name] = fut
+        return fut
+
+    def run(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta una etapa en el hilo actual (cronometrada)."""
+        return self._timed(name, fn, *args, **kwargs)
+
+    def result(self, name: str) -> Any:
+        return self._futures.pop(name).result()
+
+    def map(self, name: str, fn: Callable[[Any], T], items: Iterable[Any]) -> List[T]:
+        """Aplica `fn` a cada elemento en paralelo; resultados en el orden de entrada.
+
+        El tiempo de `name` es la suma de los elementos (tiempo de CPU, no de pared).
+        """
+        futs = [self._launch(name, fn, item) for item in items]
+        return [f.result() for f in futs]
+
+    def stage_stats(self, prefix: str = "time_") -> Dict[str, float]:
+        with self._lock:
+            return {f"{prefix}{k}": v for k, v in self.timings.items()}
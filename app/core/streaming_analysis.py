@@ -0,0 +1,327 @@
+"""Análisis por bloques con memoria acotada para pistas largas.
+
+`StreamingAnalyzer` recibe bloques de audio mono, arrastra el solape de la STFT
+entre bloques y acumula solo curvas por frame (bandas, energía global, onset).
+Nunca materializa la STFT completa: el pico de memoria depende del tamaño de
+bloque, no de la duración de la pista. La normalización por percentil 99 se
+sustituye por `StreamingQuantile` (histograma logarítmico de tamaño fijo).
+
+Tolerancia frente a `analysis.analyze_mono` (documentada y cubierta por tests):
+- Bandas y energía global: error relativo del cuantil <= ~1.5 % (ancho de bin);
+  las bandas comparten escala igual que `filterbank.normalize_shared`.
+- Onset: idéntico (misma proyección mel de la STFT que `onset_from_power`) salvo
+  el recorte `top_db=80`, que aquí usa el máximo visto hasta el momento en lugar
+  del máximo global.
+- Remuestreo: `soxr.ResampleStream` difiere del remuestreo en un solo paso solo
+  en los bordes (del orden de 1e-4 en amplitud).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import librosa
+import numpy as np
+import scipy.fft
+
+from .analysis import AnalysisResult
+from .filterbank import band_filterbank, band_names, mel_filterbank
+from .waveform import WaveformBuilder
+
+DEFAULT_BANDS = [[20, 160], [160, 2000], [2000, 16000]]
+
+
+class StreamingQuantile:
+    """Estimador de cuantil en un pase con memoria constante.
+
+    Acumula un histograma de `log10(x)` con bins fijos en [lo, hi] décadas; el
+    cuantil se interpola dentro del bin, con error relativo acotado por
+    `10 ** ((hi - lo) / bins) - 1` (~1.4 % con los valores por defecto).
+    """
+
+    def __init__(
+        self, q: float = 99.0, lo: float = -12.0, hi: float = 12.0, bins: int = 4096
+    ) -> None:
+        self.q = float(q)
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.bins = int(bins)
+        self.counts = np.zeros(self.bins + 1, dtype=np.int64)  # bin 0 = ceros/subdesbordamiento
+        self.n = 0
+
+    def update(self, values: np.ndarray) -> None:
+        v = np.asarray(values, dtype=np.float64).ravel()
+        if v.size == 0:
+            return
+        with np.errstate(divide="ignore"):
+            lv = np.log10(np.maximum(v, 0.0))
+        pos = (lv - self.lo) / (self.hi - self.lo) * self.bins
+        idx = np.where(
+            np.isfinite(pos), np.clip(np.floor(pos).astype(np.int64) + 1, 0, self.bins), 0
+        )
+        self.counts += np.bincount(idx, minlength=self.bins + 1)
+        self.n += v.size
+
+    def value(self) -> float:
+        if self.n == 0:
+            return 0.0
+        # Misma convención que np.percentile (interpolación lineal en el rango [0, n-1])
+        rank = self.q / 100.0 * (self.n - 1)
+        cum = np.cumsum(self.counts)
+        k = int(np.floor(rank))
+        lo_v = self._order_stat(cum, k)
+        hi_v = self._order_stat(cum, min(k + 1, self.n - 1))
+        return lo_v + (rank - k) * (hi_v - lo_v)
+
+    def _order_stat(self, cum: np.ndarray, k: int) -> float:
+        """Valor aproximado del k-ésimo elemento ordenado (0-based)."""
+        b = int(np.searchsorted(cum, k, side="right"))
+        if b == 0:
+            return 0.0
+        b = min(b, self.bins)
+        frac = (k - cum[b - 1] + 0.5) / max(self.counts[b], 1)
+        frac = min(max(frac, 0.0), 1.0)
+        width = (self.hi - self.lo) / self.bins
+        return float(10.0 ** (self.lo + (b - 1 + frac) * width))
+
+
+class StreamingAnalyzer:
+    """STFT incremental + curvas de energía y onset con solape entre bloques."""
+
+    def __init__(
+        self,
+        sr: int,
+        *,
+        n_fft: int = 2048,
+        hop: int = 512,
+        bands: Optional[List[List[int]]] = None,
+        compute_beats: bool = True,
+        quantile: float = 99.0,
+        n_mels: int = 128,
+        top_db: float = 80.0,
+    ) -> None:
+        self.sr = int(sr)
+        self.n_fft = int(n_fft)
+        self.hop = int(hop)
+        self.bands = bands if bands is not None else DEFAULT_BANDS
+        self.compute_beats = compute_beats
+        self.top_db = float(top_db)
+        self.freqs = librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft).astype(np.float32)
+        self.window = librosa.filters.get_window("hann", self.n_fft, fftbins=True).astype(
+            np.float32
+        )
+        # Banco de bandas (nb, F) y banco mel (n_mels, F) para proyectar la potencia por frame
+        self.band_fb = band_filterbank(self.sr, self.n_fft, self.bands)
+        self.mel_fb = mel_filterbank(self.sr, self.n_fft, n_mels)
+        self.q_bands = StreamingQuantile(quantile)  # sobre el máximo por frame (escala común)
+        self.q_global = StreamingQuantile(quantile)
+        # Estado de la STFT: padding centrado (ceros) como librosa.stft(center=True)
+        self._buf = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._n_samples = 0
+        self._n_frames = 0
+        self._prev_mel_db: Optional[np.ndarray] = None
+        self._max_db = -np.inf
+        self._band_chunks: List[np.ndarray] = []
+        self._global_chunks: List[np.ndarray] = []
+        self._onset_chunks: List[np.ndarray] = []
+        self._waveform = WaveformBuilder(self.sr)
+        self._finished = False
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    def feed(self, block: np.ndarray) -> None:
+        """Añade un bloque mono (float32) y procesa todos los frames completos."""
+        if self._finished:
+            raise RuntimeError("StreamingAnalyzer already finished")
+        x = np.asarray(block, dtype=np.float32).ravel()
+        self._n_samples += x.size
+        self._waveform.feed(x)
+        self._buf = np.concatenate([self._buf, x])
+        self._process(limit=None)
+
+    def _process(self, limit: Optional[int]) -> None:
+        avail = (self._buf.size - self.n_fft) // self.hop + 1 if self._buf.size >= self.n_fft else 0
+        if limit is not None:
+            avail = min(avail, limit - self._n_frames)
+        if avail <= 0:
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(self._buf, self.n_fft)[:: self.hop][
+            :avail
+        ]
+        spec = scipy.fft.rfft(frames * self.window, axis=1)
+        P = np.square(spec.real) + np.square(spec.imag)  # (k, F) float32
+        del spec
+        e_bands = np.asarray((self.band_fb @ P.T).T, dtype=np.float32)  # (k, nb)
+        e_global = P.sum(axis=1)
+        mel = P @ self.mel_fb.T  # (k, n_mels)
+        mel_db = 10.0 * np.log10(np.maximum(mel, 1e-10))
+        self._max_db = max(self._max_db, float(mel_db.max()))
+        np.maximum(mel_db, self._max_db - self.top_db, out=mel_db)
+        prev = mel_db[:1] if self._prev_mel_db is None else self._prev_mel_db[None, :]
+        diffs = np.maximum(0.0, np.diff(np.concatenate([prev, mel_db]), axis=0)).mean(axis=1)
+        if self._prev_mel_db is None:
+            diffs = diffs[1:]  # el primer frame no tiene predecesor
+        self._prev_mel_db = mel_db[-1].copy()
+        if e_bands.shape[1]:
+            self.q_bands.update(e_bands.max(axis=1))
+        self.q_global.update(e_global)
+        self._band_chunks.append(e_bands.astype(np.float32))
+        self._global_chunks.append(e_global.astype(np.float32))
+        self._onset_chunks.append(diffs.astype(np.float32))
+        self._n_frames += avail
+        # Conservar solo el solape necesario para el siguiente frame
+        self._buf = self._buf[avail * self.hop :].copy()
+
+    def finish(self) -> AnalysisResult:
+        if self._finished:
+            raise RuntimeError("StreamingAnalyzer already finished")
+        total = 1 + self._n_samples // self.hop
+        self._buf = np.concatenate([self._buf, np.zeros(self.n_fft // 2, dtype=np.float32)])
+        self._process(limit=total)
+        self._finished = True
+
+        T = self._n_frames
+        nb = len(self.bands)
+        raw_bands = (
+            np.concatenate(self._band_chunks)
+            if self._band_chunks
+            else np.zeros((0, nb), np.float32)
+        )
+        raw_global = (
+            np.concatenate(self._global_chunks) if self._global_chunks else np.zeros(0, np.float32)
+        )
+        self._band_chunks.clear()
+        self._global_chunks.clear()
+        scale = self.q_bands.value() + 1e-9
+        energy_bands = {
+            name: (raw_bands[:, j] / scale).astype(np.float32)
+            for j, name in enumerate(band_names(nb))
+        }
+        global_scale = self.q_global.value() + 1e-9
+        energy_global = (raw_global / global_scale).astype(np.float32)
+
+        # Mismo desplazamiento que librosa.onset.onset_strength(center=True, lag=1)
+        diffs = (
+            np.concatenate(self._onset_chunks) if self._onset_chunks else np.zeros(0, np.float32)
+        )
+        pad = 1 + self.n_fft // (2 * self.hop)
+        onset_env = np.concatenate([np.zeros(pad, dtype=np.float32), diffs])[:T]
+        if onset_env.size < T:
+            onset_env = np.pad(onset_env, (0, T - onset_env.size))
+
+        sr, hop = self.sr, self.hop
+        onset_frames = librosa.onset.onset_detect(
+            onset_envelope=onset_env, sr=sr, hop_length=hop, units="frames"
+        )
+        onset_times = librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop)
+        tempo_bpm = 0.0
+        beat_frames = np.array([], dtype=int)
+        beat_times = np.array([], dtype=float)
+        if self.compute_beats and T > 0:
+            bpm = chunked_tempo(onset_env, sr, hop)
+            tempo_bpm, beat_frames = librosa.beat.beat_track(
+                onset_envelope=onset_env, sr=sr, hop_length=hop, bpm=bpm, units="frames"
+            )
+            beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop)
+        res = AnalysisResult(
+            sr=sr,
+            hop=hop,
+            n_fft=self.n_fft,
+            times=librosa.frames_to_time(np.arange(T), sr=sr, hop_length=hop),
+            S_mag=None,
+            freqs=self.freqs,
+            energy_global=energy_global,
+            energy_bands=energy_bands,
+            onset_envelope=onset_env.astype(np.float32),
+            onset_frames=np.asarray(onset_frames).astype(int),
+            onset_times=np.asarray(onset_times).astype(np.float32),
+            tempo_bpm=float(np.atleast_1d(tempo_bpm)[0]),
+            beat_frames=np.asarray(beat_frames).astype(int),
+            beat_times=np.asarray(beat_times).astype(np.float32),
+            norm_scales={"bands": float(scale), "global": float(global_scale)},
+        )
+        res.set_waveform(self._waveform.finish())
+        return res
+
+
+def chunked_tempo(
+    onset_env: np.ndarray, sr: int, hop: int, *, ac_size: float = 8.0, chunk: int = 1024
+) -> float:
+    """Equivalente a `librosa.feature.tempo` promediando el tempograma por trozos.
+
+    `librosa.feature.tempo` materializa un tempograma (win, T) en float64, que en
+    una pista de 2 h ocupa decenas de GB; aquí solo se acumula su media.
+    """
+    n = onset_env.size
+    win = int(librosa.time_to_frames(ac_size, sr=sr, hop_length=hop))
+    padded = np.pad(onset_env, (win // 2, win // 2), mode="linear_ramp", end_values=[0, 0])
+    ac_window = librosa.filters.get_window("hann", win, fftbins=True)[:, None]
+    acc = np.zeros(win, dtype=np.float64)
+    for c0 in range(0, n, chunk):
+        c1 = min(n, c0 + chunk)
+        frames = np.lib.stride_tricks.sliding_window_view(padded[c0 : c1 + win - 1], win).T
+        ac = librosa.autocorrelate(frames * ac_window, axis=0)
+        acc += librosa.util.normalize(ac, norm=np.inf, axis=0).sum(axis=1)
+    tg = (acc / max(n, 1))[:, None]
+    return float(librosa.feature.tempo(tg=tg, sr=sr, hop_length=hop, ac_size=ac_size)[0])
+
+
+def iter_audio_blocks(
+    path: str | Path, *, target_sr: int = 44100, block_seconds: float = 2.0
+) -> Iterator[np.ndarray]:
+    """Lee el archivo por bloques (soundfile), mezcla a mono y remuestrea en streaming."""
+    import soundfile as sf
+    import soxr
+
+    with sf.SoundFile(str(path)) as f:
+        sr = int(f.samplerate)
+        block = max(1, int(block_seconds * sr))
+        rs = (
+            None
+            if sr == target_sr
+            else soxr.ResampleStream(sr, target_sr, 1, dtype="float32", quality="HQ")
+        )
+        while True:
+            data = f.read(block, dtype="float32", always_2d=True)
+            last = data.shape[0] < block
+            mono = data.mean(axis=1, dtype=np.float32)
+            if rs is not None:
+                mono = rs.resample_chunk(mono, last=last)
+            if mono.size:
+                yield mono
+            if last:
+                break
+
+
+def analyze_stream(
+    blocks: Iterable[np.ndarray],
+    sr: int,
+    *,
+    n_fft: int = 2048,
+    hop: int = 512,
+    bands: Optional[List[List[int]]] = None,
+    compute_beats: bool = True,
+) -> AnalysisResult:
+    analyzer = StreamingAnalyzer(sr, n_fft=n_fft, hop=hop, bands=bands, compute_beats=compute_beats)
+    for block in blocks:
+        analyzer.feed(block)
+    return analyzer.finish()
+
+
+def analyze_file_streaming(
+    path: str | Path,
+    *,
+    target_sr: int = 44100,
+    n_fft: int = 2048,
+    hop: int = 512,
+    bands: Optional[List[List[int]]] = None,
+    compute_beats: bool = True,
+    block_seconds: float = 2.0,
+) -> AnalysisResult:
+    blocks = iter_audio_blocks(path, target_sr=target_sr, block_seconds=block_seconds)
+    return analyze_stream(
+        blocks, target_sr, n_fft=n_fft, hop=hop, bands=bands, compute_beats=compute_beats
+    )
@@ -0,0 +1,301 @@
+"""Línea de tiempo compilada: parámetros visuales por frame de vídeo.
+
+El análisis va a sr/hop (~86 fps) y el vídeo a `OutputConfig.fps` (24–60). Este
+módulo convierte una sola vez, de forma vectorizada, las curvas del
+`AnalysisResult` en arrays contiguos por frame de vídeo (alturas de barras,
+radio del anillo, intensidad del fondo, pulso de beat, rotación...), ya con
+attack/release, umbral y sensibilidad aplicados. El bucle de render solo indexa
+`timeline.bars[i]`, `timeline.ring_radius[i]`, etc.
+
+Las curvas se suavizan a la tasa del análisis y cada frame de vídeo toma el
+máximo de los frames de análisis que cubre (no se pierden picos al bajar de
+86 a 24 fps). Se guarda como un `.npy` por array + `meta.json` y se carga con
+mmap, igual que la caché de análisis.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .analysis import AnalysisResult, bar_spectrum
+from .mapping import EnvelopeFollower
+from .preset_manager import (
+    BackgroundReactivity,
+    BarsConfig,
+    CenterImageReactivity,
+    Preset,
+    RingConfig,
+    VisualMapping,
+)
+
+TIMELINE_VERSION = 1
+
+# Reacción del radio del anillo a la energía global (fracción de base_radius)
+RING_REACT = 0.2
+
+_ARRAY_FIELDS = (
+    "bars",
+    "ring_radius",
+    "background",
+    "beat_pulse",
+    "scale",
+    "rotation",
+    "shake",
+    "bloom",
+)
+
+
+@dataclass
+class FrameTimeline:
+    """Arrays por frame de vídeo (N = n_frames).
+
+    Radios y alturas en unidades de la mitad del lado corto del lienzo.
+    """
+
+    fps: int
+    offset: float  # s: tiempo de la pista en el frame 0
+    bars: np.ndarray  # (N, count) altura de cada barra
+    ring_radius: np.ndarray  # (N,) radio del anillo
+    background: np.ndarray  # (N,) intensidad reactiva del fondo 0..intensity
+    beat_pulse: np.ndarray  # (N,) 1 en cada beat, decae con release_ms
+    scale: np.ndarray  # (N,) escala de la imagen central (1 + scale_on_beat * pulso)
+    rotation: np.ndarray  # (N,) grados de la imagen central
+    shake: np.ndarray  # (N, 2) desplazamiento x, y de la imagen central
+    bloom: np.ndarray  # (N,) intensidad del bloom de la imagen central
+    params: Dict[str, Any] = field(default_factory=dict, compare=False)
+
+    @property
+    def n_frames(self) -> int:
+        return int(self.ring_radius.shape[0])
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / self.fps
+
+    def frame(self, i: int) -> Dict[str, Any]:
+        """Parámetros del frame `i` (vistas, sin copias)."""
+        return {name: getattr(self, name)[i] for name in _ARRAY_FIELDS}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _ARRAY_FIELDS)
+
+    # --- Persistencia ---
+    def save(self, directory: str | Path) -> Path:
+        """Escribe un `.npy` por array + meta.json (renombrado atómico del directorio)."""
+        d = Path(directory)
+        d.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{d.name}.", dir=d.parent))
+        try:
+            for name in _ARRAY_FIELDS:
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+            meta = {
+                "version": TIMELINE_VERSION,
+                "fps": self.fps,
+                "offset": self.offset,
+                "params": self.params,
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            if d.exists():
+                shutil.rmtree(d, ignore_errors=True)
+            os.replace(tmp, d)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return d
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> Optional["FrameTimeline"]:
+        d = Path(directory)
+        try:
+            meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+            if meta.get("version") != TIMELINE_VERSION:
+                return None
+            mode = "r" if mmap else None
+            arrays = {name: np.load(d / f"{name}.npy", mmap_mode=mode) for name in _ARRAY_FIELDS}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(
+            fps=int(meta["fps"]),
+            offset=float(meta["offset"]),
+            params=meta.get("params", {}),
+            **arrays,
+        )
+
+
+def apply_mapping(levels: np.ndarray, mapping: VisualMapping) -> np.ndarray:
+    """Umbral y sensibilidad: (v - threshold) / (1 - threshold) a 0..1, por `sensitivity`."""
+    thr = float(mapping.threshold)
+    gated = np.clip((levels - thr) / max(1.0 - thr, 1e-6), 0.0, 1.0)
+    return (gated * float(mapping.sensitivity)).astype(np.float32)
+
+
+def video_frame_bins(n_analysis: int, sr: int, hop: int, fps: int, n_frames: int) -> np.ndarray:
+    """Primer frame de análisis de cada frame de vídeo (para `np.maximum.reduceat`)."""
+    edges = np.arange(n_frames) * (sr / (hop * fps))
+    return np.minimum(np.round(edges).astype(np.int64), max(n_analysis - 1, 0))
+
+
+def _peak_resample(curves: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Máximo de cada tramo [starts[i], starts[i+1]) a lo largo del último eje."""
+    if curves.shape[-1] == 0:
+        return np.zeros(curves.shape[:-1] + (starts.size,), dtype=np.float32)
+    return np.maximum.reduceat(curves, starts, axis=-1)
+
+
+def beat_pulse(
+    beat_times: np.ndarray, t: np.ndarray, release_ms: float, frame_dur: float = 0.0
+) -> np.ndarray:
+    """1 en cada beat con decaimiento exponencial (constante `release_ms`) hasta el siguiente.
+
+    Un beat dentro de [t, t + frame_dur) cuenta para ese frame con pulso completo.
+    """
+    if len(beat_times) == 0:
+        return np.zeros(t.shape, dtype=np.float32)
+    bt = np.asarray(beat_times, dtype=np.float64)
+    idx = np.searchsorted(bt, t + frame_dur, side="left") - 1
+    dt = np.maximum(t - bt[np.maximum(idx, 0)], 0.0)
+    tau = max(float(release_ms), 1.0) / 1000.0
+    return np.where(idx >= 0, np.exp(-dt / tau), 0.0).astype(np.float32)
+
+
+def _band_curve(res: AnalysisResult, target: str) -> np.ndarray:
+    if target == "global":
+        return np.asarray(res.energy_global)
+    return np.asarray(res.energy_bands[target])
+
+
+def compile_timeline(
+    res: AnalysisResult,
+    fps: int,
+    *,
+    mapping: Optional[VisualMapping] = None,
+    background: Optional[BackgroundReactivity] = None,
+    center: Optional[CenterImageReactivity] = None,
+    ring: Optional[RingConfig] = None,
+    bars: Optional[BarsConfig] = None,
+    seed: int = 0,
+) -> FrameTimeline:
+    """Compila el `AnalysisResult` a arrays por frame de vídeo a `fps` en una pasada vectorizada.
+
+    Las barras salen de `res.bar_spectrum` si su número coincide con `bars.count`;
+    si no, se calculan del espectrograma. `seed` fija el ruido del temblor.
+    """
+    mapping = mapping or VisualMapping()
+    background = background or BackgroundReactivity()
+    center = center or CenterImageReactivity()
+    ring = ring or RingConfig()
+    bars = bars or BarsConfig()
+    sr, hop = int(res.sr), int(res.hop)
+    fps_a = sr / hop
+    n_analysis = len(res.times)
+    n_frames = int(np.floor(n_analysis / fps_a * fps))
+    starts = video_frame_bins(n_analysis, sr, hop, fps, n_frames)
+    t = np.arange(n_frames) / fps  # relativo a times[0] (res.offset en la pista)
+
+    spectrum = res.bar_spectrum
+    if spectrum is None or spectrum.shape[0] != bars.count:
+        spectrum = bar_spectrum(
+            res.spectrogram(), res.freqs, bars.count, distribution=bars.distribution
+        )
+
+    # Con un número de bandas distinto de 3 se llaman band0..bandN-1: el fondo sigue a global
+    target = background.target if background.target in res.energy_bands else "global"
+    # Curvas a tasa de análisis: una fila por barra + bandas/global, suavizadas de una vez
+    targets = ["global"] + ([target] if target != "global" else [])
+    curves = np.vstack(
+        [np.asarray(spectrum, dtype=np.float32)] + [_band_curve(res, k)[None, :] for k in targets]
+    )
+    smooth = EnvelopeFollower.from_mapping(mapping, fps_a).process(curves)
+    levels = apply_mapping(_peak_resample(smooth, starts), mapping)  # (count + k, N)
+    lv = dict(zip(targets, levels[bars.count :]))
+
+    pulse = beat_pulse(res.beat_times, t, mapping.release_ms, frame_dur=1.0 / fps)
+    rng = np.random.default_rng(seed)
+    shake = (rng.uniform(-1.0, 1.0, size=(n_frames, 2)) * (center.shake * pulse)[:, None]).astype(
+        np.float32
+    )
+
+    params = compile_params(
+        res,
+        fps,
+        mapping=mapping,
+        background=background,
+        center=center,
+        ring=ring,
+        bars=bars,
+        seed=seed,
+    )
+    return FrameTimeline(
+        fps=int(fps),
+        offset=float(getattr(res, "offset", 0.0)),
+        bars=np.ascontiguousarray((levels[: bars.count].T * bars.scale).astype(np.float32)),
+        ring_radius=(ring.base_radius * (1.0 + RING_REACT * lv["global"])).astype(np.float32),
+        background=(lv[target] * background.intensity).astype(np.float32),
+        beat_pulse=pulse,
+        scale=(1.0 + center.scale_on_beat * pulse).astype(np.float32),
+        rotation=((center.rotate_per_sec * t) % 360.0).astype(np.float32),
+        shake=shake,
+        bloom=(center.bloom * pulse).astype(np.float32),
+        params=params,
+    )
+
+
+def timeline_from_preset(res: AnalysisResult, preset: Preset, *, seed: int = 0) -> FrameTimeline:
+    """Atajo: toma fps y configuraciones del preset."""
+    return compile_timeline(
+        res,
+        preset.output.fps,
+        mapping=preset.visual.mapping,
+        background=preset.background.reactivity,
+        center=preset.center_image.reactivity,
+        ring=preset.visual.ring,
+        bars=preset.visual.bars,
+        seed=seed,
+    )
+
+
+def analysis_fingerprint(res: AnalysisResult) -> str:
+    """Huella barata del análisis (energía global y beats) para invalidar timelines guardadas."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"{res.sr}:{res.hop}:{len(res.times)}:{getattr(res, 'offset', 0.0)}".encode())
+    h.update(np.ascontiguousarray(res.energy_global, dtype=np.float32).tobytes())
+    h.update(np.ascontiguousarray(res.beat_times, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def compile_params(res: AnalysisResult, fps: int, **kwargs: Any) -> Dict[str, Any]:
+    """Parámetros con los que `compile_timeline` etiqueta la timeline (para validar la caché)."""
+    defaults = {
+        "mapping": VisualMapping,
+        "background": BackgroundReactivity,
+        "center": CenterImageReactivity,
+        "ring": RingConfig,
+        "bars": BarsConfig,
+    }
+    out: Dict[str, Any] = {"fps": int(fps), "analysis": analysis_fingerprint(res)}
+    for name, default in defaults.items():
+        out[name] = (kwargs.get(name) or default()).model_dump()
+    out["seed"] = int(kwargs.get("seed", 0))
+    return out
+
+
+def load_or_compile(
+    res: AnalysisResult, directory: str | Path, fps: int, **kwargs: Any
+) -> FrameTimeline:
+    """Carga (mmap) la timeline de `directory` si se compiló con los mismos datos y parámetros; si
+    no, la compila y guarda."""
+    cached = FrameTimeline.load(directory)
+    if cached is not None and cached.params == compile_params(res, fps, **kwargs):
+        return cached
+    compile_timeline(res, fps, **kwargs).save(directory)
+    return FrameTimeline.load(directory)
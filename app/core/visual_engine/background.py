@@ -1,17 +1,97 @@
 from __future__ import annotations
 
+import math
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from .raster import as_u32, pack_lut, pack_rgba
+
 
 class BackgroundSolid:
     def __init__(self, color: tuple[int, int, int] = (0, 0, 0)) -> None:
         self.color = color
 
-    def render(self) -> None:  # pragma: no cover - placeholder
-        pass
+    def prepare(self, width: int, height: int) -> None:
+        self._packed = pack_rgba((*self.color[:3], 255))
+
+    def is_static(self, timeline: Any = None) -> bool:
+        return True
+
+    def render(self, frame: np.ndarray, state: Optional[Mapping[str, Any]] = None) -> None:
+        as_u32(frame).fill(self._packed)
 
 
 class BackgroundGradient:
-    def __init__(self, colors: list[tuple[int, int, int]] | None = None) -> None:
+    """Degradado lineal entre `colors` a `angle` grados.
+
+    `speed` (ciclos/s) desplaza el degradado en el tiempo (ida y vuelta) y
+    `reactive` multiplica el brillo por (1 + state['background']). Por frame
+    solo se recalcula la LUT de 2×LUT_SIZE colores; el lienzo es un `np.take`
+    de esa LUT con un mapa de índices precalculado por resolución.
+    """
+
+    LUT_SIZE = 1024
+
+    def __init__(
+        self,
+        colors: list[tuple[int, int, int]] | None = None,
+        *,
+        angle: float = 45.0,
+        speed: float = 0.0,
+        reactive: bool = False,
+    ) -> None:
         self.colors = colors or [(0, 0, 0), (255, 255, 255)]
+        self.angle = angle
+        self.speed = speed
+        self.reactive = reactive
+
+    def prepare(self, width: int, height: int) -> None:
+        n = self.LUT_SIZE
+        stops = np.asarray([c[:3] for c in self.colors], dtype=np.float32)
+        if len(stops) == 1:
+            stops = np.vstack([stops, stops])
+        pos = np.linspace(0.0, 1.0, len(stops))
+        x = np.linspace(0.0, 1.0, n)
+        ramp = np.stack([np.interp(x, pos, stops[:, k]) for k in range(3)], axis=1)
+        # Ida y vuelta: al desplazar la LUT el degradado no salta
+        self._lut_rgb = np.vstack([ramp, ramp[::-1]]).astype(np.float32)  # (2n, 3)
+        self._lut_rgba = np.full((2 * n, 4), 255, dtype=np.uint8)
+        self._lut_f = np.empty_like(self._lut_rgb)
+        self._lut = np.empty(2 * n, dtype=np.uint32)
+        self._idx = np.empty(2 * n, dtype=np.int64)
+        self._ramp = np.arange(2 * n, dtype=np.int64)
+        # Proyección de cada píxel sobre la dirección del degradado, cuantizada a [0, n)
+        a = math.radians(self.angle)
+        ys = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+        xs = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+        proj = xs * math.cos(a) + ys * math.sin(a)
+        lo, hi = float(proj.min()), float(proj.max())
+        self._proj = ((proj - lo) / max(hi - lo, 1e-6) * (n - 1)).astype(np.intp)
+        self._static_lut: Optional[np.ndarray] = None
+        if not self.speed and not self.reactive:
+            self._static_lut = pack_lut(
+                np.concatenate([self._lut_rgb.astype(np.uint8), self._lut_rgba[:, 3:]], 1)
+            )
+
+    def is_static(self, timeline: Any = None) -> bool:
+        """Sin animación ni reactividad el degradado es el mismo en todos los frames."""
+        return self._static_lut is not None
+
+    def _frame_lut(self, state: Optional[Mapping[str, Any]]) -> np.ndarray:
+        if self._static_lut is not None:
+            return self._static_lut
+        t = float(state.get("t", 0.0)) if state else 0.0
+        n2 = 2 * self.LUT_SIZE
+        np.add(self._ramp, int(self.speed * t * n2) % n2, out=self._idx)
+        np.remainder(self._idx, n2, out=self._idx)
+        np.take(self._lut_rgb, self._idx, axis=0, out=self._lut_f, mode="clip")
+        if self.reactive and state is not None:
+            self._lut_f *= 1.0 + float(state.get("background", 0.0))
+        np.clip(self._lut_f, 0, 255, out=self._lut_f)
+        self._lut_rgba[:, :3] = self._lut_f
+        np.copyto(self._lut, self._lut_rgba.view(np.uint32).reshape(-1))
+        return self._lut
 
-    def render(self) -> None:  # pragma: no cover - placeholder
-        pass
+    def render(self, frame: np.ndarray, state: Optional[Mapping[str, Any]] = None) -> None:
+        np.take(self._frame_lut(state), self._proj, out=as_u32(frame), mode="clip")
@@ -1,12 +1,330 @@
 from __future__ import annotations
 
+import math
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .raster import centered_box, unit_px
+
+try:  # sin numba se usa el camino NumPy con buffers reservados
+    from numba import njit
+except Exception:  # pragma: no cover - fallback sin numba
+    njit = None
+
+MIN_LEVEL = 8  # px: lado mayor del nivel más pequeño de la pirámide
+
+# (ruta, mtime, tamaño del archivo, lado máximo) -> niveles premultiplicados
+_MIPS: "OrderedDict[Tuple[str, int, int, int], List[np.ndarray]]" = OrderedDict()
+_MIPS_MAX = 8
+
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return str(Path(path).resolve()), st.st_mtime_ns, st.st_size
+
+
+def image_mips(path: str, max_side: int) -> List[np.ndarray]:
+    """Pirámide RGBA premultiplicada (uint8) de la imagen; el nivel 0 con lado mayor <= `max_side`.
+
+    La imagen se decodifica una vez (Pillow, con `draft` para que JPEG ya llegue
+    reducido), se premultiplica (modo 'RGBa') y se reduce al tamaño máximo que
+    ocupará en pantalla; cada nivel siguiente es la mitad del anterior. Se
+    cachea por archivo y tamaño: otro renderer (o una copia a baja resolución
+    para el glow) reutiliza los niveles, o los deriva de un nivel 0 mayor sin
+    volver a decodificar.
+    """
+    from PIL import Image
+
+    fkey = _file_key(path)
+    key = (*fkey, int(max_side))
+    hit = _MIPS.get(key)
+    if hit is not None:
+        _MIPS.move_to_end(key)
+        return hit
+    bigger = [k for k in _MIPS if k[:3] == fkey and k[3] > max_side]
+    if bigger:
+        base = _MIPS[min(bigger, key=lambda k: k[3])][0]
+        im = Image.fromarray(base, mode="RGBa")
+    else:
+        with Image.open(path) as src:
+            src.draft("RGBA", (max_side, max_side))
+            im = src.convert("RGBA").convert("RGBa")
+    w, h = im.size
+    if max(w, h) > max_side:
+        f = max_side / max(w, h)
+        im = im.resize((max(1, round(w * f)), max(1, round(h * f))), Image.Resampling.BOX)
+    levels = [np.asarray(im, dtype=np.uint8).copy()]
+    while max(im.size) > MIN_LEVEL and min(im.size) >= 2:
+        im = im.reduce(2)
+        levels.append(np.asarray(im, dtype=np.uint8).copy())
+    _MIPS[key] = levels
+    while len(_MIPS) > _MIPS_MAX:
+        _MIPS.popitem(last=False)
+    return levels
+
+
+if njit is not None:
+
+    @njit(cache=True, nogil=True)
+    def _sample_over(dst, x0, y0, cx, cy, src, c, s, su, sv):  # pragma: no cover - compilado
+        # dst: (h, w, 4) caja del frame; src: (sh, sw, 4) RGBA premultiplicado.
+        # Vecino más cercano + "over".
+        sh, sw = src.shape[0], src.shape[1]
+        for y in range(dst.shape[0]):
+            dy = y0 + y + 0.5 - cy
+            for x in range(dst.shape[1]):
+                dx = x0 + x + 0.5 - cx
+                iu = int(np.floor(c * dx + s * dy + su))
+                iv = int(np.floor(c * dy - s * dx + sv))
+                if iu < 0 or iv < 0 or iu >= sw or iv >= sh:
+                    continue
+                a = np.int32(src[iv, iu, 3])
+                if a == 255:
+                    for k in range(3):
+                        dst[y, x, k] = src[iv, iu, k]
+                elif a > 0:
+                    for k in range(3):
+                        v = (
+                            np.int32(src[iv, iu, k]) * 255
+                            + np.int32(dst[y, x, k]) * (255 - a)
+                            + 127
+                        )
+                        dst[y, x, k] = np.uint8(min(v // 255, 255))
+
+else:  # pragma: no cover
+    _sample_over = None
+
 
 class CenterImage:
-    def __init__(self, path: str | None = None) -> None:
+    """Imagen central (logo) con escala, rotación y temblor por frame.
+
+    En `prepare` la imagen se decodifica una vez, premultiplicada y reducida al
+    tamaño máximo que puede ocupar en pantalla a esa resolución, con una
+    pirámide de niveles a mitad de tamaño (`image_mips`). Por frame se elige el
+    nivel más cercano a la escala en pantalla, se recorre la caja de destino
+    aplicando la transformación inversa, se muestrea (vecino más cercano) y se
+    compone "over" en una sola pasada (kernel numba; sin numba, camino NumPy
+    con todos los buffers reservados en `prepare`). Un logo de 6000×6000 cuesta
+    por frame lo mismo que uno del tamaño que ocupa en pantalla.
+    """
+
+    def __init__(
+        self, path: str | None = None, *, radius: float = 0.3, max_scale: float = 1.5
+    ) -> None:
         self.path = path
+        self.radius = radius  # radio del círculo que ocupa a escala 1 (unidades del preset)
+        self.max_scale = max_scale  # escala máxima esperada (1 + scale_on_beat + temblor)
+        self._size: Optional[Tuple[int, int]] = None
+        self._levels: Optional[List[np.ndarray]] = None
+        self.use_numba = _sample_over is not None
 
     def set_image(self, path: str) -> None:
         self.path = path
+        self._size = None
+        self._levels = None
+
+    def image_size(self) -> Optional[Tuple[int, int]]:
+        """(ancho, alto) de la imagen leyendo solo la cabecera; None si no hay o falla."""
+        if self._size is None and self.path and Path(self.path).is_file():
+            from PIL import Image
+
+            try:
+                with Image.open(self.path) as im:
+                    self._size = im.size
+            except OSError:
+                return None
+        return self._size
+
+    @property
+    def available(self) -> bool:
+        return self.image_size() is not None
+
+    def prepare(self, width: int, height: int) -> None:
+        self.box = centered_box(width, height, 0)
+        self._levels = None
+        size = self.image_size()
+        if size is None:
+            return
+        u = unit_px(width, height)
+        # Lado mayor en pantalla a la escala máxima: no hace falta más resolución que esa
+        max_side = max(1, math.ceil(2.0 * self.radius * u * self.max_scale))
+        levels = image_mips(str(self.path), min(max_side, max(size)))
+        self._levels = levels
+        sh, sw = levels[0].shape[:2]
+        # Escala 1: el lado mayor de la imagen ocupa el diámetro 2*radius (en píxeles del nivel 0)
+        self._fit = (2.0 * self.radius * u) / max(sh, sw)
+        half_diag = 0.5 * math.hypot(sh, sw) * self._fit * self.max_scale
+        self.box = centered_box(width, height, half_diag)
+        h, w = self.box.shape
+        self._dx = (np.arange(self.box.x0, self.box.x1, dtype=np.float32) + 0.5 - width / 2.0)[
+            None, :
+        ]
+        self._dy = (np.arange(self.box.y0, self.box.y1, dtype=np.float32) + 0.5 - height / 2.0)[
+            :, None
+        ]
+        self._unit = u
+        self._center = (width / 2.0, height / 2.0)
+        if self.use_numba:
+            return
+        # Por nivel, píxel transparente extra al final: destino de las muestras fuera de la imagen
+        self._flat = [
+            np.concatenate([lv.reshape(-1, 4), np.zeros((1, 4), np.uint8)])
+            .view(np.uint32)
+            .reshape(-1)
+            for lv in levels
+        ]
+        self._u = np.empty((h, w), dtype=np.float32)
+        self._v = np.empty((h, w), dtype=np.float32)
+        self._tmp = np.empty((h, w), dtype=np.float32)
+        self._iu = np.empty((h, w), dtype=np.intp)
+        self._iv = np.empty((h, w), dtype=np.intp)
+        self._out = np.empty((h, w), dtype=bool)
+        self._oob = np.empty((h, w), dtype=bool)
+        self._sample = np.empty((h, w), dtype=np.uint32)
+        self._alpha = np.empty((h, w, 1), dtype=np.float32)
+        self._rgb_src = np.empty((h, w, 3), dtype=np.float32)
+        self._rgb_dst = np.empty((h, w, 3), dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria de la pirámide preparada (todos los niveles)."""
+        return sum(lv.nbytes for lv in self._levels) if self._levels else 0
+
+    def level_for(self, scale: float) -> int:
+        """Nivel de resolución más cercana por encima a la de pantalla (reducción en (1/2, 1])."""
+        if not self._levels:
+            return 0
+        shrink = 1.0 / max(scale * self._fit, 1e-9)  # píxeles del nivel 0 por píxel de pantalla
+        return int(np.clip(math.floor(math.log2(max(shrink, 1.0))), 0, len(self._levels) - 1))
+
+    def is_static(self, timeline: Any = None) -> bool:
+        """Estática si la timeline no varía escala, rotación ni temblor (p. ej. reactividad a 0)."""
+        if timeline is None or timeline.n_frames == 0:
+            return False
+        return all(
+            float(np.ptp(getattr(timeline, name), axis=0).max(initial=0.0)) == 0.0
+            for name in ("scale", "rotation", "shake")
+        )
+
+    def render(self, frame: np.ndarray, state: Optional[Mapping[str, Any]] = None) -> None:
+        if self._levels is None or self.box.empty:
+            return
+        state = state or {}
+        scale = float(state.get("scale", 1.0))
+        k = self.level_for(scale)
+        src = self._levels[k]
+        sh, sw = src.shape[:2]
+        h0, w0 = self._levels[0].shape[:2]
+        scale *= self._fit * max(h0, w0) / max(sh, sw)  # píxeles de pantalla por píxel del nivel k
+        angle = math.radians(float(state.get("rotation", 0.0)))
+        shake = state.get("shake")
+        sx, sy = (
+            (float(shake[0]) * self._unit, float(shake[1]) * self._unit)
+            if shake is not None
+            else (0.0, 0.0)
+        )
+        c, s = math.cos(angle) / scale, math.sin(angle) / scale
+        if self.use_numba:
+            cx, cy = self._center
+            _sample_over(
+                frame[self.box.slices],
+                float(self.box.x0),
+                float(self.box.y0),
+                cx + sx,
+                cy + sy,
+                src,
+                c,
+                s,
+                sw / 2.0,
+                sh / 2.0,
+            )
+            return
+        flat = self._flat[k]
+        u, v, tmp = self._u, self._v, self._tmp
+        # Inversa de rotar+escalar+desplazar: (u, v) en píxeles del nivel
+        np.multiply(self._dx - sx, c, out=u)
+        np.multiply(self._dy - sy, s, out=tmp)
+        u += tmp
+        u += sw / 2.0
+        np.multiply(self._dy - sy, c, out=v)
+        np.multiply(self._dx - sx, -s, out=tmp)
+        v += tmp
+        v += sh / 2.0
+        np.floor(u, out=u)
+        np.floor(v, out=v)
+        iu, iv = self._iu, self._iv
+        np.copyto(iu, u, casting="unsafe")
+        np.copyto(iv, v, casting="unsafe")
+        np.less(iu, 0, out=self._out)
+        np.greater_equal(iu, sw, out=self._oob)
+        self._out |= self._oob
+        np.less(iv, 0, out=self._oob)
+        self._out |= self._oob
+        np.greater_equal(iv, sh, out=self._oob)
+        self._out |= self._oob
+        iv *= sw
+        iv += iu
+        np.copyto(iv, flat.size - 1, where=self._out)
+        np.take(flat, iv, out=self._sample, mode="clip")
+        # Composición "over" premultiplicada: src + dst * (1 - alfa)
+        rgba = self._sample.view(np.uint8).reshape(*self._sample.shape, 4)
+        dst = frame[self.box.slices][..., :3]
+        np.multiply(rgba[..., 3:], -1.0 / 255.0, out=self._alpha)
+        self._alpha += 1.0
+        np.copyto(self._rgb_dst, dst)
+        self._rgb_dst *= self._alpha
+        np.copyto(self._rgb_src, rgba[..., :3])
+        self._rgb_dst += self._rgb_src
+        self._rgb_dst += 0.5  # redondeo al truncar a uint8
+        np.minimum(self._rgb_dst, 255.0, out=self._rgb_dst)
+        np.copyto(dst, self._rgb_dst, casting="unsafe")
+
+
+# Benchmark: logo de 6000x6000, pirámide premultiplicada frente a muestrear la imagen completa
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+    import tempfile
+    import time
+
+    from PIL import Image
+
+    from .raster import new_frame
 
-    def render(self) -> None:  # pragma: no cover - placeholder
-        pass
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 6000
+    path = Path(tempfile.mkdtemp()) / "logo.png"
+    yy, xx = np.mgrid[:side, :side]
+    r2 = (xx - side / 2) ** 2 + (yy - side / 2) ** 2
+    alpha = (r2 < (0.48 * side) ** 2).astype(np.uint8) * 255
+    Image.fromarray(
+        np.dstack([xx % 256, yy % 256, np.full_like(xx, 200), alpha]).astype(np.uint8)
+    ).save(path)
+    del yy, xx, alpha
+    states = [{"scale": 1.0 + 0.15 * abs(math.sin(i)), "rotation": 5.0 * i} for i in range(60)]
+    for width, height in ((1920, 1080), (3840, 2160)):
+        rows = []
+        for full in (True, False):
+            img = CenterImage(str(path), radius=0.25, max_scale=1.15)
+            t0 = time.perf_counter()
+            if full:  # referencia: nivel único a tamaño completo (lo que costaba antes)
+                _MIPS.clear()
+                img.prepare(width, height)
+                img._levels = image_mips(str(path), side)[:1]
+                img._fit = (2.0 * img.radius * img._unit) / side
+            else:
+                _MIPS.clear()
+                img.prepare(width, height)
+            t_prep = time.perf_counter() - t0
+            frame = new_frame(width, height)
+            img.render(frame, states[0])
+            t0 = time.perf_counter()
+            for st in states:
+                img.render(frame, st)
+            dt = (time.perf_counter() - t0) / len(states)
+            rows.append(
+                f"{dt * 1e3:6.2f} ms/frame, prepare {t_prep:5.2f} s, {img.nbytes / 1e6:6.1f} MB"
+            )
+        print(f"{side}x{side} -> {width}x{height}: completa {rows[0]} | pirámide {rows[1]}")
@@ -0,0 +1,356 @@
+"""Render headless de frames a partir de un `Preset` (sin Qt).
+
+`FrameRenderer` construye las capas del preset (fondo, barras, anillo, imagen
+central), las prepara una vez por resolución y compone cada frame en buffers
+RGBA uint8 reservados de antemano (un anillo de `buffers` frames, o el `out`
+que pase el llamador). Los parámetros por frame salen de la `FrameTimeline`
+compilada, así que el bucle de render solo indexa arrays.
+
+Capas estáticas (`layer.is_static(timeline)`: fondo sólido, degradado sin
+animación, imagen central sin reactividad) se rasterizan una vez: las de abajo
+en un frame base y las que van encima de capas dinámicas como `Sprite`. Cada
+frame solo recompone la región sucia (`dirty_box`) de barras y anillo; el resto
+del buffer ya contiene la imagen limpia de la última vez que se usó.
+
+El glow del anillo y el bloom de la imagen central son capas `Glow` (pirámide a
+baja resolución, ver `glow.py`) con calidad `quality` ('preview' / 'final' / 'off').
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ..preset_manager import Preset
+from ..timeline import RING_REACT, FrameTimeline
+from .background import BackgroundGradient, BackgroundSolid
+from .bars import RadialBars
+from .center_image import CenterImage
+from .glow import DEFAULT_QUALITY, GLOW_OFF, Glow
+from .raster import Box, Sprite, full_box, new_frame, parse_color
+from .ring import ReactiveRing
+
+# Raíz para rutas relativas del preset ("assets/logo.png" -> app/assets/logo.png)
+APP_DIR = Path(__file__).resolve().parents[2]
+
+# Alcance de los halos en unidades del preset (mitad del lado corto)
+RING_GLOW_RADIUS = 0.08
+BLOOM_RADIUS = 0.12
+
+# Campos del preset que deciden los píxeles de un frame (vía capas o timeline);
+# fuera quedan meta, el perfil del codificador y los ajustes de la vista previa
+RENDER_FIELDS: Dict[str, Any] = {
+    "output": {"resolution", "fps"},
+    "background": True,
+    "visual": True,
+    "center_image": True,
+    "audio": True,
+}
+
+
+def _accent(preset: Preset) -> tuple[int, int, int, int]:
+    """Color de barras/anillo. 'auto': el color más claro del fondo llevado hacia blanco."""
+    palette = preset.visual.color.palette
+    if palette.startswith("#"):
+        return parse_color(palette)
+    cols = [parse_color(c) for c in preset.background.colors]
+    r, g, b, _ = max(cols, key=lambda c: 0.2126 * c[0] + 0.7152 * c[1] + 0.0722 * c[2])
+    mix = 0.8  # hacia blanco
+    rgb = np.array([r, g, b], dtype=np.float32)
+    rgb = 255.0 * (1.0 - mix) * (rgb / 255.0) ** (1.0 / preset.visual.color.gamma) + 255.0 * mix
+    return int(rgb[0]), int(rgb[1]), int(rgb[2]), 255
+
+
+def center_image_path(preset: Preset, base_dir: Optional[Path] = None) -> Optional[Path]:
+    """Ruta de la imagen central del preset (relativas a `base_dir` o a `APP_DIR`), o None."""
+    if not preset.center_image.path:
+        return None
+    path = Path(preset.center_image.path)
+    return path if path.is_absolute() else (base_dir or APP_DIR) / path
+
+
+def render_key(preset: Preset, base_dir: Optional[Path] = None) -> str:
+    """Huella (sha1) de lo que decide los píxeles de un frame para un audio dado.
+
+    Cambia con cualquier campo de `RENDER_FIELDS` y con la fecha/tamaño del
+    archivo de la imagen central; no con el nombre del preset ni con el perfil
+    de exportación. Sirve para invalidar cachés de frames y miniaturas.
+    """
+    data = preset.model_dump(mode="json", include=RENDER_FIELDS)
+    path = center_image_path(preset, base_dir)
+    try:
+        st = path.stat() if path is not None else None
+        data["center_image_file"] = [st.st_mtime_ns, st.st_size] if st is not None else None
+    except OSError:
+        data["center_image_file"] = None
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def layers_from_preset(
+    preset: Preset,
+    base_dir: Optional[Path] = None,
+    *,
+    quality: str = DEFAULT_QUALITY,
+    timeline: Optional[FrameTimeline] = None,
+) -> List[Any]:
+    """Capas en orden de composición (abajo -> arriba) según el preset.
+
+    `quality` ('preview' / 'final') elige la pirámide de los glows ('off': sin
+    glow del anillo ni bloom, para la vista previa que va tarde); con
+    `timeline`, el bloom de una imagen central estática se calcula una vez.
+    """
+    bg = preset.background
+    colors = [parse_color(c)[:3] for c in bg.colors]
+    layers: List[Any] = []
+    if bg.type == "solid":
+        layers.append(BackgroundSolid(colors[0]))
+    else:
+        layers.append(
+            BackgroundGradient(
+                colors,
+                angle=bg.angle,
+                speed=bg.anim.speed if bg.type in ("gradient_anim", "gradient_dynamic") else 0.0,
+                reactive=bg.type == "gradient_dynamic" and bg.reactivity is not None,
+            )
+        )
+    vis = preset.visual
+    accent = _accent(preset)
+    if vis.mode.bars:
+        layers.append(
+            RadialBars(
+                vis.bars.count,
+                vis.bars.distribution,
+                base_radius=vis.ring.base_radius,
+                max_height=vis.bars.scale * max(1.0, vis.mapping.sensitivity),
+                roundness=vis.bars.roundness,
+                color=accent,
+            )
+        )
+    if vis.mode.ring:
+        ring = ReactiveRing(
+            vis.ring.base_radius,
+            vis.ring.thickness,
+            max_radius=vis.ring.base_radius * (1.0 + RING_REACT),
+            color=accent,
+        )
+        layers.append(ring)
+        if vis.ring.glow > 0 and quality != GLOW_OFF:
+            layers.append(
+                Glow([ring], strength=vis.ring.glow, radius=RING_GLOW_RADIUS, quality=quality)
+            )
+    ci = preset.center_image
+    path = center_image_path(preset, base_dir)
+    if path is not None:
+        react = ci.reactivity
+        image = CenterImage(
+            str(path),
+            radius=max(vis.ring.base_radius - vis.ring.thickness, 0.05) * 0.85,
+            max_scale=(1.0 + react.scale_on_beat) * (1.0 + react.shake),
+        )
+        if image.available:
+            layers.append(image)
+            if react.bloom > 0 and quality != GLOW_OFF:
+                layers.append(
+                    Glow(
+                        [image],
+                        strength=1.0,  # la timeline ya trae bloom * pulso de beat
+                        radius=BLOOM_RADIUS,
+                        key="bloom",
+                        quality=quality,
+                        frozen=timeline is not None and image.is_static(timeline),
+                    )
+                )
+    return layers
+
+
+class FrameRenderer:
+    """Compositor de capas sobre un anillo de buffers RGBA (H, W, 4) reutilizables."""
+
+    def __init__(
+        self,
+        preset: Preset,
+        timeline: Optional[FrameTimeline] = None,
+        *,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        buffers: int = 3,
+        base_dir: Optional[Path] = None,
+        cache_static: bool = True,
+        quality: str = DEFAULT_QUALITY,
+    ) -> None:
+        self.preset = preset
+        self.timeline = timeline
+        self.width = int(width or preset.output.resolution.width)
+        self.height = int(height or preset.output.resolution.height)
+        self.fps = timeline.fps if timeline is not None else preset.output.fps
+        self.quality = quality
+        self.key = render_key(preset, base_dir)
+        self.layers = layers_from_preset(preset, base_dir, quality=quality, timeline=timeline)
+        for layer in self.layers:
+            layer.prepare(self.width, self.height)
+        self._buffers = [new_frame(self.width, self.height) for _ in range(max(1, buffers))]
+        self._next = 0
+        self._base: Optional[np.ndarray] = None
+        if cache_static:
+            self._cache_static_layers()
+
+    # --- Caché de capas estáticas ---
+    def _cache_static_layers(self) -> None:
+        static = [layer.is_static(self.timeline) for layer in self.layers]
+        n_base = next((k for k, st in enumerate(static) if not st), len(static))
+        if n_base == 0:
+            return  # el fondo cambia cada frame: no hay nada que reutilizar
+        state0 = (
+            self.state(0) if self.timeline is not None and self.timeline.n_frames else {"t": 0.0}
+        )
+        base = new_frame(self.width, self.height)
+        for layer in self.layers[:n_base]:
+            layer.render(base, state0)
+        # Encima del fondo: capas dinámicas tal cual y estáticas como sprite (estado del frame 0)
+        self._upper: List[Any] = [
+            Sprite(layer, self.width, self.height, state0) if st else layer
+            for layer, st in zip(self.layers[n_base:], static[n_base:])
+        ]
+        clean = base.copy()
+        for item in self._upper:
+            if isinstance(item, Sprite):
+                item.apply(clean)
+        self._base, self._clean = base, clean
+        # Por buffer: región pintada la última vez (lo que hay que restaurar además de la nueva)
+        self._painted: Dict[int, tuple] = {}
+
+    @property
+    def cached_layers(self) -> int:
+        """Capas que no se re-rasterizan por frame (0 si la caché está desactivada)."""
+        if self._base is None:
+            return 0
+        return len(self.layers) - sum(1 for item in self._upper if not isinstance(item, Sprite))
+
+    def _dirty(self, state: Dict[str, Any]) -> Box:
+        region = Box(0, 0, 0, 0)
+        for item in self._upper:
+            if isinstance(item, Sprite):
+                continue
+            if hasattr(item, "dirty_box"):
+                region = region.union(item.dirty_box(state))
+            else:
+                region = region.union(
+                    getattr(item, "box", None) or full_box(self.width, self.height)
+                )
+        return region
+
+    def _render_cached(self, state: Dict[str, Any], frame: np.ndarray) -> None:
+        region = self._dirty(state)
+        prev = self._painted.get(id(frame))
+        if prev is None or prev[0]() is not frame:
+            np.copyto(frame, self._clean)  # buffer nuevo: imagen limpia completa una vez
+            restore = region
+        else:
+            restore = region.union(prev[1])
+        if not restore.empty:
+            np.copyto(frame[restore.slices], self._base[restore.slices])
+            for item in self._upper:
+                if isinstance(item, Sprite):
+                    item.apply(frame, restore)
+                else:
+                    item.render(frame, state)
+        self._painted[id(frame)] = (weakref.ref(frame), region)
+        if len(self._painted) > 16:  # buffers `out=` ya liberados
+            self._painted = {k: v for k, v in self._painted.items() if v[0]() is not None}
+
+    @property
+    def n_frames(self) -> int:
+        return self.timeline.n_frames if self.timeline is not None else 0
+
+    def state(self, i: int) -> Dict[str, Any]:
+        """Parámetros del frame `i` (de la timeline) más `t`, el tiempo en la pista."""
+        if self.timeline is None:
+            return {"t": i / self.fps}
+        st = self.timeline.frame(i)
+        st["t"] = self.timeline.offset + i / self.fps
+        return st
+
+    def next_buffer(self) -> np.ndarray:
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        return buf
+
+    def render_state(self, state: Dict[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compone `state`. Con caché, las capas estáticas usan el estado del frame 0."""
+        frame = self.next_buffer() if out is None else out
+        if self._base is not None:
+            self._render_cached(state, frame)
+            return frame
+        for layer in self.layers:
+            layer.render(frame, state)
+        return frame
+
+    def render(self, i: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compone el frame `i` en `out` (o en el siguiente buffer del anillo) y lo devuelve."""
+        return self.render_state(self.state(i), out)
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        stop = self.n_frames if stop is None else stop
+        for i in range(start, stop):
+            yield self.render(i)
+
+
+# Benchmark: fps de render en un solo núcleo a 1080p y 4K, con y sin caché de capas estáticas
+# (`--preview`: glows con la calidad de la vista previa)
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+    import tempfile
+    import time
+
+    from app.tests._fixtures import synthetic_timeline
+
+    from ..preset_manager import PresetManager
+
+    pm = PresetManager(Path(tempfile.mkdtemp()))
+    pm.ensure_example_presets()
+    quality = "preview" if "--preview" in sys.argv else "final"
+    names = [a for a in sys.argv[1:] if not a.startswith("--")] or [
+        "minimal_ring",
+        "clean_spectrum",
+        "clean_spectrum+logo",
+    ]
+    # Logo sintético de 2048x2048 para medir también la imagen central
+    from PIL import Image
+
+    logo = Path(pm.presets_dir) / "logo.png"
+    yy, xx = np.mgrid[:2048, :2048]
+    alpha = (((xx - 1024) ** 2 + (yy - 1024) ** 2) < 1000**2).astype(np.uint8) * 255
+    Image.fromarray(
+        np.dstack([xx % 256, yy % 256, np.full_like(xx, 200), alpha]).astype(np.uint8)
+    ).save(logo)
+    for name in names:
+        base_name, _, extra = name.partition("+")
+        preset = pm.load(pm.get_builtin(base_name) or base_name)
+        if preset.center_image.path or extra == "logo":
+            preset.center_image.path = str(logo)
+        tl = synthetic_timeline(preset)
+        portrait = preset.output.resolution.height > preset.output.resolution.width
+        for w, h in ((1920, 1080), (3840, 2160)):
+            if portrait:
+                w, h = h, w
+            row = []
+            for cache in (False, True):
+                r = FrameRenderer(
+                    preset, tl, width=w, height=h, cache_static=cache, quality=quality
+                )
+                r.render(0)
+                n = min(tl.n_frames, 60)
+                t0 = time.perf_counter()
+                for i in range(n):
+                    r.render(i)
+                dt = time.perf_counter() - t0
+                row.append(f"{n / dt:6.1f} fps ({dt / n * 1e3:5.1f} ms)")
+            print(
+                f"{name:20s} {w}x{h}: sin caché {row[0]} | con caché {row[1]} [{r.cached_layers} "
+                "capas estáticas]"
+            )
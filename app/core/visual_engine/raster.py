@@ -0,0 +1,224 @@
+"""Utilidades de rasterizado comunes a las capas (sin Qt).
+
+Los frames son arrays (H, W, 4) uint8 RGBA contiguos. Las capas trabajan sobre
+su vista uint32 (H, W): un píxel = un entero, así que rellenar o recolorear es
+un `np.take` / `np.copyto(where=...)` con buffers de salida ya reservados.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+
+RGBA = Tuple[int, int, int, int]
+
+
+def parse_color(value: str) -> RGBA:
+    """'#RRGGBB' o '#RRGGBBAA' -> (r, g, b, a)."""
+    h = value.lstrip("#")
+    if len(h) not in (6, 8):
+        raise ValueError("color must be #RRGGBB or #RRGGBBAA")
+    r, g, b = int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)
+    a = int(h[6:8], 16) if len(h) == 8 else 255
+    return r, g, b, a
+
+
+def pack_rgba(color: RGBA | np.ndarray) -> np.uint32:
+    """Color RGBA -> el uint32 que ocupa en un frame (independiente del endianness)."""
+    return np.asarray(color, dtype=np.uint8).reshape(1, 4).view(np.uint32)[0, 0]
+
+
+def pack_lut(colors: np.ndarray) -> np.ndarray:
+    """(L, 4) uint8 -> (L,) uint32."""
+    return np.ascontiguousarray(colors, dtype=np.uint8).view(np.uint32).reshape(-1)
+
+
+def new_frame(width: int, height: int) -> np.ndarray:
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[..., 3] = 255
+    return frame
+
+
+def as_u32(frame: np.ndarray) -> np.ndarray:
+    """Vista (H, W) uint32 de un frame (H, W, 4) uint8 contiguo."""
+    return frame.view(np.uint32)[..., 0]
+
+
+@dataclass(frozen=True)
+class Box:
+    """Rectángulo [y0:y1, x0:x1] recortado al lienzo."""
+
+    y0: int
+    y1: int
+    x0: int
+    x1: int
+
+    @property
+    def slices(self) -> Tuple[slice, slice]:
+        return slice(self.y0, self.y1), slice(self.x0, self.x1)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.y1 - self.y0, self.x1 - self.x0
+
+    @property
+    def empty(self) -> bool:
+        return self.y1 <= self.y0 or self.x1 <= self.x0
+
+    def union(self, other: Optional["Box"]) -> "Box":
+        if other is None or other.empty:
+            return self
+        if self.empty:
+            return other
+        return Box(
+            min(self.y0, other.y0),
+            max(self.y1, other.y1),
+            min(self.x0, other.x0),
+            max(self.x1, other.x1),
+        )
+
+    def intersect(self, other: "Box") -> "Box":
+        return Box(
+            max(self.y0, other.y0),
+            min(self.y1, other.y1),
+            max(self.x0, other.x0),
+            min(self.x1, other.x1),
+        )
+
+    def relative_to(self, outer: "Box") -> Tuple[slice, slice]:
+        """Slices de esta caja dentro de los arrays de `outer` (que la contiene)."""
+        return slice(self.y0 - outer.y0, self.y1 - outer.y0), slice(
+            self.x0 - outer.x0, self.x1 - outer.x0
+        )
+
+
+def full_box(width: int, height: int) -> Box:
+    return Box(0, height, 0, width)
+
+
+def centered_box(width: int, height: int, radius_px: float) -> Box:
+    """Caja que contiene el círculo de radio `radius_px` centrado en el lienzo."""
+    cx, cy = width / 2.0, height / 2.0
+    r = int(np.ceil(radius_px)) + 1
+    return Box(
+        y0=max(0, int(cy) - r),
+        y1=min(height, int(cy) + r),
+        x0=max(0, int(cx) - r),
+        x1=min(width, int(cx) + r),
+    )
+
+
+def unit_px(width: int, height: int) -> float:
+    """Unidad de las medidas del preset (radios, alturas): la mitad del lado corto, en píxeles."""
+    return min(width, height) / 2.0
+
+
+def _polar(width: int, height: int, box: Box) -> Tuple[np.ndarray, np.ndarray]:
+    ys = (np.arange(box.y0, box.y1, dtype=np.float32) + 0.5 - height / 2.0)[:, None]
+    xs = (np.arange(box.x0, box.x1, dtype=np.float32) + 0.5 - width / 2.0)[None, :]
+    r = np.sqrt(xs * xs + ys * ys).astype(np.float32)
+    theta = np.mod(np.arctan2(xs, -ys), 2 * np.pi).astype(np.float32)
+    return r, theta
+
+
+# (ancho, alto) -> (caja, radio px, ángulo); la rejilla más grande pedida sirve a todas las capas
+_GRIDS: "OrderedDict[Tuple[int, int], Tuple[Box, np.ndarray, np.ndarray]]" = OrderedDict()
+_GRIDS_MAX = 4
+
+
+def polar_grid(width: int, height: int, box: Box) -> Tuple[np.ndarray, np.ndarray]:
+    """Radio (px) y ángulo [0, 2π) desde el centro para cada píxel de `box` (vistas de solo
+    lectura).
+
+    Ángulo 0 hacia arriba y creciente en sentido horario (como se lee un reloj).
+    Se calcula una vez por resolución y se comparte entre capas (barras, anillo):
+    si ya existe una rejilla que contiene `box` se devuelven vistas de ella.
+    """
+    key = (int(width), int(height))
+    hit = _GRIDS.get(key)
+    if hit is None or hit[0].intersect(box) != box:
+        outer = box.union(hit[0]) if hit is not None else box
+        r, theta = _polar(width, height, outer)
+        r.flags.writeable = theta.flags.writeable = False
+        hit = (outer, r, theta)
+        _GRIDS[key] = hit
+        while len(_GRIDS) > _GRIDS_MAX:
+            _GRIDS.popitem(last=False)
+    _GRIDS.move_to_end(key)
+    sub = box.relative_to(hit[0])
+    return hit[1][sub], hit[2][sub]
+
+
+def blend_coverage(dst: np.ndarray, cov: np.ndarray, color: RGBA, tmp: np.ndarray) -> None:
+    """dst (h, w, 4) uint8 += (color - dst) * cov * alfa, con cov (h, w) en 0..1 (camino NumPy)."""
+    a = cov[..., None] * (color[3] / 255.0)
+    np.copyto(tmp, dst[..., :3])
+    tmp *= 1.0 - a
+    tmp += a * np.asarray(color[:3], dtype=np.float32)
+    tmp += 0.5
+    np.copyto(dst[..., :3], tmp, casting="unsafe")
+
+
+class Sprite:
+    """Salida RGBA cacheada de una capa estática que va encima de capas dinámicas.
+
+    Se captura renderizando la capa una vez sobre negro y otra sobre blanco:
+    la diferencia da el alfa efectivo y el render sobre negro el color
+    premultiplicado. Al aplicarla, los píxeles opacos son una copia uint32 con
+    máscara y solo los del borde semitransparente se mezclan.
+    """
+
+    def __init__(
+        self, layer: Any, width: int, height: int, state: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        box = getattr(layer, "box", None) or full_box(width, height)
+        self.box = box
+        on_black = np.zeros((height, width, 4), dtype=np.uint8)
+        on_white = np.full((height, width, 4), 255, dtype=np.uint8)
+        layer.render(on_black, state)
+        layer.render(on_white, state)
+        black = on_black[box.slices][..., :3].astype(np.int16)
+        white = on_white[box.slices][..., :3].astype(np.int16)
+        # alfa = 255 - (blanco - negro); el máximo por canal absorbe el redondeo
+        alpha = np.clip(255 - (white - black).max(axis=2), 0, 255).astype(np.uint8)
+        self.opaque = alpha == 255
+        rgba = np.zeros((*box.shape, 4), dtype=np.uint8)
+        rgba[..., :3] = black
+        rgba[..., 3] = 255
+        self.color = rgba.view(np.uint32)[..., 0]
+        ys, xs = np.nonzero((alpha > 0) & ~self.opaque)
+        self._py, self._px = ys, xs
+        self._a = alpha[ys, xs].astype(np.float32)[:, None] / 255.0
+        self._premul = black[ys, xs].astype(np.float32)
+
+    @property
+    def empty(self) -> bool:
+        return not self.opaque.any() and not len(self._py)
+
+    def apply(self, frame: np.ndarray, region: Optional[Box] = None) -> None:
+        """Compone la capa cacheada sobre `frame`, limitada a `region` si se da."""
+        inter = self.box if region is None else self.box.intersect(region)
+        if inter.empty:
+            return
+        sub = inter.relative_to(self.box)
+        np.copyto(as_u32(frame)[inter.slices], self.color[sub], where=self.opaque[sub])
+        if not len(self._py):
+            return
+        py, px = self._py, self._px
+        if region is not None and inter != self.box:
+            keep = (
+                (py >= sub[0].start)
+                & (py < sub[0].stop)
+                & (px >= sub[1].start)
+                & (px < sub[1].stop)
+            )
+            py, px, a, premul = py[keep], px[keep], self._a[keep], self._premul[keep]
+        else:
+            a, premul = self._a, self._premul
+        dst = frame[self.box.y0 + py, self.box.x0 + px, :3].astype(np.float32)
+        frame[self.box.y0 + py, self.box.x0 + px, :3] = (premul + dst * (1.0 - a) + 0.5).astype(
+            np.uint8
+        )
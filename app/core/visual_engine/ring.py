@@ -1,13 +1,100 @@
 from __future__ import annotations
 
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from .raster import RGBA, Box, blend_coverage, centered_box, polar_grid, unit_px
+
+try:  # sin numba se usa el camino NumPy con buffers reservados
+    from numba import njit
+except Exception:  # pragma: no cover - fallback sin numba
+    njit = None
+
+
+if njit is not None:
+
+    @njit(cache=True, nogil=True)
+    def _ring_kernel(dst, r, radius, half, color):  # pragma: no cover - compilado
+        ca = color[3] / 255.0
+        for i in range(dst.shape[0]):
+            for j in range(dst.shape[1]):
+                cov = 0.5 - (abs(r[i, j] - radius) - half)
+                if cov <= 0.0:
+                    continue
+                a = min(cov, 1.0) * ca
+                for c in range(3):
+                    dst[i, j, c] = np.uint8(dst[i, j, c] * (1.0 - a) + color[c] * a + 0.5)
+
+else:  # pragma: no cover
+    _ring_kernel = None
+
 
 class ReactiveRing:
-    def __init__(self, radius: float = 100.0, thickness: float = 10.0) -> None:
+    """Anillo de radio reactivo (`state['ring_radius']`) y grosor fijo, en unidades del preset.
+
+    Usa la rejilla polar compartida con las barras; la cobertura del borde
+    (antialiasing) sale de la distancia en píxeles al círculo central del anillo.
+    """
+
+    def __init__(
+        self,
+        radius: float = 0.35,
+        thickness: float = 0.02,
+        *,
+        max_radius: Optional[float] = None,
+        color: RGBA = (255, 255, 255, 255),
+    ) -> None:
         self.radius = radius
         self.thickness = thickness
+        self.max_radius = max_radius
+        self.color = color
+        self.use_numba = _ring_kernel is not None
+
+    def update(self, value: float) -> None:
+        self.radius = float(value)
+
+    def prepare(self, width: int, height: int) -> None:
+        u = unit_px(width, height)
+        outer = (self.max_radius or self.radius * 1.5) + self.thickness
+        self._size = (width, height)
+        self._unit = u
+        self.box = centered_box(width, height, outer * u + 1.0)
+        self._r, _ = polar_grid(width, height, self.box)
+        self._color = np.asarray(self.color, dtype=np.float32)
+        if not self.use_numba:
+            self._cov = np.empty(self.box.shape, dtype=np.float32)
+            self._tmp = np.empty((*self.box.shape, 3), dtype=np.float32)
+
+    def is_static(self, timeline: Any = None) -> bool:
+        return False
+
+    def _radius(self, state: Optional[Mapping[str, Any]]) -> float:
+        return (
+            float(state["ring_radius"])
+            if state is not None and "ring_radius" in state
+            else self.radius
+        )
 
-    def update(self, value: float) -> None:  # pragma: no cover - placeholder
-        pass
+    def dirty_box(self, state: Optional[Mapping[str, Any]] = None) -> Box:
+        width, height = self._size
+        outer = self._radius(state) + self.thickness / 2.0
+        return centered_box(width, height, outer * self._unit + 1.0).intersect(self.box)
 
-    def render(self) -> None:  # pragma: no cover - placeholder
-        pass
+    def render(self, frame: np.ndarray, state: Optional[Mapping[str, Any]] = None) -> None:
+        region = self.dirty_box(state)
+        if region.empty:
+            return
+        sub = region.relative_to(self.box)
+        radius = self._radius(state) * self._unit
+        half = 0.5 * self.thickness * self._unit
+        dst = frame[region.slices]
+        if self.use_numba:
+            _ring_kernel(dst, self._r[sub], radius, half, self._color)
+            return
+        cov = self._cov[sub]
+        np.subtract(self._r[sub], radius, out=cov)
+        np.abs(cov, out=cov)
+        np.subtract(half + 0.5, cov, out=cov)
+        np.clip(cov, 0.0, 1.0, out=cov)
+        blend_coverage(dst, cov, self.color, self._tmp[sub])
@@ -0,0 +1,245 @@
+"""Pirámide de picos (min/max/RMS) de la forma de onda para dibujarla a cualquier zoom.
+
+Una pista de 2 h a 44.1 kHz tiene ~3e8 muestras: imposible de pintar tal cual.
+El nivel 0 resume cada bloque de `block` muestras en (mínimo, máximo, RMS) y
+cada nivel siguiente junta pares del anterior (decimación por potencias de 2).
+Se calcula en una sola pasada mientras se decodifica el audio para el análisis
+(`WaveformBuilder` acepta bloques, también en streaming) y se guarda con el
+resultado en la caché de análisis como un único array int16 (N, 3) con los
+niveles concatenados (~12 bytes por cada 128 muestras, ~30 MB para 2 h).
+
+`WaveformPyramid.view(t0, t1, pixels)` elige el nivel más fino cuyo número de
+puntos en la ventana no pasa de `pixels` y devuelve solo ese tramo: el coste
+de un zoom o un desplazamiento depende del ancho en píxeles, no de la duración.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:  # sin numba se usa el camino NumPy
+    from numba import njit
+except Exception:  # pragma: no cover - fallback sin numba
+    njit = None
+
+# Muestras por punto del nivel 0 (~2.9 ms a 44.1 kHz)
+WAVEFORM_BLOCK = 128
+_SCALE = 32767.0
+
+
+def _level_sizes(n0: int) -> List[int]:
+    """Puntos por nivel: n0, ceil(n0/2), ... hasta un único punto para toda la pista."""
+    sizes = [int(n0)]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def _peaks_numpy(x: np.ndarray, block: int) -> np.ndarray:
+    frames = x[: len(x) // block * block].reshape(-1, block)
+    out = np.empty((len(frames), 3), dtype=np.float32)
+    np.min(frames, axis=1, out=out[:, 0])
+    np.max(frames, axis=1, out=out[:, 1])
+    out[:, 2] = np.sqrt(np.einsum("ij,ij->i", frames, frames) / block)
+    return out
+
+
+if njit is not None:
+
+    @njit(cache=True, nogil=True)
+    def _peaks_kernel(x, block, out):  # pragma: no cover - compilado
+        for b in range(out.shape[0]):
+            base = b * block
+            lo = x[base]
+            hi = x[base]
+            acc = 0.0
+            for i in range(base, base + block):
+                v = x[i]
+                if v < lo:
+                    lo = v
+                elif v > hi:
+                    hi = v
+                acc += v * v
+            out[b, 0] = lo
+            out[b, 1] = hi
+            out[b, 2] = math.sqrt(acc / block)
+
+else:  # pragma: no cover
+    _peaks_kernel = None
+
+
+def _peaks(x: np.ndarray, block: int) -> np.ndarray:
+    """(min, max, rms) por bloque completo de `x` (float32), en una pasada con numba."""
+    if _peaks_kernel is None:
+        return _peaks_numpy(x, block)
+    out = np.empty((len(x) // block, 3), dtype=np.float32)
+    _peaks_kernel(x, block, out)
+    return out
+
+
+def _decimate2(level: np.ndarray) -> np.ndarray:
+    """Nivel siguiente: min/max de cada par y RMS combinado (el último impar pasa tal cual)."""
+    n = len(level)
+    even = level[0 : n - n % 2 : 2]
+    odd = level[1 : n - n % 2 : 2]
+    out = np.empty(((n + 1) // 2, 3), dtype=np.float32)
+    np.minimum(even[:, 0], odd[:, 0], out=out[: len(even), 0])
+    np.maximum(even[:, 1], odd[:, 1], out=out[: len(even), 1])
+    out[: len(even), 2] = np.sqrt(0.5 * (even[:, 2] ** 2 + odd[:, 2] ** 2))
+    if n % 2:
+        out[-1] = level[-1]
+    return out
+
+
+@dataclass
+class WaveformPyramid:
+    sr: int
+    block: int  # muestras por punto del nivel 0
+    n_samples: int
+    data: np.ndarray  # (N, 3) int16: (min, max, rms) * 32767, niveles concatenados
+
+    def __post_init__(self) -> None:
+        sizes = _level_sizes(math.ceil(self.n_samples / self.block)) if self.n_samples else [0]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        if self._offsets[-1] != len(self.data):
+            raise ValueError("waveform data does not match n_samples/block")
+
+    @property
+    def n_levels(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sr
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes)
+
+    def level(self, k: int) -> np.ndarray:
+        """Vista int16 (n_k, 3) del nivel `k` (0 = el más fino)."""
+        return self.data[self._offsets[k] : self._offsets[k + 1]]
+
+    def samples_per_point(self, k: int) -> int:
+        return self.block << k
+
+    def level_for(self, t0: float, t1: float, pixels: int) -> int:
+        """Nivel más fino con como mucho `pixels` puntos entre `t0` y `t1` (s)."""
+        span = max(t1 - t0, 0.0) * self.sr / self.block  # puntos del nivel 0 en la ventana
+        k = math.ceil(math.log2(span / max(pixels, 1))) if span > pixels else 0
+        return min(max(k, 0), self.n_levels - 1)
+
+    def view(
+        self, t0: float, t1: float, pixels: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(t, min, max, rms) en float32 del nivel adecuado para `pixels` en [t0, t1] (s).
+
+        Incluye un punto más a cada lado para que el trazo no se corte en los
+        bordes de la vista; `t` es el centro de cada punto.
+        """
+        k = self.level_for(t0, t1, pixels)
+        spp = self.samples_per_point(k)
+        lv = self.level(k)
+        i0 = max(int(math.floor(t0 * self.sr / spp)) - 1, 0)
+        i1 = min(int(math.ceil(t1 * self.sr / spp)) + 1, len(lv))
+        seg = lv[i0 : max(i0, i1)].astype(np.float32) * (1.0 / _SCALE)
+        t = ((np.arange(i0, i0 + len(seg), dtype=np.float64) + 0.5) * spp / self.sr).astype(
+            np.float32
+        )
+        return t, seg[:, 0], seg[:, 1], seg[:, 2]
+
+
+class WaveformBuilder:
+    """Construye la pirámide a partir de bloques de audio mono (en el orden de la pista)."""
+
+    def __init__(self, sr: int, block: int = WAVEFORM_BLOCK) -> None:
+        self.sr = int(sr)
+        self.block = int(block)
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._chunks: List[np.ndarray] = []
+        self._n = 0
+
+    def feed(self, samples: np.ndarray) -> None:
+        x = np.ascontiguousarray(samples, dtype=np.float32).ravel()
+        self._n += x.size
+        if self._carry.size:
+            need = self.block - self._carry.size
+            head, x = x[:need], x[need:]
+            self._carry = np.concatenate([self._carry, head])
+            if self._carry.size < self.block:
+                return
+            self._chunks.append(_peaks(self._carry, self.block))
+            self._carry = np.zeros(0, dtype=np.float32)
+        full = x.size // self.block * self.block
+        if full:
+            self._chunks.append(_peaks(x[:full], self.block))
+        self._carry = x[full:].copy()
+
+    def finish(self) -> WaveformPyramid:
+        chunks = list(self._chunks)
+        if self._carry.size:
+            c = self._carry
+            chunks.append(np.array([[c.min(), c.max(), np.sqrt(np.mean(c * c))]], dtype=np.float32))
+        level = np.concatenate(chunks) if chunks else np.zeros((0, 3), np.float32)
+        levels = [level]
+        for _ in _level_sizes(len(level))[1:]:
+            levels.append(_decimate2(levels[-1]))
+        data = np.concatenate(levels)
+        np.clip(data * _SCALE, -_SCALE, _SCALE, out=data)
+        return WaveformPyramid(self.sr, self.block, self._n, np.rint(data).astype(np.int16))
+
+
+def waveform_pyramid(y: np.ndarray, sr: int, block: int = WAVEFORM_BLOCK) -> WaveformPyramid:
+    """Pirámide de una señal mono completa (una pasada sobre las muestras)."""
+    builder = WaveformBuilder(sr, block)
+    builder.feed(y)
+    return builder.finish()
+
+
+def pyramid_from(
+    data: Optional[np.ndarray], sr: int, block: int, n_samples: int
+) -> Optional[WaveformPyramid]:
+    """Pirámide a partir de lo guardado en un `AnalysisResult` (None si no la tiene)."""
+    if data is None or block <= 0:
+        return None
+    return WaveformPyramid(int(sr), int(block), int(n_samples), data)
+
+
+# Benchmark: construcción por bloques de 2 h a 44.1 kHz y coste de zoom/desplazamiento
+if __name__ == "__main__":  # pragma: no cover - medición manual
+    import sys
+    import time
+
+    def _opt(flag: str, cast, default):
+        return cast(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    minutes = _opt("--minutes", float, 120.0)
+    sr = 44100
+    rng = np.random.default_rng(0)
+    block_s = 10.0
+    builder = WaveformBuilder(sr)
+    t0 = time.perf_counter()
+    build_s = 0.0
+    n_blocks = int(minutes * 60 / block_s)
+    for b in range(n_blocks):
+        x = (0.5 * np.sin(np.arange(int(block_s * sr)) * 0.05) * rng.random()).astype(np.float32)
+        t1 = time.perf_counter()
+        builder.feed(x)
+        build_s += time.perf_counter() - t1
+    wf = builder.finish()
+    print(
+        f"{minutes:.0f} min: {wf.n_samples / 1e6:.0f} M muestras, pirámide {wf.n_levels} niveles, "
+        f"{wf.nbytes / 2**20:.1f} MB, construcción {build_s:.2f} s"
+    )
+    pixels = 1600
+    worst = 0.0
+    for span in (wf.duration, 600.0, 60.0, 5.0, 0.1):
+        for start in np.linspace(0.0, max(wf.duration - span, 0.0), 50):
+            t1 = time.perf_counter()
+            wf.view(start, start + span, pixels)
+            worst = max(worst, time.perf_counter() - t1)
+    print(f"vista a {pixels} px (toda la pista ... 0.1 s): peor {worst * 1e3:.2f} ms")
@@ -0,0 +1,44 @@
+"""Análisis y timelines sintéticos para pruebas y benchmarks sin audio."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.core.analysis import AnalysisResult
+from app.core.preset_manager import Preset
+from app.core.timeline import FrameTimeline, timeline_from_preset
+
+
+def synthetic_analysis(
+    seconds: float = 4.0, *, bars: int = 64, seed: int = 0, full_spectrum: bool = False
+) -> AnalysisResult:
+    """Ruido + beats a 120 BPM. `full_spectrum` añade un `S_mag` (1025, T) aleatorio."""
+    sr, hop, n_fft = 44100, 512, 2048
+    T = int(seconds * sr / hop) + 1
+    rng = np.random.default_rng(seed)
+    spec = rng.random((bars, T)).astype(np.float32)
+    beats = np.arange(0, T, int(round(0.5 * sr / hop)))
+    freqs = np.fft.rfftfreq(n_fft, 1 / sr).astype(np.float32)
+    return AnalysisResult(
+        sr=sr,
+        hop=hop,
+        n_fft=n_fft,
+        times=np.arange(T) * hop / sr,
+        S_mag=rng.random((freqs.size, T), dtype=np.float32) if full_spectrum else None,
+        freqs=freqs,
+        energy_global=spec.mean(axis=0),
+        energy_bands={"bass": spec[0], "mid": spec[bars // 2], "treble": spec[-1]},
+        onset_envelope=np.zeros(T, np.float32),
+        onset_frames=np.zeros(0, int),
+        onset_times=np.zeros(0),
+        tempo_bpm=120.0,
+        beat_frames=beats,
+        beat_times=beats * hop / sr,
+        bar_spectrum=spec,
+    )
+
+
+def synthetic_timeline(preset: Preset, seconds: float = 4.0, seed: int = 0) -> FrameTimeline:
+    """Timeline de `synthetic_analysis` con tantas barras como el preset."""
+    res = synthetic_analysis(seconds, bars=preset.visual.bars.count, seed=seed)
+    return timeline_from_preset(res, preset)
@@ -1,5 +1,21 @@
+import pickle
+
+import librosa
 import numpy as np
-from app.core.analysis import normalize_sr, peak_normalize, aac_passthrough_ok
+import pytest
+import soundfile as sf
+
+from app.core.analysis import (
+    aac_passthrough_ok,
+    analyze_file,
+    analyze_mono,
+    normalize_sr,
+    onset_from_power,
+    peak_normalize,
+    spectral_frontend,
+    tempo_strided,
+)
+from app.core.analysis_cache import AnalysisCache
 from app.core.media_probe import AudioInfo
 
 
@@ -27,3 +43,142 @@ def test_aac_passthrough_rule():
     assert aac_passthrough_ok(info, target_sr=44100, target_channels=2) is True
     info2 = AudioInfo(codec_name="aac", sample_rate=48000, channels=2)
     assert aac_passthrough_ok(info2, target_sr=44100, target_channels=2) is False
+
+
+def test_keep_spectrum_modes_and_compact():
+    sr = 22050
+    t = np.linspace(0, 1.0, sr, endpoint=False)
+    y = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    full = analyze_mono(y, sr, compute_beats=False)
+    reduced = analyze_mono(y, sr, compute_beats=False, keep_spectrum="db16")
+    none = analyze_mono(y, sr, compute_beats=False, keep_spectrum="none")
+    assert reduced.S_mag is None and reduced.S_db16.dtype == np.float16
+    assert reduced.nbytes < full.nbytes
+    S = reduced.spectrogram()
+    peak = full.S_mag > 1.0
+    np.testing.assert_allclose(S[peak], full.S_mag[peak], rtol=0.01)
+    with pytest.raises(ValueError):
+        none.spectrogram()
+    none.S_loader = lambda: full.S_mag
+    assert none.spectrogram(keep=True) is full.S_mag and none.S_mag is full.S_mag
+
+    compact = full.compact()
+    assert not hasattr(compact, "__dict__")
+    assert compact.nbytes < full.nbytes / 10
+    assert "energy_bands" in compact.memory_report()
+    restored = pickle.loads(pickle.dumps(compact))
+    np.testing.assert_array_equal(restored.energy_global, full.energy_global)
+
+
+def test_spectral_frontend_onset_matches_librosa():
+    sr = 22050
+    rng = np.random.default_rng(0)
+    y = (0.1 * rng.standard_normal(sr * 2)).astype(np.float32)
+    y[sr // 2 : sr // 2 + 500] += 0.9
+    fe = spectral_frontend(y, sr, keep_mag=False)
+    assert fe.S_mag is None and fe.P.dtype == np.float32
+    ref = librosa.onset.onset_strength(y=y, sr=sr, hop_length=512)
+    np.testing.assert_allclose(
+        onset_from_power(fe.P, sr, n_fft=2048, hop=512), ref, rtol=1e-4, atol=1e-4
+    )
+    # bandas y energía global (1 cuadrado cada una) + onset (stft + potencia); más 1 con barras
+    assert analyze_mono(y, sr, compute_beats=False).stats["spectral_passes_eliminated"] == 4
+    res = analyze_mono(y, sr, compute_beats=False, bars=16)
+    assert res.stats["spectral_passes_eliminated"] == 5
+    # a tasa reducida el onset tiene su propia STFT diezmada: no reutiliza la potencia
+    res = analyze_mono(y, sr, compute_beats=False, rhythm_sr=11025)
+    assert res.stats["spectral_passes_eliminated"] == 2
+
+
+def test_multirate_rhythm_matches_full_rate():
+    sr = 44100
+    dur = 12.0
+    rng = np.random.default_rng(0)
+    y = (0.05 * rng.standard_normal(int(sr * dur))).astype(np.float32)
+    for k in range(int(dur / 0.5)):
+        idx = int(k * 0.5 * sr)
+        y[idx : idx + 400] += 0.9 * np.hanning(400)
+    full = analyze_mono(y, sr)
+    multi = analyze_mono(y, sr, rhythm_sr=11025)
+    assert multi.onset_envelope.shape == full.onset_envelope.shape
+    assert abs(multi.tempo_bpm - full.tempo_bpm) < 1.0
+    assert len(multi.beat_frames) == len(full.beat_frames)
+    assert np.abs(multi.beat_frames - full.beat_frames).max() <= 1
+
+
+def test_strided_tempo_matches_librosa_with_an_eighth_of_the_tempogram(monkeypatch):
+    sr, hop = 44100, 512
+    fps = sr / hop
+    rng = np.random.default_rng(3)
+    for bpm in (72.0, 92.0, 128.0, 150.0, 174.0):
+        env = np.abs(rng.standard_normal(int(40 * fps))) * 0.5
+        for k in np.arange(0, env.size, 60 * fps / bpm):
+            env[int(k)] += rng.uniform(1.0, 3.0)
+        ref = librosa.feature.tempo(onset_envelope=env, sr=sr, hop_length=hop)[0]
+        assert tempo_strided(env, sr, hop, stride=8) == ref
+    # La parte cara (una autocorrelación por columna) se evalúa en 1 de cada 8 frames
+    columns = []
+    tempo = librosa.feature.tempo
+
+    def spy(*args, tg=None, **kw):
+        columns.append(tg.shape[1])
+        return tempo(*args, tg=tg, **kw)
+
+    monkeypatch.setattr(librosa.feature, "tempo", spy)
+    tempo_strided(env, sr, hop, stride=8)
+    assert columns == [-(-env.size // 8)]
+
+
+def test_parallel_stages_match_sequential(tmp_path):
+    sr = 22050
+    rng = np.random.default_rng(4)
+    y = (0.1 * rng.standard_normal((int(sr * 6), 2))).astype(np.float32)
+    y[:: sr // 2] += 0.9
+    sf.write(tmp_path / "st.wav", y, 32000)
+    kw = dict(target_sr=sr, n_fft=1024, hop=256, bars=32)
+    seq = analyze_file(tmp_path / "st.wav", workers=1, **kw)
+    par = analyze_file(tmp_path / "st.wav", workers=4, **kw)
+    np.testing.assert_array_equal(seq.S_mag, par.S_mag)
+    np.testing.assert_array_equal(seq.bar_spectrum, par.bar_spectrum)
+    np.testing.assert_array_equal(seq.onset_envelope, par.onset_envelope)
+    np.testing.assert_array_equal(seq.beat_frames, par.beat_frames)
+    for name in seq.energy_bands:
+        np.testing.assert_array_equal(seq.energy_bands[name], par.energy_bands[name])
+    assert par.stats["workers"] == 4
+    assert {"time_decode", "time_stft", "time_bands", "time_rhythm"} <= set(par.stats)
+
+
+def test_time_window_matches_full_track(tmp_path):
+    sr, hop = 22050, 256
+    rng = np.random.default_rng(5)
+    n = sr * 24
+    y = (0.05 * rng.standard_normal(n)).astype(np.float32)
+    y += (
+        0.2
+        * np.sin(2 * np.pi * 80 * np.arange(n) / sr)
+        * (1 + np.sin(2 * np.pi * 0.1 * np.arange(n) / sr))
+    )
+    for k in np.arange(0, 24, 0.5):
+        i = int(k * sr)
+        y[i : i + 300] += 0.8 * np.hanning(300)
+    sf.write(tmp_path / "w.wav", y, sr)
+    cache = AnalysisCache(tmp_path / "cache")
+    kw = dict(target_sr=sr, n_fft=1024, hop=hop)
+    full = analyze_file(tmp_path / "w.wav", cache=cache, **kw)
+    win = analyze_file(tmp_path / "w.wav", start=10.0, duration=6.0, **kw)
+    s0 = int(round(10.0 * sr / hop))
+    T = len(win.times)
+    assert T == 1 + int(6.0 * sr) // hop and win.offset == s0 * hop / sr
+    # Tras el margen de calentamiento el estado del onset es el de la pista completa
+    np.testing.assert_allclose(win.onset_envelope, full.onset_envelope[s0 : s0 + T], atol=1e-5)
+    np.testing.assert_allclose(win.S_mag[:, :-4], full.S_mag[:, s0 : s0 + T - 4], atol=1e-5)
+    assert np.percentile(win.energy_global, 99) == pytest.approx(1.0, abs=1e-3)  # escala local
+    track = analyze_file(
+        tmp_path / "w.wav", start=10.0, duration=6.0, normalization="track", cache=cache, **kw
+    )
+    assert track.stats["norm_from_track"] == 1.0
+    np.testing.assert_allclose(
+        track.energy_bands["bass"][:-4], full.energy_bands["bass"][s0 : s0 + T - 4], atol=1e-5
+    )
+    late = full.beat_frames[(full.beat_frames >= s0 + 200) & (full.beat_frames < s0 + T - 20)] - s0
+    assert np.abs(win.beat_frames[win.beat_frames >= 200][: late.size] - late).max() <= 1
@@ -0,0 +1,66 @@
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from app.core.analysis import analyze_file
+from app.core.analysis_cache import AnalysisCache
+
+
+def _write_tone(path: Path, sr: int = 22050, dur: float = 1.0, freq: float = 110.0) -> Path:
+    t = np.linspace(0, dur, int(sr * dur), endpoint=False)
+    sf.write(path, (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32), sr)
+    return path
+
+
+def test_warm_hit_is_memmapped_and_equal(tmp_path: Path):
+    wav = _write_tone(tmp_path / "tone.wav")
+    cache = AnalysisCache(tmp_path / "cache")
+    cold = analyze_file(wav, target_sr=22050, n_fft=1024, hop=256, compute_beats=False, cache=cache)
+    warm = analyze_file(wav, target_sr=22050, n_fft=1024, hop=256, compute_beats=False, cache=cache)
+    assert isinstance(warm.S_mag, np.memmap)
+    np.testing.assert_array_equal(cold.S_mag, warm.S_mag)
+    np.testing.assert_array_equal(cold.energy_bands["bass"], warm.energy_bands["bass"])
+    assert warm.hop == 256 and warm.tempo_bpm == cold.tempo_bpm
+    assert len(cache.entries()) == 1
+
+
+def test_key_depends_on_params_and_content(tmp_path: Path):
+    wav = _write_tone(tmp_path / "a.wav")
+    cache = AnalysisCache(tmp_path / "cache")
+    k1 = cache.key_for(wav, hop=512)
+    assert k1 == cache.key_for(wav, hop=512)
+    assert k1 != cache.key_for(wav, hop=256)
+    other = _write_tone(tmp_path / "b.wav", freq=220.0)
+    assert k1 != cache.key_for(other, hop=512)
+
+
+def test_prune_evicts_least_recently_used(tmp_path: Path):
+    wav = _write_tone(tmp_path / "a.wav")
+    cache = AnalysisCache(tmp_path / "cache")
+    res = analyze_file(wav, target_sr=22050, n_fft=1024, hop=256, compute_beats=False)
+    for hop in (1, 2, 3):
+        cache.put(cache.key_for(wav, hop=hop), res)
+    size = max(e.size_bytes for e in cache.entries())  # meta.json puede variar en un byte
+    old_key = cache.key_for(wav, hop=1)
+    # Tocar la entrada más antigua la convierte en la más reciente
+    for i, e in enumerate(reversed(cache.entries())):
+        os.utime(e.path / "meta.json", (time.time() - 100 + i, time.time() - 100 + i))
+    assert cache.get(old_key) is not None
+    removed = cache.prune(max_bytes=size)
+    assert len(removed) == 2
+    assert [e.key for e in cache.entries()] == [old_key]
+
+
+def test_cache_without_full_spectrum_uses_lazy_loader(tmp_path: Path):
+    wav = _write_tone(tmp_path / "tone.wav")
+    cache = AnalysisCache(tmp_path / "cache")
+    kw = dict(
+        target_sr=22050, n_fft=1024, hop=256, compute_beats=False, keep_spectrum="none", cache=cache
+    )
+    analyze_file(wav, **kw)
+    warm = analyze_file(wav, **kw)
+    assert warm.S_mag is None
+    assert warm.spectrogram().shape == (513, len(warm.times))
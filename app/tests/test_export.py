@@ -0,0 +1,205 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.core import analysis
+from app.core.media_probe import AudioInfo
+from app.core.preset_manager import Preset
+from app.core.render.export_ffmpeg import (
+    PROFILES,
+    EncoderProfile,
+    FFmpegExporter,
+    audio_passthrough,
+    build_ffmpeg_cmd,
+    encoder_profile,
+    export_file,
+    export_frames,
+)
+from app.core.render.parallel import export_parallel, plan_segments
+from app.core.visual_engine.compositor import FrameRenderer
+from app.tests._fixtures import synthetic_timeline
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="ejecutable de prueba con shebang")
+
+
+def _fake_ffmpeg(tmp_path: Path, *, fail: bool = False, audio: str = "aac (LC)") -> str:
+    # Imita a ffmpeg: lee rawvideo de stdin lentamente y lo copia tal cual al archivo de salida.
+    # Sin rawvideo (sondeo `ffmpeg -i`) imprime el banner de la entrada;
+    # si no, guarda los argumentos en args.txt
+    fake = tmp_path / "ffmpeg"
+    body = (
+        "import sys, time, pathlib\n"
+        "if '-f' not in sys.argv:\n"
+        "    sys.stderr.write('Input #0, mov, from \\'a.m4a\\':\\n'\n"
+        f"                     '  Stream #0:0: Audio: {audio}, 44100 Hz, stereo, fltp\\n')\n"
+        "    sys.exit(1)\n"
+        "pathlib.Path(sys.argv[-1]).with_name('args.txt').write_text(' '.join(sys.argv[1:]))\n"
+        "if sys.argv[sys.argv.index('-f') + 1] == 'concat':\n"
+        "    files = pathlib.Path(sys.argv[sys.argv.index('-i') + 1]).read_text().splitlines()\n"
+        "    data = b''.join(pathlib.Path(f[6:-1]).read_bytes() for f in files)\n"
+        "    pathlib.Path(sys.argv[-1]).write_bytes(data)\n"
+        "    sys.exit(0)\n"
+        "w, h = map(int, sys.argv[sys.argv.index('-s') + 1].split('x'))\n"
+        "out = open(sys.argv[-1], 'wb')\n"
+        "while True:\n"
+        "    chunk = sys.stdin.buffer.read(w * h * 4)\n"
+        "    if not chunk:\n"
+        "        break\n"
+        "    time.sleep(0.002)\n"
+        "    out.write(chunk)\n"
+    )
+    if fail:
+        body = "import sys\nsys.stderr.write('Unknown encoder libx264\\n')\nsys.exit(1)\n"
+    fake.write_text(f"#!{sys.executable}\n" + body)
+    fake.chmod(0o755)
+    return str(fake)
+
+
+def test_profiles_map_to_encoder_args():
+    cmd = build_ffmpeg_cmd(
+        "ffmpeg",
+        "out.mp4",
+        width=1080,
+        height=1920,
+        fps=24,
+        profile=encoder_profile("vertical_1080x1920_24"),
+        audio="song.mp3",
+        audio_start=12.5,
+        duration=30,
+    )
+    assert cmd[cmd.index("-s") + 1] == "1080x1920"
+    assert cmd[cmd.index("-crf") + 1] == str(PROFILES["vertical_1080x1920_24"].crf)
+    assert cmd[cmd.index("-g") + 1] == "48"
+    # El recorte del audio va antes de su -i
+    assert cmd.index("-ss") < cmd.index("song.mp3") and cmd[cmd.index("-ss") + 1] == "12.500000"
+    assert encoder_profile("desconocido") == PROFILES["youtube_1080p24"]
+
+
+def test_exporter_streams_frames_through_reused_buffers(tmp_path: Path):
+    out = tmp_path / "out.raw"
+    exp = FFmpegExporter(
+        out, width=16, height=8, fps=24, buffers=2, ffmpeg=_fake_ffmpeg(tmp_path)
+    ).start()
+    seen = set()
+    for i in range(20):
+        buf = exp.acquire()
+        seen.add(id(buf))
+        buf[...] = i
+        exp.submit(buf)
+    stats = exp.finish()
+    assert len(seen) == 2 and stats.frames == 20 and stats.max_queued <= 2
+    assert stats.waits > 0  # el lector lento obliga al render a esperar
+    data = np.frombuffer(out.read_bytes(), np.uint8).reshape(20, 8, 16, 4)
+    np.testing.assert_array_equal(data[:, 0, 0, 0], np.arange(20))
+
+
+def test_export_frames_matches_renderer(tmp_path: Path):
+    preset = Preset()
+    renderer = FrameRenderer(preset, synthetic_timeline(preset, seconds=0.5), width=64, height=36)
+    out = tmp_path / "out.raw"
+    done = []
+    stats = export_frames(
+        renderer, out, ffmpeg=_fake_ffmpeg(tmp_path), progress=lambda d, t: done.append(d)
+    )
+    assert stats.frames == renderer.n_frames == done[-1]
+    data = np.frombuffer(out.read_bytes(), np.uint8).reshape(-1, 36, 64, 4)
+    np.testing.assert_array_equal(data[5], renderer.render(5))
+
+
+def test_export_failure_and_cancel(tmp_path: Path):
+    preset = Preset()
+    renderer = FrameRenderer(preset, synthetic_timeline(preset, seconds=0.5), width=64, height=36)
+    bad = tmp_path / "bad"
+    bad.mkdir()
+    with pytest.raises(RuntimeError, match="libx264"):
+        export_frames(renderer, tmp_path / "x.mp4", ffmpeg=_fake_ffmpeg(bad, fail=True))
+    cancel = threading.Event()
+    cancel.set()
+    out = tmp_path / "c.raw"
+    stats = export_frames(renderer, out, ffmpeg=_fake_ffmpeg(tmp_path), cancel=cancel)
+    assert stats.frames == 0 and not out.exists()
+
+
+def test_audio_passthrough_rule():
+    prof = PROFILES["youtube_1080p24"]
+    assert audio_passthrough(
+        AudioInfo(codec_name="aac", profile="LC", sample_rate=48000, channels=2), prof
+    )
+    assert not audio_passthrough(
+        AudioInfo(codec_name="aac", profile="HE-AAC", sample_rate=44100, channels=2), prof
+    )
+    assert not audio_passthrough(AudioInfo(codec_name="mp3", sample_rate=44100, channels=2), prof)
+    assert not audio_passthrough(AudioInfo(codec_name="aac", sample_rate=22050, channels=2), prof)
+    assert not audio_passthrough(None, prof)
+
+
+@pytest.mark.parametrize("codec, mode", [("aac (LC)", "copy"), ("mp3 (mp3float)", "aac")])
+def test_export_copies_compatible_aac(tmp_path: Path, codec: str, mode: str):
+    preset = Preset()
+    renderer = FrameRenderer(preset, synthetic_timeline(preset, seconds=0.2), width=32, height=18)
+    src = tmp_path / "song.m4a"
+    src.write_bytes(b"")
+    stats = export_frames(
+        renderer, tmp_path / "out.raw", audio=src, ffmpeg=_fake_ffmpeg(tmp_path, audio=codec)
+    )
+    args = (tmp_path / "args.txt").read_text()
+    assert stats.audio == mode
+    assert ("-c:a copy" in args) == (mode == "copy")
+
+
+def test_plan_segments_cut_on_gop_boundaries():
+    ranges = plan_segments(250, 4, 48)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 250
+    assert all(a % 48 == 0 for a, _ in ranges)
+    assert all(b == a2 for (_, b), (a2, _) in zip(ranges, ranges[1:]))
+    assert plan_segments(30, 8, 48) == [(0, 30)]
+
+
+def test_parallel_export_concatenates_frame_exact(tmp_path: Path):
+    preset = Preset()
+    tl = synthetic_timeline(preset, seconds=1.0)
+    ffmpeg = _fake_ffmpeg(tmp_path)
+    serial = tmp_path / "serial.raw"
+    export_frames(FrameRenderer(preset, tl, width=32, height=18), serial, ffmpeg=ffmpeg)
+    out = tmp_path / "par.raw"
+    stats = export_parallel(
+        preset,
+        tl,
+        out,
+        workers=2,
+        segments=3,
+        width=32,
+        height=18,
+        ffmpeg=ffmpeg,
+        profile=EncoderProfile(gop_seconds=0.25),
+    )
+    assert len(stats.ranges) == 3 and stats.frames == tl.n_frames
+    assert out.read_bytes() == serial.read_bytes()
+    assert not list(tmp_path.glob(".segments.*"))
+
+
+def test_export_file_analyzes_with_the_preset_parameters(tmp_path: Path, monkeypatch):
+    calls = []
+
+    def spy(*args, **kw):
+        calls.append(kw)
+        return rhythm_decimated(*args, **kw)
+
+    rhythm_decimated = analysis.rhythm_decimated
+    monkeypatch.setattr(analysis, "rhythm_decimated", spy)
+    sr = 44100
+    y = np.zeros(sr, dtype=np.float32)
+    y[:: sr // 4] = 0.9
+    sf.write(tmp_path / "clicks.wav", y, sr)
+    preset = Preset()
+    preset.output.resolution.width, preset.output.resolution.height = 32, 18
+    preset.audio.analysis.rhythm_sr = 11025
+    out = tmp_path / "out.raw"
+    export_file(tmp_path / "clicks.wav", preset, out, ffmpeg=_fake_ffmpeg(tmp_path))
+    # rhythm_sr < sr: analyze_mono toma el camino multi-tasa
+    assert [kw["rhythm_sr"] for kw in calls] == [11025]
+    assert out.stat().st_size > 0
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.core.analysis import analyze_mono
+from app.core.filterbank import band_filterbank, bar_edges, bar_filterbank, fft_freqs
+
+
+def test_filterbank_is_cached_and_matches_band_masks():
+    sr, n_fft = 44100, 2048
+    bands = [[20, 160], [160, 2000], [2000, 16000]]
+    fb = band_filterbank(sr, n_fft, bands)
+    assert fb is band_filterbank(sr, n_fft, [(20, 160), (160, 2000), (2000, 16000)])
+    freqs = fft_freqs(sr, n_fft)
+    for i, (lo, hi) in enumerate(bands):
+        expected = np.flatnonzero((freqs >= lo) & (freqs < hi))
+        np.testing.assert_array_equal(fb[i].indices, expected)
+
+
+def test_bar_filterbank_has_no_empty_bars():
+    for dist in ("log", "linear"):
+        fb = bar_filterbank(44100, 2048, 128, distribution=dist)
+        assert fb.shape == (128, 1025)
+        assert (np.diff(fb.indptr) > 0).all()
+    edges = bar_edges(4, fmin=100, fmax=1600, distribution="log")
+    np.testing.assert_allclose([lo for lo, _ in edges], [100, 200, 400, 800])
+
+
+def test_bar_spectrum_in_analysis():
+    sr = 22050
+    t = np.linspace(0, 1.0, sr, endpoint=False)
+    y = (0.5 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+    res = analyze_mono(y, sr, compute_beats=False, bars=96, bar_distribution="linear")
+    assert res.bar_spectrum.shape == (96, len(res.times))
+    peak_bar = int(np.argmax(res.bar_spectrum.mean(axis=1)))
+    lo, hi = bar_edges(96, fmin=20, fmax=sr / 2, distribution="linear")[peak_bar]
+    assert lo <= 1000 < hi + 20
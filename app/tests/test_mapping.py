@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.core.mapping import EnvelopeFollower, _follow_numpy, coeff_from_ms
+from app.core.preset_manager import VisualMapping
+
+
+def _feed_loop(env: EnvelopeFollower, x) -> np.ndarray:
+    return np.array([env.feed(float(v)) for v in x])
+
+
+def test_process_is_bit_identical_to_feed():
+    x = np.random.default_rng(0).random(5000)
+    ref = _feed_loop(EnvelopeFollower(attack=0.3, release=0.05), x)
+    env = EnvelopeFollower(attack=0.3, release=0.05)
+    np.testing.assert_array_equal(env.process(x), ref)
+    assert env.value == ref[-1]
+
+
+def test_chunked_processing_carries_state():
+    x = np.random.default_rng(1).random((8, 3000)).astype(np.float32)
+    whole = EnvelopeFollower(attack=0.4, release=0.1).process(x)
+    env = EnvelopeFollower(attack=0.4, release=0.1)
+    parts = [env.process(x[:, i : i + 700]) for i in range(0, x.shape[1], 700)]
+    np.testing.assert_array_equal(np.concatenate(parts, axis=1), whole)
+    assert whole.dtype == np.float32
+    row = _feed_loop(EnvelopeFollower(attack=0.4, release=0.1), x[3])
+    np.testing.assert_array_equal(whole[3], row.astype(np.float32))
+    # El estado por fila va aparte: `feed` sigue siendo escalar
+    assert env.value == 0.0 and env.row_state.shape == (8,)
+    assert env.feed(1.0) == 0.4
+    with pytest.raises(ValueError):
+        env.process(x[:4])
+    env.reset()
+    np.testing.assert_array_equal(env.process(x), whole)
+    # El fallback de NumPy hace las mismas operaciones
+    out = np.empty_like(x)
+    _follow_numpy(x, np.zeros(8), 0.4, 0.1, out)
+    np.testing.assert_array_equal(out, whole)
+
+
+def test_coefficients_from_mapping():
+    fps = 44100 / 512
+    env = EnvelopeFollower.from_mapping(VisualMapping(attack_ms=80, release_ms=220), fps)
+    assert env.attack == coeff_from_ms(80, fps) and env.attack > env.release > 0
+    # Tras attack_ms un escalón recorre 1 - 1/e del salto
+    step = env.process(np.ones(int(round(0.080 * fps))))
+    assert abs(step[-1] - (1 - np.exp(-round(0.080 * fps) / (0.080 * fps)))) < 1e-9
+    assert coeff_from_ms(0, fps) == 1.0
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.core.media_probe import decode_pcm, parse_ffmpeg_banner
+
+BANNER = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'song.m4a':
+  Metadata:
+    major_brand     : M4A
+  Duration: 00:03:21.45, start: 0.000000, bitrate: 258 kb/s
+  Stream #0:0[0x1](und): Audio: aac (LC) (mp4a / 0x6134706D), 48000 Hz, stereo, fltp, 256 kb/s (default)
+Stream mapping:
+  Stream #0:0 -> #0:0 (aac (native) -> pcm_f32le (native))
+Output #0, f32le, to 'pipe:1':
+  Stream #0:0(und): Audio: pcm_f32le, 44100 Hz, mono, flt, 1411 kb/s (default)
+"""
+
+
+def test_parse_ffmpeg_banner():
+    info = parse_ffmpeg_banner(BANNER)
+    assert info.format_name == "mov,mp4,m4a,3gp,3g2,mj2"
+    assert info.codec_name == "aac" and info.profile == "LC"
+    assert info.sample_rate == 48000 and info.channels == 2 and info.channel_layout == "stereo"
+    assert info.duration == pytest.approx(201.45)
+    mp3 = parse_ffmpeg_banner(
+        "  Stream #0:0: Audio: mp3 (mp3float), 44100 Hz, 5.1(side), fltp, 320 kb/s"
+    )
+    assert mp3.codec_name == "mp3" and mp3.profile == "" and mp3.channels == 6
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="ejecutable de prueba con shebang")
+def test_decode_pcm_reads_pipe_into_single_buffer(tmp_path: Path):
+    # Ejecutable que imita a ffmpeg: banner por stderr y f32le por stdout.
+    # La duración anunciada (1 s) es menor que la real (3 s) para forzar el crecimiento del buffer.
+    fake = tmp_path / "ffmpeg"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import sys, numpy as np\n"
+        "sr = int(sys.argv[sys.argv.index('-ar') + 1])\n"
+        "sys.stderr.write('Input #0, mp3, from \\'x.mp3\\':\\n')\n"
+        "sys.stderr.write('  Duration: 00:00:01.00, start: 0.0, bitrate: 128 kb/s\\n')\n"
+        "sys.stderr.write('  Stream #0:0: Audio: mp3 (mp3float), 48000 Hz, stereo, fltp, ')\n"
+        "sys.stderr.write('128 kb/s\\n')\n"
+        "sys.stderr.write('Stream mapping:\\n')\n"
+        "sys.stderr.flush()\n"
+        "sys.stdout.buffer.write(np.arange(3 * sr, dtype='<f4').tobytes())\n"
+    )
+    fake.chmod(0o755)
+    src = tmp_path / "x.mp3"
+    src.write_bytes(b"")
+    data, info = decode_pcm(src, sr=8000, mono="mix", ffmpeg=str(fake))
+    assert data.shape == (1, 24000) and data.dtype == np.float32
+    np.testing.assert_array_equal(data[0], np.arange(24000, dtype=np.float32))
+    assert info.sample_rate == 48000 and info.channels == 2 and info.codec_name == "mp3"
+
+
+def test_decode_pcm_missing_binary(tmp_path: Path):
+    src = tmp_path / "x.wav"
+    src.write_bytes(b"")
+    with pytest.raises(RuntimeError):
+        decode_pcm(src, sr=8000, ffmpeg=str(tmp_path / "nope"))
@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+
+from app.core.preset_manager import Preset
+from app.core.render.frame_cache import Filmstrip, FrameCache
+from app.core.render.playback import (
+    AdaptiveQuality,
+    PlaybackClock,
+    PreviewPlayer,
+    preview_size,
+    proxy_size,
+)
+from app.core.render.preview import frame_to_qimage
+from app.core.visual_engine.compositor import FrameRenderer, render_key
+from app.tests._fixtures import synthetic_timeline
+
+
+class _FakeTime:
+    def __init__(self) -> None:
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_clock_interpolates_and_resyncs_to_audio():
+    now = _FakeTime()
+    clock = PlaybackClock(resync=0.04, time_fn=now)
+    clock.play()
+    now.t += 0.5
+    assert abs(clock.now() - 0.5) < 1e-9
+    clock.sync(0.52)  # dentro de la tolerancia: no salta
+    assert abs(clock.now() - 0.5) < 1e-9
+    clock.sync(0.7)  # el audio va por delante: re-ancla
+    assert abs(clock.now() - 0.7) < 1e-9
+    clock.pause()
+    now.t += 1.0
+    assert abs(clock.now() - 0.7) < 1e-9
+    clock.seek(3.0)
+    assert clock.now() == 3.0 and not clock.playing
+
+
+def test_player_drops_late_frames_and_never_writes_displayed_buffer():
+    preset = Preset()
+    tl = synthetic_timeline(preset, seconds=2.0)
+    now = _FakeTime()
+    renderer = FrameRenderer(preset, tl, width=96, height=54, buffers=1, quality="preview")
+    player = PreviewPlayer(renderer, PlaybackClock(time_fn=now))
+    player.play()
+    # Frame 0, y nada más hasta que avance el reloj
+    assert player.render_due() and not player.render_due()
+    idx, shown = player.acquire()  # la UI está pintando el frame 0
+    now.t += 10.5 / tl.fps  # render lento: el reloj ya va por el frame 10
+    assert player.render_due()
+    assert player.stats.skipped == 9  # 1..9 no se renderizan ni se encolan
+    now.t += 1.0 / tl.fps
+    assert player.render_due()
+    assert player.stats.unshown == 1  # el 10 se reemplazó por el 11 antes de pintarse
+    # Mientras la UI retiene el buffer del frame 0, el hilo escribe en los otros
+    assert idx == 0 and player._bufs[player._latest] is not shown
+    player.release()
+    idx, _ = player.acquire()
+    player.release()
+    assert idx == 11 and player.stats.shown == 2 and player.stats.dropped == 10
+    # Al final de la timeline el reloj se detiene en el último frame
+    now.t += 10.0
+    assert player.render_due() and not player.playing
+    assert player._latest_index == tl.n_frames - 1
+
+
+def test_player_thread_and_zero_copy_qimage():
+    preset = Preset()
+    tl = synthetic_timeline(preset, seconds=0.5)
+    player = PreviewPlayer(
+        FrameRenderer(preset, tl, width=64, height=36, buffers=1, quality="preview")
+    )
+    player.start()
+    try:
+        player.seek(0.25)
+        deadline = time.monotonic() + 10.0
+        while not player.sequence and time.monotonic() < deadline:
+            time.sleep(0.01)
+        got = player.acquire()
+        assert got is not None and got[0] == player.frame_at(0.25)
+        frame = got[1]
+        image = frame_to_qimage(frame)
+        frame[0, 0] = (1, 2, 3, 255)  # la QImage ve el cambio: comparte la memoria del buffer
+        assert (image.width(), image.height()) == (64, 36)
+        assert image.pixelColor(0, 0).getRgb() == (1, 2, 3, 255)
+        player.release()
+    finally:
+        player.stop()
+    assert preview_size(1920, 1080) == (960, 540) and preview_size(1080, 1920) == (540, 960)
+
+
+def test_adaptive_proxy_degrades_while_playing_and_restores_on_pause():
+    preset = Preset()  # salida 1920x1080
+    tl = synthetic_timeline(preset, seconds=2.0)
+    # Cabe en el widget con el aspecto de la salida
+    assert proxy_size(1920, 1080, (800, 800)) == (800, 450)
+    # Nunca más que la salida
+    assert proxy_size(1920, 1080, (4000, 4000), max_side=4000) == (1920, 1080)
+    assert proxy_size(1920, 1080, (800, 800), scale=0.5) == (400, 224)
+    now = _FakeTime()
+    # Todo frame va tarde
+    quality = AdaptiveQuality(preset, tl, view=(400, 400), budget_ms=1e-6, patience=2)
+    player = PreviewPlayer(quality.build(), PlaybackClock(time_fn=now), quality=quality)
+    assert (player.renderer.width, player.renderer.height) == (400, 224)
+    assert len(player.renderer.layers) == 4
+    player.play()
+    for _ in range(12):
+        player.render_due()
+        now.t += 1.0 / tl.fps
+    assert quality.level == len(quality.levels) - 1
+    assert (player.renderer.width, player.renderer.height) == (200, 112)
+    assert len(player.renderer.layers) == 3  # sin glow del anillo
+    _, shown = player.acquire()  # la UI pinta un frame del proxy reducido
+    player.pause()
+    # El frame de la pausa, con la calidad completa
+    assert player.render_due() and not player.render_due()
+    assert quality.level == 0 and player._latest_index == player.frame_at(player.clock.now())
+    assert player._bufs[player._latest].shape == (224, 400, 4) and shown.shape == (112, 200, 4)
+    assert player._bufs[player._in_use] is shown
+    player.release()
+    player.set_view(800, 800)
+    assert player.render_due() and player._bufs[player._latest].shape == (450, 800, 4)
+
+
+def test_frame_cache_serves_scrubbing_and_invalidates_on_render_fields():
+    preset = Preset()
+    key = render_key(preset)
+    preset.meta.name = "Otro nombre"
+    preset.output.profile = "youtube_4k24"
+    assert render_key(preset) == key  # no cambian los píxeles
+    tuned = preset.model_copy(deep=True)
+    tuned.visual.mapping.release_ms += 40
+    assert render_key(tuned) != key
+
+    tl = synthetic_timeline(preset, seconds=2.0)
+    frame_bytes = 96 * 54 * 4
+    cache = FrameCache(max_bytes=4 * frame_bytes)
+    now = _FakeTime()
+    renderer = FrameRenderer(preset, tl, width=96, height=54, buffers=1, quality="preview")
+    player = PreviewPlayer(renderer, PlaybackClock(time_fn=now), cache=cache)
+    for t in (0.5, 0.6, 0.5):  # ir y volver sobre la misma sección
+        player.seek(t)
+        assert player.render_due()
+    assert player.stats.rendered == 2 and player.stats.cached == 1
+    assert np.array_equal(player._bufs[player._latest], renderer.render(player.frame_at(0.5)))
+    for t in (1.0, 1.1, 1.2, 1.3):
+        player.seek(t)
+        player.render_due()
+    # Tope de memoria: expulsa los más viejos
+    assert len(cache) == 4 and cache.nbytes == 4 * frame_bytes
+    player.seek(0.5)
+    player.render_due()
+    assert player.stats.rendered == 7
+    # Un preset con otra huella no reutiliza frames y `retain` libera los anteriores
+    other = FrameRenderer(tuned, tl, width=96, height=54, buffers=1, quality="preview")
+    assert cache.get((other.key, 96, 54, "preview", player.frame_at(0.5))) is None
+    assert cache.retain(other.key) == 4 and len(cache) == 0
+
+
+def test_filmstrip_fills_coarse_to_fine_and_answers_any_time():
+    preset = Preset()
+    tl = synthetic_timeline(preset, seconds=8.0)
+    strip = Filmstrip(preset, tl, count=8, side=64)
+    assert strip.size == (64, 36) and strip.thumbnail_at(3.0) is None
+    strip.step()
+    strip.step()  # primero el principio y la mitad de la pista
+    assert strip.thumbnail_at(7.5)[0] == 4 and strip.thumbnail_at(0.2)[0] == 0
+    strip.start()
+    deadline = time.monotonic() + 10.0
+    while not strip.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    strip.stop()
+    k, thumb = strip.thumbnail_at(strip.time_of(5) + 0.1)
+    assert k == 5 and thumb.shape == (36, 64, 4) and thumb[..., 3].min() == 255
@@ -0,0 +1,158 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.core.preset_manager import Preset
+from app.core.visual_engine.bars import RadialBars
+from app.core.visual_engine.center_image import CenterImage, image_mips
+from app.core.visual_engine.compositor import FrameRenderer
+from app.core.visual_engine.glow import Glow
+from app.core.visual_engine.raster import new_frame, parse_color, polar_grid
+from app.core.visual_engine.ring import ReactiveRing
+from app.tests._fixtures import synthetic_timeline
+
+
+def _preset(**center) -> Preset:
+    p = Preset()
+    p.background.type = "solid"
+    p.background.colors = ["#102030"]
+    p.visual.bars.count = 8
+    p.visual.mode.ring = False
+    p.center_image.path = center.get("path", "")
+    return p
+
+
+def test_renderer_reuses_preallocated_buffers():
+    preset = Preset()
+    tl = synthetic_timeline(preset, seconds=1.0)
+    r = FrameRenderer(preset, tl, width=320, height=180, buffers=2)
+    a, b, c = r.render(0), r.render(1), r.render(2)
+    assert a.shape == (180, 320, 4) and a.dtype == np.uint8 and a.flags.c_contiguous
+    assert a is c and a is not b
+    out = np.zeros_like(a)
+    assert r.render(3, out=out) is out and (out[..., 3] == 255).all()
+
+
+def test_bars_drawn_from_height_vector():
+    preset = _preset()
+    r = FrameRenderer(preset, width=200, height=200)
+    bg = parse_color("#102030")[:3]
+    heights = np.zeros(8, np.float32)
+    heights[0] = 0.4  # barra 0: hacia arriba
+    frame = r.render_state({"t": 0.0, "bars": heights})
+    # unidad = 100 px; base 0.35 -> la barra ocupa ~35..75 px por encima del centro
+    assert tuple(frame[100 - 55, 100, :3]) != bg
+    assert tuple(frame[100 + 55, 100, :3]) == bg  # barra 4 (abajo) a altura 0
+    assert tuple(frame[100 - 90, 100, :3]) == bg  # por encima de la altura
+
+
+def test_center_image_composited_with_alpha(tmp_path: Path):
+    img = np.zeros((64, 64, 4), np.uint8)
+    img[:, :32] = (255, 0, 0, 255)  # mitad izquierda opaca, derecha transparente
+    Image.fromarray(img).save(tmp_path / "logo.png")
+    preset = _preset(path=str(tmp_path / "logo.png"))
+    preset.visual.mode.bars = False
+    r = FrameRenderer(preset, width=200, height=200)
+    frame = r.render_state({"t": 0.0, "scale": 1.0, "rotation": 0.0})
+    assert tuple(frame[100, 90, :3]) == (255, 0, 0)
+    assert tuple(frame[100, 110, :3]) == parse_color("#102030")[:3]
+    rotated = r.render_state({"t": 0.0, "scale": 1.0, "rotation": 180.0}).copy()
+    assert tuple(rotated[100, 110, :3]) == (255, 0, 0)
+
+
+def test_static_layer_cache_matches_full_render(tmp_path: Path):
+    img = np.zeros((40, 40, 4), np.uint8)
+    img[..., 0] = 200
+    img[..., 3] = np.linspace(0, 255, 40, dtype=np.uint8)[None, :]  # borde semitransparente
+    Image.fromarray(img).save(tmp_path / "logo.png")
+    preset = Preset()
+    preset.background.type = "gradient"
+    preset.background.anim.speed = 0.0
+    preset.center_image.path = str(tmp_path / "logo.png")
+    preset.center_image.reactivity.scale_on_beat = 0.0
+    preset.center_image.reactivity.rotate_per_sec = 0.0
+    preset.center_image.reactivity.shake = 0.0
+    tl = synthetic_timeline(preset, seconds=1.0)
+    cached = FrameRenderer(preset, tl, width=160, height=90, buffers=2)
+    plain = FrameRenderer(preset, tl, width=160, height=90, cache_static=False)
+    assert cached.cached_layers == 2 and plain.cached_layers == 0  # fondo + imagen central
+    for i in (0, 5, 3, 9, 9, 1):
+        diff = np.abs(cached.render(i).astype(int) - plain.render(i).astype(int))
+        assert diff.max() <= 1, i  # redondeo del alfa reconstruido en el borde del sprite
+
+
+def test_polar_layers_antialiased_and_fallback_matches():
+    heights = np.linspace(0.05, 0.4, 24).astype(np.float32)
+    layers = [
+        RadialBars(24, base_radius=0.3, max_height=0.45, roundness=0.6, color=(250, 200, 100, 255)),
+        ReactiveRing(0.3, 0.03, max_radius=0.36, color=(255, 255, 255, 200)),
+    ]
+    frames = []
+    for use_numba in (True, False):
+        frame = new_frame(240, 160)
+        for layer in layers:
+            layer.use_numba = use_numba
+            layer.prepare(240, 160)
+            layer.render(frame, {"bars": heights, "ring_radius": 0.33})
+        frames.append(frame)
+    diff = np.abs(frames[0].astype(int) - frames[1].astype(int))
+    assert diff.max() <= 1
+    red = frames[1][..., 0]
+    assert ((red > 0) & (red < 250)).sum() > 50  # bordes con cobertura parcial
+    # Barras y anillo comparten la misma rejilla polar (vistas, sin copias)
+    r_bars, _ = polar_grid(240, 160, layers[0].box)
+    assert np.shares_memory(r_bars, layers[1]._r)
+
+
+def test_glow_pyramid_halo_and_fallback_matches():
+    ring = ReactiveRing(0.5, 0.03, max_radius=0.6, color=(255, 255, 255, 255))
+    ring.prepare(240, 240)
+    for quality in ("preview", "final"):
+        frames = []
+        for use_numba in (True, False):
+            glow = Glow([ring], strength=0.8, radius=0.1, quality=quality)
+            glow.use_numba = use_numba
+            glow.prepare(240, 240)
+            frame = new_frame(240, 240)
+            ring.render(frame, {"ring_radius": 0.5})
+            glow.render(frame, {"ring_radius": 0.5})
+            frames.append(frame)
+        diff = np.abs(frames[0].astype(int) - frames[1].astype(int))
+        assert diff.max() <= 1, quality
+        row = frames[0][120, :, 0]
+        # unidad = 120 px: anillo en x = 180; halo a unos px del borde, nada lejos de él
+        assert row[190] > 0 and row[170] > 0
+        assert row[5] == 0 and row[120] < row[170] / 4  # decae lejos del anillo
+    # Bloom de una fuente estática: la pirámide se calcula una vez y la intensidad va por frame
+    bloom = Glow([ring], strength=1.0, key="bloom", frozen=True)
+    bloom.prepare(240, 240)
+    assert bloom.dirty_box({"bloom": 0.0}).empty
+    a, b = new_frame(240, 240), new_frame(240, 240)
+    bloom.render(a, {"ring_radius": 0.5, "bloom": 0.5})
+    bloom.render(b, {"ring_radius": 0.5, "bloom": 1.0})
+    assert bloom._ready and b[120, 186, 0] > a[120, 186, 0] > 0
+
+
+def test_center_image_prescaled_mips_shared_and_fallback_matches(tmp_path: Path):
+    yy, xx = np.mgrid[:600, :600]
+    img = np.dstack(
+        [xx % 256, yy % 256, np.full_like(xx, 90), np.where(xx < 450, 255, 100)]
+    ).astype(np.uint8)
+    Image.fromarray(img).save(tmp_path / "big.png")
+    frames = []
+    for use_numba in (True, False):
+        layer = CenterImage(str(tmp_path / "big.png"), radius=0.3, max_scale=1.2)
+        layer.use_numba = use_numba
+        layer.prepare(160, 120)
+        # unidad = 60 px: a escala máxima ocupa 2 * 0.3 * 60 * 1.2 = 44 px; no se guarda más que eso
+        assert max(layer._levels[0].shape[:2]) == 44 and layer.nbytes < 44 * 44 * 4 * 2
+        frame = new_frame(160, 120)
+        layer.render(frame, {"scale": 1.0, "rotation": 30.0})
+        frames.append(frame)
+    assert np.abs(frames[0].astype(int) - frames[1].astype(int)).max() <= 1
+    assert layer.level_for(1.0) == 0 and layer.level_for(0.5) == 1 and layer.level_for(0.25) == 2
+    # Misma imagen y tamaño: los niveles se reutilizan sin decodificar de nuevo
+    assert image_mips(str(tmp_path / "big.png"), 44) is layer._levels
+    # Semitransparente (alfa 100, premultiplicado) sobre fondo negro: más oscuro que el opaco
+    assert frames[0][60, 80, 3] == 255 and frames[0][60, 80, :3].sum() > 0
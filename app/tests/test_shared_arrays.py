@@ -0,0 +1,46 @@
+import multiprocessing as mp
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app.core.preset_manager import Preset
+from app.core.shared_arrays import (
+    attach,
+    attach_analysis,
+    attach_timeline,
+    share_analysis,
+    share_timeline,
+)
+from app.tests._fixtures import synthetic_analysis, synthetic_timeline
+
+
+def _worker_sum(handle) -> float:
+    return float(attach(handle)["bar_spectrum"].sum(dtype=np.float64))
+
+
+def test_analysis_round_trip_read_only_views(tmp_path: Path):
+    res = synthetic_analysis(10.0, bars=16)
+    with share_analysis(res, directory=tmp_path) as shared:
+        assert len(pickle.dumps(shared.handle)) < 4096
+        got = attach_analysis(pickle.loads(pickle.dumps(shared.handle)))
+        assert got.sr == res.sr and got.tempo_bpm == res.tempo_bpm and got.S_mag is None
+        np.testing.assert_array_equal(got.bar_spectrum, res.bar_spectrum)
+        np.testing.assert_array_equal(got.energy_bands["bass"], res.energy_bands["bass"])
+        assert not got.bar_spectrum.flags.writeable
+        assert all(v.ctypes.data % 64 == 0 for v in attach(shared.handle).values() if v.size)
+        # Varios procesos leen el mismo bloque sin recibir los arrays
+        with ProcessPoolExecutor(2, mp_context=mp.get_context("spawn")) as pool:
+            sums = list(pool.map(_worker_sum, [shared.handle] * 2))
+        assert sums == [float(res.bar_spectrum.sum(dtype=np.float64))] * 2
+    assert not Path(shared.handle.path).exists()
+
+
+def test_timeline_round_trip(tmp_path: Path):
+    tl = synthetic_timeline(Preset(), seconds=1.0)
+    with share_timeline(tl, directory=tmp_path) as shared:
+        got = attach_timeline(shared.handle)
+    assert got.fps == tl.fps and got.n_frames == tl.n_frames
+    np.testing.assert_array_equal(got.shake, tl.shake)
+    np.testing.assert_array_equal(got.bars, tl.bars)
@@ -0,0 +1,149 @@
+import threading
+from pathlib import Path
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from app.core.analysis import analyze_file
+from app.core.spectrogram_tiles import (
+    SpectrogramTiles,
+    TileWorker,
+    array_source,
+    quantize_db,
+    row_bins,
+    tile_db,
+)
+
+SR, N_FFT, HOP = 8000, 512, 128
+
+
+def _chirp(tmp_path: Path, seconds: float = 12.0) -> tuple[Path, np.ndarray]:
+    t = np.arange(int(SR * seconds)) / SR
+    y = (0.5 * np.sin(2 * np.pi * (100.0 * t + 120.0 * t**2))).astype(np.float32)
+    wav = tmp_path / "chirp.wav"
+    sf.write(wav, y, SR, subtype="FLOAT")
+    return wav, y
+
+
+def _brute_force(y: np.ndarray, distribution: str, rows: int) -> np.ndarray:
+    P = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP, window="hann", center=True)) ** 2
+    lo, hi = row_bins(SR, N_FFT, rows, distribution)
+    return quantize_db(np.stack([P[a:b].max(axis=0) for a, b in zip(lo, hi)]), N_FFT)
+
+
+def test_base_tiles_match_stft_quantized_from_audio_and_from_matrix(tmp_path: Path):
+    wav, y = _chirp(tmp_path)
+    res = analyze_file(
+        wav, target_sr=SR, n_fft=N_FFT, hop=HOP, compute_beats=False, keep_spectrum="none"
+    )
+    kw = dict(rows=64, cols=32, base_chunk=3, root=tmp_path / "tiles")
+    tiles = SpectrogramTiles.from_analysis(res, wav, distribution="linear", **kw)
+    ref = _brute_force(y, "linear", 64)
+    assert tiles.n_frames == ref.shape[1] and res.S_mag is None
+    got = np.concatenate([tiles.tile(0, ix) for ix in range(tiles.tiles_in(0))], axis=1)
+    # decodificando solo cada tramo (center=False, relleno de center a mano) sale la misma STFT
+    assert np.abs(got[:, : ref.shape[1]].astype(int) - ref).max() <= 1
+    assert not got[:, ref.shape[1] :].any()  # columnas más allá del final
+    S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP, window="hann", center=True))
+    mat = SpectrogramTiles(
+        array_source(S),
+        sr=SR,
+        n_fft=N_FFT,
+        hop=HOP,
+        n_frames=S.shape[1],
+        distribution="linear",
+        rows=64,
+        cols=32,
+    )
+    np.testing.assert_array_equal(mat.tile(0, 5), ref[:, 160:192])
+    # seno de amplitud 0.5 -> ~-6 dBFS en la fila de su frecuencia (menos el festoneo de la Hann)
+    assert -8.0 < tile_db(ref).max(axis=0)[len(y) // HOP // 2] < -5.0
+
+
+def test_coarser_levels_are_max_pooled_and_log_rows_follow_bar_distribution(tmp_path: Path):
+    rng = np.random.default_rng(3)
+    S = rng.random((N_FFT // 2 + 1, 1000), dtype=np.float32) * 50.0
+    tiles = SpectrogramTiles(
+        array_source(S),
+        sr=SR,
+        n_fft=N_FFT,
+        hop=HOP,
+        n_frames=1000,
+        distribution="log",
+        rows=48,
+        cols=64,
+    )
+    assert [tiles.tiles_in(k) for k in range(tiles.n_levels)] == [16, 8, 4, 2, 1]
+    base = np.concatenate([tiles.tile(0, ix) for ix in range(16)], axis=1)
+    for k in (1, 2, 4):
+        level = np.concatenate([tiles.tile(k, ix) for ix in range(tiles.tiles_in(k))], axis=1)
+        pooled = base.reshape(48, -1, 1 << k).max(axis=2)
+        np.testing.assert_array_equal(level[:, : pooled.shape[1]], pooled)
+    lo, hi = row_bins(SR, N_FFT, 48, "log")
+    # más anchas hacia agudos, hasta Nyquist
+    assert (np.diff(hi - lo) >= 0).all() and hi[-1] == N_FFT // 2
+
+
+def test_tiles_are_reused_from_disk_and_view_fetches_only_visible(tmp_path: Path):
+    calls = []
+    S = np.ones((N_FFT // 2 + 1, 20000), dtype=np.float32)
+
+    def source(f0, f1):
+        calls.append((f0, f1))
+        return S[:, f0:f1]
+
+    kw = dict(
+        sr=SR,
+        n_fft=N_FFT,
+        hop=HOP,
+        n_frames=S.shape[1],
+        rows=32,
+        cols=64,
+        base_chunk=4,
+        key="ab" * 16,
+        root=tmp_path,
+    )
+    tiles = SpectrogramTiles(source, **kw)
+    t0, t1 = 100.0, 104.0  # 250 frames de 20000
+    level, ixs = tiles.visible(t0, t1, 200)
+    assert level == 1 and len(ixs) <= 250 // 128 + 2
+    for ix in ixs:
+        a, b = tiles.tile_span(level, ix)
+        assert b > t0 and a < t1
+        tiles.tile(level, ix)
+    # solo se decodificaron los tramos del nivel 0 bajo la vista
+    assert all(
+        f0 >= (ixs[0] * 2 // 4) * 4 * 64 and f1 <= (ixs[-1] * 2 // 4 + 1) * 4 * 64
+        for f0, f1 in calls
+    )
+    computed = tiles.computed
+    again = SpectrogramTiles(source, **kw)
+    n_calls = len(calls)
+    for ix in ixs:
+        np.testing.assert_array_equal(again.cached(level, ix), tiles.tile(level, ix))
+    assert again.computed == 0 and len(calls) == n_calls and computed > 0
+    other = SpectrogramTiles(source, **dict(kw, key="cd" * 16))
+    assert other.cached(level, ixs[0]) is None
+
+
+def test_worker_fills_coarse_tile_progressively():
+    S = np.ones((N_FFT // 2 + 1, 4000), dtype=np.float32)
+    tiles = SpectrogramTiles(
+        array_source(S), sr=SR, n_fft=N_FFT, hop=HOP, n_frames=4000, rows=16, cols=64
+    )
+    top = (tiles.n_levels - 1, 0)
+    done = threading.Event()
+    ready = []
+
+    def on_ready(level, ix):
+        ready.append((level, ix))
+        if (level, ix) == top:
+            done.set()
+
+    worker = TileWorker(tiles, on_ready, progressive=2)
+    worker.request([top])
+    assert done.wait(10.0)
+    worker.stop()
+    # antes de la tesela pedida llegan sus 4 descendientes dos niveles más abajo
+    assert ready == [(top[0] - 2, i) for i in range(4)] + [top]
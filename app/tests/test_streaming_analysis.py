@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.core.analysis import analyze_mono
+from app.core.streaming_analysis import StreamingQuantile, analyze_stream
+
+
+def _test_signal(sr: int, dur: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sr * dur)) / sr
+    y = 0.3 * np.sin(2 * np.pi * 100 * t) * (1 + np.sin(2 * np.pi * 0.5 * t))
+    y += 0.1 * rng.standard_normal(t.size)
+    for k in range(int(dur / 0.5)):
+        i = int(k * 0.5 * sr)
+        y[i : i + 300] += 0.8
+    return y.astype(np.float32)
+
+
+def test_streaming_quantile_close_to_percentile():
+    rng = np.random.default_rng(1)
+    x = rng.lognormal(mean=0.0, sigma=3.0, size=50_000)
+    q = StreamingQuantile(99.0)
+    for chunk in np.array_split(x, 17):
+        q.update(chunk)
+    exact = np.percentile(x, 99)
+    assert abs(q.value() - exact) / exact < 0.015
+
+
+def test_streaming_matches_in_memory_within_tolerance():
+    sr = 22050
+    y = _test_signal(sr, 8.0)
+    ref = analyze_mono(y, sr)
+    blocks = [y[i : i + 12345] for i in range(0, y.size, 12345)]
+    res = analyze_stream(blocks, sr)
+    assert res.S_mag is None
+    assert len(res.times) == len(ref.times)
+    for name, curve in ref.energy_bands.items():
+        np.testing.assert_allclose(res.energy_bands[name], curve, rtol=0.02, atol=0.02)
+    np.testing.assert_allclose(res.energy_global, ref.energy_global, rtol=0.02, atol=0.02)
+    np.testing.assert_allclose(res.onset_envelope, ref.onset_envelope, atol=1e-3)
+    np.testing.assert_array_equal(res.beat_frames, ref.beat_frames)
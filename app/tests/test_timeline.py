@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+
+from app.core.analysis import AnalysisResult
+from app.core.preset_manager import (
+    BackgroundReactivity,
+    BarsConfig,
+    CenterImageReactivity,
+    VisualMapping,
+)
+from app.core.timeline import FrameTimeline, compile_timeline, load_or_compile
+from app.tests._fixtures import synthetic_analysis
+
+
+def _result() -> AnalysisResult:
+    res = synthetic_analysis(10.0, bars=16)  # 862 frames de análisis
+    res.bar_spectrum *= 0.2
+    res.bar_spectrum[:, 300] = 1.0  # pico de un solo frame de análisis
+    return res
+
+
+def test_timeline_shapes_and_peak_hold():
+    res = _result()
+    mapping = VisualMapping(attack_ms=0, release_ms=100, sensitivity=1.0, threshold=0.0)
+    tl = compile_timeline(res, 24, mapping=mapping, bars=BarsConfig(count=16, scale=0.5))
+    assert tl.n_frames == int(862 / (44100 / 512) * 24)
+    assert tl.bars.shape == (tl.n_frames, 16) and tl.bars.flags.c_contiguous
+    # El pico de un frame de análisis (≈3.5 s) aparece en el frame de vídeo que lo cubre
+    i = int(300 * 512 / 44100 * 24)
+    np.testing.assert_allclose(tl.bars[i], 0.5, atol=1e-6)
+    # Pulso de beat: 1 justo en los frames de vídeo que contienen un beat
+    hits = np.floor(res.beat_times * 24).astype(int)
+    np.testing.assert_array_equal(tl.beat_pulse[hits[hits < tl.n_frames]], 1.0)
+    assert tl.frame(10)["bars"].shape == (16,)
+
+
+def test_timeline_save_load_and_reuse(tmp_path: Path):
+    res = _result()
+    kw = dict(bars=BarsConfig(count=16), center=CenterImageReactivity(shake=0.1))
+    tl = load_or_compile(res, tmp_path / "tl", 30, **kw)
+    assert isinstance(tl.bars, np.memmap)
+    ref = compile_timeline(res, 30, **kw)
+    for name in (
+        "bars",
+        "ring_radius",
+        "background",
+        "beat_pulse",
+        "scale",
+        "rotation",
+        "shake",
+        "bloom",
+    ):
+        np.testing.assert_array_equal(getattr(tl, name), getattr(ref, name))
+    mtime = (tmp_path / "tl" / "meta.json").stat().st_mtime_ns
+    again = load_or_compile(res, tmp_path / "tl", 30, **kw)
+    assert (tmp_path / "tl" / "meta.json").stat().st_mtime_ns == mtime
+    assert again.n_frames == tl.n_frames
+    other = load_or_compile(res, tmp_path / "tl", 60, **kw)
+    assert other.fps == 60 and FrameTimeline.load(tmp_path / "tl").fps == 60
+
+
+def test_background_band_target_falls_back_to_global_without_three_bands():
+    res = _result()
+    res.energy_bands = {f"band{i}": res.bar_spectrum[i] for i in range(5)}
+    bars = BarsConfig(count=16)
+    tl = compile_timeline(res, 24, bars=bars, background=BackgroundReactivity(target="bass"))
+    ref = compile_timeline(res, 24, bars=bars, background=BackgroundReactivity(target="global"))
+    np.testing.assert_array_equal(tl.background, ref.background)
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from app.core.analysis import analyze_file
+from app.core.analysis_cache import AnalysisCache
+from app.core.waveform import WaveformBuilder, _peaks_numpy, waveform_pyramid
+
+
+def test_pyramid_matches_brute_force_and_ignores_block_boundaries():
+    sr, block = 8000, 16
+    rng = np.random.default_rng(1)
+    y = np.clip(rng.standard_normal(sr * 3 + 5) * np.linspace(0.01, 0.5, sr * 3 + 5), -1, 1).astype(
+        np.float32
+    )
+    wf = waveform_pyramid(y, sr, block=block)
+    builder = WaveformBuilder(sr, block=block)
+    for chunk in np.array_split(y, 37):  # bloques de tamaño arbitrario, como en streaming
+        builder.feed(chunk)
+    np.testing.assert_array_equal(builder.finish().data, wf.data)
+    full = len(y) // block * block
+    ref = _peaks_numpy(y, block)  # camino NumPy (sin numba)
+    assert wf.level(0).shape == (len(ref) + 1, 3)  # + el bloque parcial del final
+    np.testing.assert_allclose(wf.level(0)[:-1] / 32767.0, ref, atol=1.0 / 32767)
+    k = 3  # cada punto del nivel 3 resume 8 bloques
+    spp = wf.samples_per_point(k)
+    seg = y[: full // spp * spp].reshape(-1, spp)
+    lv = wf.level(k)[: len(seg)] / 32767.0
+    np.testing.assert_allclose(lv[:, 0], seg.min(axis=1), atol=1e-4)
+    np.testing.assert_allclose(lv[:, 1], seg.max(axis=1), atol=1e-4)
+    np.testing.assert_allclose(lv[:, 2], np.sqrt((seg**2).mean(axis=1)), atol=2e-4)
+
+
+def test_view_never_returns_more_points_than_pixels_plus_margin():
+    sr = 8000
+    wf = waveform_pyramid(np.zeros(sr * 60, np.float32), sr, block=16)
+    assert len(wf.level(wf.n_levels - 1)) == 1  # el nivel más grueso resume toda la pista
+    for t0, t1, px in ((0.0, 60.0, 800), (10.0, 12.0, 800), (30.0, 30.01, 800), (0.0, 60.0, 50)):
+        t, lo, hi, rms = wf.view(t0, t1, px)
+        k = wf.level_for(t0, t1, px)
+        assert len(t) <= px + 3  # los puntos de la ventana más uno de margen a cada lado
+        assert k == 0 or (t1 - t0) * sr / wf.samples_per_point(k - 1) > px  # el más fino que cabe
+        assert (
+            len(t) == len(lo) == len(hi) == len(rms) and t[0] <= t0 + wf.samples_per_point(k) / sr
+        )
+
+
+def test_analysis_stores_waveform_in_cache(tmp_path: Path):
+    sr = 22050
+    t = np.arange(sr) / sr
+    y = (0.5 * np.sin(2 * np.pi * 110.0 * t) * (t > 0.5)).astype(np.float32)
+    wav = tmp_path / "half.wav"
+    sf.write(wav, y, sr)
+    cache = AnalysisCache(tmp_path / "cache")
+    kw = dict(
+        target_sr=sr, n_fft=1024, hop=256, compute_beats=False, keep_spectrum="none", cache=cache
+    )
+    cold = analyze_file(wav, **kw).waveform_pyramid()
+    warm = analyze_file(wav, **kw).waveform_pyramid()
+    assert warm is not None and isinstance(warm.data, np.memmap)
+    np.testing.assert_array_equal(cold.data, warm.data)
+    assert warm.n_samples == sr and abs(warm.duration - 1.0) < 1e-9
+    _, lo, hi, _ = warm.view(0.0, 1.0, 20)
+    # (el último punto resume el bloque parcial del final, unas pocas muestras)
+    assert (
+        len(hi) <= 22 and hi[:4].max() < 0.01 and hi[-4:-1].min() > 0.45 and lo[-4:-1].max() < -0.45
+    )
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from PySide6.QtCore import Qt
+import threading
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtWidgets import (
+    QFileDialog,
     QMainWindow,
     QSplitter,
     QStatusBar,
     QTabWidget,
     QToolBar,
+    QVBoxLayout,
+    QWidget,
 )
 
-from app.core.render.preview import PreviewSurface
+from app.core.preset_manager import Preset
+from app.core.render.export_ffmpeg import ExportStats, export_file
+from app.core.render.frame_cache import Filmstrip, FrameCache
+from app.core.render.parallel import ParallelExportStats, default_workers
+from app.core.render.playback import AdaptiveQuality, PreviewPlayer
+from app.core.render.preview import FilmstripBar, PreviewAudio, PreviewSurface
 from app.ui.panels.audio_panel import AudioPanel
 from app.ui.panels.background_panel import BackgroundPanel
 from app.ui.panels.center_image_panel import CenterImagePanel
@@ -18,10 +30,103 @@ from app.ui.panels.output_panel import OutputPanel
 from app.ui.panels.visual_panel import VisualPanel
 
 
+class ExportThread(QThread):
+    """Ejecuta `export_file` fuera del hilo de la UI; `cancel` lo detiene entre frames."""
+
+    progress = Signal(int, int)
+    finished_ok = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, audio_path: str, preset: Preset, output: str, parent=None) -> None:
+        super().__init__(parent)
+        self.audio_path = audio_path
+        self.preset = preset
+        self.output = output
+        self.cancel = threading.Event()
+
+    def run(self) -> None:  # pragma: no cover - hilo Qt
+        from app.core.analysis_cache import AnalysisCache
+
+        try:
+            # Misma caché y parámetros que `_analyze`: reutiliza el análisis de la vista previa
+            stats = export_file(
+                self.audio_path,
+                self.preset,
+                self.output,
+                cache=AnalysisCache(),
+                workers=self.preset.output.export_workers or default_workers(),
+                progress=lambda done, total: self.progress.emit(done, total),
+                cancel=self.cancel,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_ok.emit(stats)
+
+
+def _analyze(audio_path: str, preset: Preset):
+    """Análisis con caché para la UI; mismos parámetros en todas partes (una entrada)."""
+    from app.core.analysis import analysis_kwargs, analyze_file
+    from app.core.analysis_cache import AnalysisCache
+
+    return analyze_file(
+        audio_path,
+        cache=AnalysisCache(),
+        keep_spectrum="none",
+        **analysis_kwargs(preset.audio.analysis, preset.visual.bars),
+    )
+
+
+class AudioAnalysisThread(QThread):
+    """Analiza el audio recién abierto (forma de onda, tempo) fuera del hilo de la UI."""
+
+    ready = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, audio_path: str, preset: Preset, parent=None) -> None:
+        super().__init__(parent)
+        self.audio_path = audio_path
+        self.preset = preset
+
+    def run(self) -> None:  # pragma: no cover - hilo Qt
+        try:
+            self.ready.emit(_analyze(self.audio_path, self.preset))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class PreviewPrepareThread(QThread):
+    """Análisis (con caché) y timeline del audio para la vista previa, fuera del hilo de la UI."""
+
+    ready = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, audio_path: str, preset: Preset, parent=None) -> None:
+        super().__init__(parent)
+        self.audio_path = audio_path
+        self.preset = preset
+
+    def run(self) -> None:  # pragma: no cover - hilo Qt
+        from app.core.timeline import timeline_from_preset
+
+        try:
+            self.ready.emit(
+                timeline_from_preset(_analyze(self.audio_path, self.preset), self.preset)
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
 class MainWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("NCS Visualizer")
+        self.preset = Preset()
+        self.audio_path: Optional[str] = None
+        self._export: Optional[ExportThread] = None
+        self._prepare: Optional[PreviewPrepareThread] = None
+        self._analysis: Optional[AudioAnalysisThread] = None
+        self.frame_cache = FrameCache()
 
         self._create_actions()
         self._create_toolbar()
@@ -56,12 +161,21 @@ class MainWindow(QMainWindow):
         self.tab_widget.addTab(BackgroundPanel(self), "Fondo")
         self.tab_widget.addTab(VisualPanel(self), "Visual")
         self.tab_widget.addTab(CenterImagePanel(self), "Imagen")
-        self.tab_widget.addTab(AudioPanel(self), "Audio/Análisis")
+        self.audio_panel = AudioPanel(self)
+        self.audio_panel.button_load_audio.clicked.connect(self.on_open_audio)
+        self.tab_widget.addTab(self.audio_panel, "Audio/Análisis")
         self.tab_widget.addTab(OutputPanel(self), "Salida")
 
-        self.preview = PreviewSurface(splitter)
+        preview_box = QWidget(splitter)
+        box_layout = QVBoxLayout(preview_box)
+        box_layout.setContentsMargins(0, 0, 0, 0)
+        box_layout.setSpacing(2)
+        self.preview = PreviewSurface(preview_box)
+        self.filmstrip_bar = FilmstripBar(self.preview, preview_box)
+        box_layout.addWidget(self.preview, 1)
+        box_layout.addWidget(self.filmstrip_bar)
         splitter.addWidget(self.tab_widget)
-        splitter.addWidget(self.preview)
+        splitter.addWidget(preview_box)
         splitter.setStretchFactor(0, 0)
         splitter.setStretchFactor(1, 1)
 
@@ -90,8 +204,28 @@ class MainWindow(QMainWindow):
         self.addAction(redo_action)
         self.addAction(play_pause_action)
 
-    def on_open_audio(self) -> None:  # pragma: no cover - placeholder
-        self.statusBar().showMessage("Abrir audio (TODO)")
+    def on_open_audio(self) -> None:  # pragma: no cover - GUI
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Abrir audio", "", "Audio (*.wav *.mp3 *.ogg *.flac *.m4a)"
+        )
+        if path:
+            self.audio_path = path
+            self.preview.set_player(None)  # la vista previa se prepara de nuevo al pulsar play
+            self.filmstrip_bar.set_filmstrip(None)
+            self.frame_cache.clear()  # los frames son de otro audio
+            self.statusBar().showMessage(f"Analizando {Path(path).name}…")
+            self._analysis = AudioAnalysisThread(path, self.preset, self)
+            self._analysis.ready.connect(lambda res, p=path: self._on_audio_analyzed(p, res))
+            self._analysis.failed.connect(
+                lambda msg: self.statusBar().showMessage(f"Error al analizar: {msg}")
+            )
+            self._analysis.start()
+
+    def _on_audio_analyzed(self, path: str, res) -> None:  # pragma: no cover - GUI
+        if path != self.audio_path:
+            return  # llegó tarde: ya se abrió otro audio
+        self.audio_panel.show_analysis(res, path, self.preset.visual.bars.distribution)
+        self.statusBar().showMessage(f"Audio: {Path(self.audio_path).name}")
 
     def on_open_preset(self) -> None:  # pragma: no cover - placeholder
         self.statusBar().showMessage("Abrir preset (TODO)")
@@ -99,11 +233,86 @@ class MainWindow(QMainWindow):
     def on_save_preset(self) -> None:  # pragma: no cover - placeholder
         self.statusBar().showMessage("Guardar preset (TODO)")
 
-    def on_export(self) -> None:  # pragma: no cover - placeholder
-        self.statusBar().showMessage("Exportar (TODO)")
+    def on_export(self) -> None:  # pragma: no cover - GUI
+        if self._export is not None and self._export.isRunning():
+            self._export.cancel.set()
+            self.statusBar().showMessage("Cancelando exportación…")
+            return
+        if not self.audio_path:
+            self.statusBar().showMessage("Abre un audio antes de exportar")
+            return
+        default = str(Path(self.audio_path).with_suffix(".mp4"))
+        output, _ = QFileDialog.getSaveFileName(
+            self, "Exportar vídeo", default, "Vídeo MP4 (*.mp4)"
+        )
+        if not output:
+            return
+        self._export = ExportThread(self.audio_path, self.preset, output, self)
+        self._export.progress.connect(self._on_export_progress)
+        self._export.finished_ok.connect(self._on_export_done)
+        self._export.failed.connect(
+            lambda msg: self.statusBar().showMessage(f"Error al exportar: {msg}")
+        )
+        self._export.start()
+        self.statusBar().showMessage("Exportando…")
+
+    def _on_export_progress(self, done: int, total: int) -> None:  # pragma: no cover - GUI
+        self.statusBar().showMessage(f"Exportando {done}/{total} frames")
+
+    def _on_export_done(self, stats: ExportStats | ParallelExportStats) -> None:  # pragma: no cover
+        if self._export is not None and self._export.cancel.is_set():
+            self.statusBar().showMessage("Exportación cancelada")
+            return
+        audio = {"copy": "audio copiado (AAC original)", "none": "sin audio"}.get(
+            stats.audio, f"audio recodificado ({stats.audio})"
+        )
+        if isinstance(stats, ParallelExportStats):
+            detail = f"{stats.workers} procesos, concat {stats.concat_s:.1f} s"
+        else:
+            detail = (
+                f"espera de buffer {stats.wait_s:.1f} s, ffmpeg bloqueado {stats.stall_s:.1f} s"
+            )
+        self.statusBar().showMessage(
+            f"Exportado: {stats.frames} frames en {stats.seconds:.1f} s ({stats.fps:.1f} fps), "
+            f"{audio}; {detail}"
+        )
+
+    def on_toggle_play(self) -> None:  # pragma: no cover - GUI
+        if self.preview.player is not None:
+            playing = self.preview.toggle()
+            self.statusBar().showMessage("Reproduciendo" if playing else "En pausa")
+            return
+        if not self.audio_path:
+            self.statusBar().showMessage("Abre un audio para la vista previa")
+            return
+        if self._prepare is not None and self._prepare.isRunning():
+            return
+        self._prepare = PreviewPrepareThread(self.audio_path, self.preset, self)
+        self._prepare.ready.connect(self._on_preview_ready)
+        self._prepare.failed.connect(
+            lambda msg: self.statusBar().showMessage(f"Error en la vista previa: {msg}")
+        )
+        self._prepare.start()
+        self.statusBar().showMessage("Analizando audio para la vista previa…")
+
+    def _on_preview_ready(self, timeline) -> None:  # pragma: no cover - GUI
+        quality = AdaptiveQuality(self.preset, timeline, view=self.preview.view_size())
+        width, height = quality.size()
+        renderer = quality.build()
+        self.frame_cache.retain(renderer.key)  # fuera los frames de versiones anteriores del preset
+        audio = PreviewAudio(self.audio_path, self)
+        player = PreviewPlayer(renderer, quality=quality, cache=self.frame_cache)
+        self.preview.set_player(player, audio)
+        strip = self.filmstrip_bar.filmstrip
+        if strip is None or strip.key != renderer.key:
+
+            def busy() -> bool:
+                return self.preview.player is not None and self.preview.player.playing
 
-    def on_toggle_play(self) -> None:  # pragma: no cover - placeholder
-        self.statusBar().showMessage("Toggle play (TODO)")
+            self.filmstrip_bar.set_filmstrip(Filmstrip(self.preset, timeline, busy=busy))
+        self.preview.play()
+        note = "" if audio.available else " (sin salida de audio)"
+        self.statusBar().showMessage(f"Reproduciendo a {width}x{height}{note}")
 
     def on_undo(self) -> None:  # pragma: no cover - placeholder
         self.statusBar().showMessage("Deshacer (TODO)")
@@ -1,7 +1,171 @@
 from __future__ import annotations
 
+from typing import Optional
+
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import QRectF, Signal
 from PySide6.QtWidgets import QLabel, QPushButton, QVBoxLayout, QWidget
 
+from app.core.spectrogram_tiles import PROGRESSIVE_LEVELS, SpectrogramTiles, TileWorker, row_of
+from app.core.waveform import WaveformPyramid
+
+FREQ_TICKS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+
+class WaveformView(pg.PlotWidget):
+    """Forma de onda desde una `WaveformPyramid`: a cada zoom/desplazamiento pinta
+    solo el nivel con como mucho un punto por píxel de ancho (min/max como barra
+    vertical por punto y, más clara, la franja ±RMS)."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.pyramid: Optional[WaveformPyramid] = None
+        self.setBackground(None)
+        self.setMouseEnabled(x=True, y=False)
+        self.setMenuEnabled(False)
+        self.hideAxis("left")
+        self.setYRange(-1.0, 1.0, padding=0.02)
+        self.setMinimumHeight(120)
+        self._peaks = pg.PlotDataItem(connect="pairs", pen=pg.mkPen((110, 150, 220), width=1))
+        self._rms = pg.PlotDataItem(connect="pairs", pen=pg.mkPen((190, 215, 255), width=1))
+        self.addItem(self._peaks)
+        self.addItem(self._rms)
+        self.getViewBox().sigXRangeChanged.connect(self._refresh)
+        self.getViewBox().sigResized.connect(self._refresh)  # más ancho: nivel más fino
+
+    def set_pyramid(self, pyramid: Optional[WaveformPyramid]) -> None:
+        self.pyramid = pyramid
+        if pyramid is None or pyramid.n_samples == 0:
+            self._peaks.setData([], [])
+            self._rms.setData([], [])
+            return
+        vb = self.getViewBox()
+        vb.setLimits(xMin=0.0, xMax=pyramid.duration, minXRange=64.0 / pyramid.sr)
+        vb.setXRange(0.0, pyramid.duration, padding=0.0)
+        self._refresh()
+
+    def _refresh(self, *_) -> None:
+        wf = self.pyramid
+        if wf is None:
+            return
+        (t0, t1), _ = self.viewRange()
+        pixels = max(int(self.getViewBox().width()), 1)
+        t, lo, hi, rms = wf.view(max(t0, 0.0), min(t1, wf.duration), pixels)
+        # Dos vértices por punto (connect="pairs"): un segmento vertical por punto
+        x = np.repeat(t, 2)
+        peaks = np.empty_like(x)
+        peaks[0::2], peaks[1::2] = lo, hi
+        band = np.repeat(rms, 2)
+        band[0::2] *= -1.0
+        self._peaks.setData(x, peaks)
+        self._rms.setData(x, band)
+
+
+class SpectrogramView(pg.PlotWidget):
+    """Espectrograma desde una `SpectrogramTiles`: a cada zoom/desplazamiento pide
+    solo las teselas visibles del nivel adecuado al ancho. Las que faltan se
+    calculan en un `TileWorker`; mientras tanto se ve la tesela más gruesa ya
+    calculada que las cubre (o las más finas, si no hay ninguna)."""
+
+    tile_ready = Signal()
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.tiles: Optional[SpectrogramTiles] = None
+        self._worker: Optional[TileWorker] = None
+        self._items: dict = {}  # (nivel, índice) -> ImageItem en la escena
+        self._spare: list = []
+        self._lut = pg.colormap.get("inferno").getLookupTable(nPts=256)
+        self.setBackground(None)
+        self.setMouseEnabled(x=True, y=False)
+        self.setMenuEnabled(False)
+        self.setMinimumHeight(140)
+        self.tile_ready.connect(self._refresh)  # desde el hilo del worker: conexión en cola
+        self.getViewBox().sigXRangeChanged.connect(self._refresh)
+        self.getViewBox().sigResized.connect(self._refresh)
+
+    def set_tiles(self, tiles: Optional[SpectrogramTiles]) -> None:
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        for key in list(self._items):
+            self._release(key)
+        self.tiles = tiles
+        if tiles is None or tiles.n_frames == 0:
+            return
+        self._worker = TileWorker(tiles, lambda level, ix: self.tile_ready.emit())
+        ticks = [
+            (
+                row_of(f, tiles.sr, tiles.rows, tiles.distribution),
+                f"{f / 1000:g}k" if f >= 1000 else f"{f}",
+            )
+            for f in FREQ_TICKS
+            if f < tiles.sr / 2
+        ]
+        self.getAxis("left").setTicks([ticks])
+        vb = self.getViewBox()
+        vb.setLimits(xMin=0.0, xMax=tiles.duration, yMin=0.0, yMax=float(tiles.rows))
+        vb.setYRange(0.0, float(tiles.rows), padding=0.0)
+        vb.setXRange(0.0, tiles.duration, padding=0.0)
+        self._refresh()
+
+    def closeEvent(self, event) -> None:  # pragma: no cover - GUI
+        self.set_tiles(None)
+        super().closeEvent(event)
+
+    def _release(self, key) -> None:
+        item = self._items.pop(key)
+        self.removeItem(item)
+        self._spare.append(item)
+
+    def _show(self, level: int, ix: int, tile: np.ndarray) -> None:
+        if (level, ix) in self._items:
+            return
+        item = self._spare.pop() if self._spare else pg.ImageItem(axisOrder="row-major")
+        item.setImage(tile, autoLevels=False, levels=(0, 255), lut=self._lut)
+        t0, t1 = self.tiles.tile_span(level, ix)
+        item.setRect(QRectF(t0, 0.0, t1 - t0, float(self.tiles.rows)))
+        item.setZValue(-level)  # las más finas encima
+        self.addItem(item)
+        self._items[(level, ix)] = item
+
+    def _refresh(self, *_) -> None:
+        tiles = self.tiles
+        if tiles is None or self._worker is None:
+            return
+        (t0, t1), _ = self.viewRange()
+        pixels = max(int(self.getViewBox().width()), 1)
+        level, ixs = tiles.visible(max(t0, 0.0), min(t1, tiles.duration), pixels)
+        wanted: dict = {}
+        missing = []
+        for ix in ixs:
+            tile = tiles.cached(level, ix)
+            if tile is not None:
+                wanted[(level, ix)] = tile
+                continue
+            missing.append((level, ix))
+            # Provisional: el ancestro más cercano ya calculado, o si no los descendientes
+            for up in range(level + 1, tiles.n_levels):
+                anc = (up, ix >> (up - level))
+                tile = wanted.get(anc)
+                tile = tile if tile is not None else tiles.cached(*anc)
+                if tile is not None:
+                    wanted[anc] = tile
+                    break
+            else:
+                for down in range(1, min(PROGRESSIVE_LEVELS, level) + 1):
+                    for child in range(ix << down, (ix + 1) << down):
+                        if child < tiles.tiles_in(level - down):
+                            tile = tiles.cached(level - down, child)
+                            if tile is not None:
+                                wanted[(level - down, child)] = tile
+        for key in [k for k in self._items if k not in wanted]:
+            self._release(key)
+        for (lv, ix), tile in wanted.items():
+            self._show(lv, ix, tile)
+        self._worker.request(missing)
+
 
 class AudioPanel(QWidget):
     def __init__(self, parent: QWidget | None = None) -> None:
@@ -10,10 +174,26 @@ class AudioPanel(QWidget):
 
         self.button_load_audio = QPushButton("Cargar audio", self)
         self.label_sample_rate = QLabel("Sample rate: --", self)
-        self.label_waveform_placeholder = QLabel("Waveform preview (TODO)", self)
-        self.label_waveform_placeholder.setStyleSheet("color: gray; font-style: italic;")
+        self.waveform = WaveformView(self)
+        self.spectrogram = SpectrogramView(self)
+        self.spectrogram.setXLink(self.waveform)  # mismo zoom y desplazamiento
+        # Eje izquierdo del mismo ancho en ambas para que los tiempos queden alineados
+        self.waveform.showAxis("left")
+        self.waveform.getAxis("left").setStyle(showValues=False)
+        for view in (self.waveform, self.spectrogram):
+            view.getAxis("left").setWidth(40)
 
         layout.addWidget(self.button_load_audio)
         layout.addWidget(self.label_sample_rate)
-        layout.addWidget(self.label_waveform_placeholder)
+        layout.addWidget(self.waveform)
+        layout.addWidget(self.spectrogram)
         layout.addStretch(1)
+
+    def show_analysis(self, res, path: Optional[str] = None, distribution: str = "log") -> None:
+        """Sample rate, tempo, forma de onda y (con `path`) espectrograma de un `AnalysisResult`."""
+        self.label_sample_rate.setText(f"Sample rate: {res.sr} Hz · tempo {res.tempo_bpm:.0f} BPM")
+        self.waveform.set_pyramid(res.waveform_pyramid())
+        tiles = (
+            SpectrogramTiles.from_analysis(res, path, distribution=distribution) if path else None
+        )
+        self.spectrogram.set_tiles(tiles)